@@ -12,6 +12,7 @@ from datetime import datetime
 from pathlib import Path
 import re
 import config
+from metrics import timer, increment, write_metrics
 
 try:
     import pdfplumber
@@ -73,24 +74,27 @@ class TextExtractor:
                 all_tables = []
 
                 for page_num, page in enumerate(pdf.pages, 1):
-                    # Extract text
-                    page_text = page.extract_text()
-                    if page_text:
-                        pages_text[f"page_{page_num}"] = page_text
-                        all_text.append(page_text)
-
-                    # Extract tables
-                    tables = page.extract_tables()
-                    if tables:
-                        for table_idx, table in enumerate(tables):
-                            all_tables.append({
-                                'page': page_num,
-                                'table_index': table_idx,
-                                'data': table
-                            })
+                    with timer("extract_pdf_page"):
+                        # Extract text
+                        page_text = page.extract_text()
+                        if page_text:
+                            pages_text[f"page_{page_num}"] = page_text
+                            all_text.append(page_text)
+
+                        # Extract tables
+                        tables = page.extract_tables()
+                        if tables:
+                            for table_idx, table in enumerate(tables):
+                                all_tables.append({
+                                    'page': page_num,
+                                    'table_index': table_idx,
+                                    'data': table
+                                })
+                    increment("pdf_pages_extracted")
 
                 # Combine all text
                 full_text = "\n\n".join(all_text)
+                increment("pdf_chars_extracted", len(full_text))
 
                 result = {
                     'source': 'consensus',
@@ -136,7 +140,7 @@ class TextExtractor:
                 xml_files = [f for f in z.namelist() if f.endswith('.xml')]
 
                 for xml_file in xml_files:
-                    with z.open(xml_file) as f:
+                    with timer("extract_xml_member"), z.open(xml_file) as f:
                         try:
                             # Use lxml with recovery mode if available
                             if LXML_AVAILABLE:
@@ -212,6 +216,8 @@ class TextExtractor:
                             }
 
                             results.append(result)
+                            increment("xml_members_extracted")
+                            increment("xml_chars_extracted", len(full_text))
 
                         except ET.ParseError as e:
                             print(f"    [WARN] XML parse error in {xml_file}: {str(e)}")
@@ -251,10 +257,12 @@ class TextExtractor:
             if os.path.exists(output_path):
                 print(f"  [SKIP] Already extracted")
                 self.stats['consensus']['success'] += 1
+                increment("documents_skipped", source="consensus")
                 continue
 
             # Extract text
-            result = self.extract_pdf_text(pdf_path)
+            with timer("extract_pdf_document"):
+                result = self.extract_pdf_text(pdf_path)
 
             if result:
                 # Save result
@@ -304,10 +312,12 @@ class TextExtractor:
             if os.path.exists(output_path):
                 print(f"  [SKIP] Already extracted")
                 self.stats['dart']['success'] += 1
+                increment("documents_skipped", source="dart")
                 continue
 
             # Extract text
-            results = self.extract_xml_text(zip_path)
+            with timer("extract_dart_zip"):
+                results = self.extract_xml_text(zip_path)
 
             if results:
                 # Save all results for this ZIP file
@@ -429,6 +439,8 @@ def main():
         print(f"{'='*60}")
         print("\n[OK] Text extraction completed!")
 
+        write_metrics("04_extract_text")
+
     except Exception as e:
         print(f"\n[ERROR] Error during extraction: {str(e)}")
         import traceback
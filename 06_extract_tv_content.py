@@ -3,8 +3,10 @@ Step 5.5: TV 관련 문단만 추출
 
 Consensus 문서에서 TV 관련 키워드가 포함된 문단과 주변 문맥만 추출하여
 별도 파일로 저장합니다. 이를 통해 LLM API 호출 시 비용을 절감할 수 있습니다.
+이전 실행 이후 새로 추가되었거나 변경된 문서만 다시 추출합니다.
 """
 
+import hashlib
 import json
 import os
 from datetime import datetime
@@ -13,8 +15,16 @@ from config import (
     TV_CONTENT_DIR,
     TV_CONTENT_CONSENSUS_DIR,
     EXTRACTED_CONSENSUS_DIR,
-    TV_KEYWORDS
+    TV_KEYWORDS,
+    TV_CONTENT_TOKEN_BUDGET
 )
+from context_packer import pack_paragraphs
+from paragraph_dedup import deduplicate_paragraphs, paragraph_signature, signature_settings_fingerprint
+from token_counter import count_tokens, tokenizer_name
+from metrics import timer, increment, write_metrics
+
+# 키워드 포함 문단만 추출 (주변 문맥 0개)
+CONTEXT_SENTENCES = 0
 
 # 05_filter_tv_reports.py의 함수 재사용
 def extract_tv_paragraphs(text, keywords, context_sentences=2):
@@ -98,14 +108,171 @@ def extract_tv_paragraphs(text, keywords, context_sentences=2):
         "total_chars": total_chars
     }
 
+def compute_fingerprint(content_hash, keywords, context_sentences):
+    """원본 텍스트 해시 + 키워드 목록 + 문맥 설정으로 문서 fingerprint 생성"""
+    payload = json.dumps({
+        "content_hash": content_hash,
+        "keywords": sorted(keywords),
+        "context_sentences": context_sentences
+    }, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def hash_source_file(file_path, previous_info=None):
+    """
+    원본 텍스트 파일 해시 계산
+
+    크기와 수정 시각이 이전 실행과 같으면 저장된 해시를 재사용하여
+    변경되지 않은 문서는 파일을 다시 읽지 않습니다.
+
+    Returns:
+        dict: {"content_hash", "source_size", "source_mtime"}
+    """
+    stat = os.stat(file_path)
+    if (previous_info
+            and previous_info.get("source_size") == stat.st_size
+            and previous_info.get("source_mtime") == stat.st_mtime
+            and previous_info.get("content_hash")):
+        content_hash = previous_info["content_hash"]
+    else:
+        digest = hashlib.sha256()
+        with open(file_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(chunk)
+        content_hash = digest.hexdigest()
+
+    return {
+        "content_hash": content_hash,
+        "source_size": stat.st_size,
+        "source_mtime": stat.st_mtime
+    }
+
+
+def load_json_if_exists(path, default):
+    """JSON 파일이 있으면 로드, 없거나 손상되었으면 기본값"""
+    if not os.path.exists(path):
+        return default
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (json.JSONDecodeError, OSError) as e:
+        print(f"[WARN] {path} 로드 실패, 새로 생성합니다: {str(e)}")
+        return default
+
+
+def extract_document(report, source_info):
+    """
+    문서 1개에서 TV 문단 추출 (패킹 전 단계)
+
+    Returns:
+        tuple: (output_data, doc_info)
+    """
+    filename = report["filename"]
+    company = report["company"]
+    date = report["date"]
+
+    with open(report["file_path"], 'r', encoding='utf-8') as f:
+        original_data = json.load(f)
+
+    original_text = original_data.get("text", "")
+    original_char_count = len(original_text)
+
+    with timer("extract_tv_paragraphs"):
+        tv_result = extract_tv_paragraphs(original_text, TV_KEYWORDS, context_sentences=CONTEXT_SENTENCES)
+    increment("source_chars_scanned", original_char_count)
+
+    tv_char_count = tv_result["total_chars"]
+    reduction_rate = ((original_char_count - tv_char_count) / original_char_count * 100) if original_char_count > 0 else 0
+
+    output_data = {
+        "source": "consensus",
+        "filename": filename,
+        "company": company,
+        "date": date,
+        "original_char_count": original_char_count,
+        "tv_content": {
+            "found_keywords": tv_result["found_keywords"],
+            "paragraphs": tv_result["relevant_paragraphs"],
+            "total_char_count": tv_char_count,
+            "paragraph_count": tv_result["paragraph_count"],
+            "reduction_rate": round(reduction_rate, 1)
+        },
+        "extracted_at": datetime.now().isoformat()
+    }
+
+    doc_info = {
+        "filename": filename,
+        "company": company,
+        "date": date,
+        "original_chars": original_char_count,
+        "original_tokens": count_tokens(original_text),
+        "tv_chars": tv_char_count,
+        "reduction_rate": round(reduction_rate, 1),
+        "keywords": tv_result["found_keywords"],
+        "paragraph_count": tv_result["paragraph_count"],
+        "output_file": filename.replace(".pdf", "_tv_content.json"),
+        "fingerprint": compute_fingerprint(source_info["content_hash"], TV_KEYWORDS, CONTEXT_SENTENCES),
+        **source_info
+    }
+
+    return output_data, doc_info
+
+
+def summarize_documents(documents_info):
+    """문서 정보 목록에서 전체/회사별 통계 계산"""
+    stats = {
+        "total_documents": 0,
+        "total_original_chars": 0,
+        "total_tv_chars": 0,
+        "total_original_tokens": 0,
+        "total_packed_tokens": 0,
+        "total_dropped_paragraphs": 0,
+        "avg_reduction_rate": 0,
+        "by_company": {}
+    }
+
+    for info in documents_info:
+        company = info["company"]
+        if company not in stats["by_company"]:
+            stats["by_company"][company] = {
+                "count": 0,
+                "original_chars": 0,
+                "tv_chars": 0,
+                "packed_tokens": 0
+            }
+
+        stats["total_documents"] += 1
+        stats["total_original_chars"] += info["original_chars"]
+        stats["total_tv_chars"] += info["tv_chars"]
+        stats["total_original_tokens"] += info.get("original_tokens", 0)
+        stats["total_packed_tokens"] += info.get("packed_tokens", 0)
+        stats["total_dropped_paragraphs"] += info.get("dropped_paragraph_count", 0)
+        stats["by_company"][company]["count"] += 1
+        stats["by_company"][company]["original_chars"] += info["original_chars"]
+        stats["by_company"][company]["tv_chars"] += info["tv_chars"]
+        stats["by_company"][company]["packed_tokens"] += info.get("packed_tokens", 0)
+
+    if stats["total_original_chars"] > 0:
+        overall_reduction = (stats["total_original_chars"] - stats["total_tv_chars"]) / stats["total_original_chars"] * 100
+        stats["avg_reduction_rate"] = round(overall_reduction, 1)
+
+    return stats
+
+
 def extract_consensus_tv_content():
-    """Consensus 문서에서 TV 관련 문단만 추출"""
+    """
+    Consensus 문서에서 TV 관련 문단만 추출
+
+    이전 실행의 인덱스에 저장된 fingerprint(원본 텍스트 해시 + 키워드 + 문맥 설정)와
+    비교하여 새 문서나 변경된 문서만 다시 추출하고, 인덱스는 기존 항목을 갱신합니다.
+    """
 
     print("=" * 80)
     print("Step 5.5: Consensus TV 관련 문단 추출")
     print("=" * 80)
     print(f"\nTV 키워드: {', '.join(TV_KEYWORDS)}")
-    print(f"주변 문맥: 키워드 포함 문단만 (주변 문맥 0개)\n")
+    print(f"주변 문맥: 키워드 포함 문단만 (주변 문맥 {CONTEXT_SENTENCES}개)")
+    print(f"문서당 토큰 예산: {TV_CONTENT_TOKEN_BUDGET:,} tokens ({tokenizer_name()})\n")
 
     # filtered_index.json 로드
     filtered_index_path = f"{FILTERED_DIR}/filtered_index.json"
@@ -122,120 +289,174 @@ def extract_consensus_tv_content():
     # 출력 디렉토리 생성
     os.makedirs(TV_CONTENT_CONSENSUS_DIR, exist_ok=True)
 
-    # 통계
-    stats = {
-        "total_documents": 0,
-        "total_original_chars": 0,
-        "total_tv_chars": 0,
-        "avg_reduction_rate": 0,
-        "by_company": {}
-    }
+    # 이전 실행 결과 로드 (인덱스 + 문단 서명 상태)
+    index_path = f"{TV_CONTENT_DIR}/tv_content_index.json"
+    state_path = f"{TV_CONTENT_DIR}/paragraph_signatures.json"
+    previous_index = load_json_if_exists(index_path, {"metadata": {}, "documents": []})
+    previous_docs = {d["filename"]: d for d in previous_index.get("documents", [])}
+    # 서명 설정(MinHash/토큰 카운터)이 바뀌었으면 저장된 서명을 버리고 모든 문서를 다시 추출
+    settings_fingerprint = signature_settings_fingerprint()
+    saved_signatures = load_json_if_exists(state_path, {})
+    signature_state = {}
+    if saved_signatures.get("settings") == settings_fingerprint:
+        signature_state = saved_signatures.get("documents", {})
+    elif saved_signatures:
+        print(f"[WARN] 문단 서명 설정(MinHash/토큰 카운터)이 바뀌어 모든 문서를 다시 추출합니다.")
+
+    # 토큰 예산이 바뀌면 모든 문서를 다시 패킹
+    budget_changed = previous_index.get("metadata", {}).get("token_budget") != TV_CONTENT_TOKEN_BUDGET
 
     documents_info = []
+    changed = {}  # filename -> output_data (새로 추출된 문서)
+    incremental = {"new": 0, "changed": 0, "unchanged": 0, "removed": 0, "failed": 0}
 
     print(f"처리할 Consensus 문서: {len(consensus_reports)}개\n")
 
-    # 각 문서 처리
+    # 각 문서 처리 (fingerprint가 같으면 건너뜀)
     for idx, report in enumerate(consensus_reports, 1):
         filename = report["filename"]
-        company = report["company"]
-        date = report["date"]
-        original_file_path = report["file_path"]
+        previous_info = previous_docs.get(filename)
 
         print(f"[{idx}/{len(consensus_reports)}] {filename}")
 
-        # 회사별 통계 초기화
-        if company not in stats["by_company"]:
-            stats["by_company"][company] = {
-                "count": 0,
-                "original_chars": 0,
-                "tv_chars": 0
-            }
-
-        # 원본 텍스트 로드
         try:
-            with open(original_file_path, 'r', encoding='utf-8') as f:
-                original_data = json.load(f)
-
-            original_text = original_data.get("text", "")
-            original_char_count = len(original_text)
-
-            # TV 관련 문단 추출 (주변 문맥 0개)
-            tv_result = extract_tv_paragraphs(original_text, TV_KEYWORDS, context_sentences=0)
-
-            tv_char_count = tv_result["total_chars"]
-            reduction_rate = ((original_char_count - tv_char_count) / original_char_count * 100) if original_char_count > 0 else 0
-
-            # 결과 저장
-            output_filename = filename.replace(".pdf", "_tv_content.json")
-            output_path = f"{TV_CONTENT_CONSENSUS_DIR}/{output_filename}"
-
-            output_data = {
-                "source": "consensus",
-                "filename": filename,
-                "company": company,
-                "date": date,
-                "original_char_count": original_char_count,
-                "tv_content": {
-                    "found_keywords": tv_result["found_keywords"],
-                    "paragraphs": tv_result["relevant_paragraphs"],
-                    "total_char_count": tv_char_count,
-                    "paragraph_count": tv_result["paragraph_count"],
-                    "reduction_rate": round(reduction_rate, 1)
-                },
-                "extracted_at": datetime.now().isoformat()
-            }
-
-            with open(output_path, 'w', encoding='utf-8') as f:
-                json.dump(output_data, f, ensure_ascii=False, indent=2)
-
-            # 통계 업데이트
-            stats["total_documents"] += 1
-            stats["total_original_chars"] += original_char_count
-            stats["total_tv_chars"] += tv_char_count
-            stats["by_company"][company]["count"] += 1
-            stats["by_company"][company]["original_chars"] += original_char_count
-            stats["by_company"][company]["tv_chars"] += tv_char_count
-
-            # 문서 정보 저장
-            documents_info.append({
-                "filename": filename,
-                "company": company,
-                "date": date,
-                "original_chars": original_char_count,
-                "tv_chars": tv_char_count,
-                "reduction_rate": round(reduction_rate, 1),
-                "keywords": tv_result["found_keywords"],
-                "paragraph_count": tv_result["paragraph_count"],
-                "output_file": output_filename
-            })
+            source_info = hash_source_file(report["file_path"], previous_info)
+            fingerprint = compute_fingerprint(source_info["content_hash"], TV_KEYWORDS, CONTEXT_SENTENCES)
+
+            if (previous_info
+                    and previous_info.get("fingerprint") == fingerprint
+                    and filename in signature_state
+                    and os.path.exists(f"{TV_CONTENT_CONSENSUS_DIR}/{previous_info['output_file']}")):
+                # 이전 실행의 company/date 변경은 메타데이터만 반영
+                documents_info.append({**previous_info, **source_info,
+                                       "company": report["company"], "date": report["date"]})
+                incremental["unchanged"] += 1
+                print(f"  [SKIP] 변경 없음\n")
+                continue
+
+            with timer("extract_document"):
+                output_data, doc_info = extract_document(report, source_info)
+
+            with timer("paragraph_signatures"):
+                signature_state[filename] = {
+                    "date": report["date"],
+                    "paragraphs": [
+                        {"paragraph_index": p["paragraph_index"], **paragraph_signature(p["text"])}
+                        for p in output_data["tv_content"]["paragraphs"]
+                    ],
+                    "duplicate_of": None  # 아직 패킹되지 않음
+                }
+            changed[filename] = output_data
+            documents_info.append(doc_info)
+            incremental["changed" if previous_info else "new"] += 1
 
-            print(f"  원본: {original_char_count:,}자 → TV 문단: {tv_char_count:,}자 ({reduction_rate:.1f}% 감소)")
-            print(f"  키워드: {', '.join(tv_result['found_keywords'])}")
-            print(f"  문단: {tv_result['paragraph_count']}개\n")
+            print(f"  원본: {doc_info['original_chars']:,}자 → TV 문단: {doc_info['tv_chars']:,}자 ({doc_info['reduction_rate']:.1f}% 감소)")
+            print(f"  키워드: {', '.join(doc_info['keywords'])}")
+            print(f"  문단: {doc_info['paragraph_count']}개\n")
 
         except Exception as e:
+            incremental["failed"] += 1
             print(f"  [ERROR] 처리 실패: {str(e)}\n")
             continue
 
-    # 평균 감소율 계산
-    if stats["total_original_chars"] > 0:
-        overall_reduction = (stats["total_original_chars"] - stats["total_tv_chars"]) / stats["total_original_chars"] * 100
-        stats["avg_reduction_rate"] = round(overall_reduction, 1)
+    # filtered_index에서 빠진 문서는 인덱스와 상태에서 제거
+    current_filenames = {info["filename"] for info in documents_info}
+    for filename in list(signature_state):
+        if filename not in current_filenames:
+            del signature_state[filename]
+            if filename in previous_docs:
+                incremental["removed"] += 1
+
+    # 문서 간 중복 문단 제거 (날짜가 가장 이른 문서의 문단을 원본으로 유지)
+    print("문서 간 중복 문단 제거 중 (MinHash/LSH)...")
+    dedup_entries = []
+    for info in sorted(documents_info, key=lambda d: (d["date"], d["filename"])):
+        for para in signature_state[info["filename"]]["paragraphs"]:
+            dedup_entries.append({"filename": info["filename"], **para})
+    with timer("deduplicate_paragraphs"):
+        dedup_result = deduplicate_paragraphs(dedup_entries)
+    dedup_stats = dedup_result["statistics"]
+    print(f"  중복 문단: {dedup_stats['duplicate_paragraphs']}/{dedup_stats['total_paragraphs']}개 "
+          f"({dedup_stats['cluster_count']}개 클러스터, {dedup_stats['duplicate_tokens']:,} tokens 제거)\n")
+
+    # 새로 추출되었거나 중복 표시가 바뀐 문서만 다시 패킹하여 저장
+    repacked = 0
+    for info in documents_info:
+        filename = info["filename"]
+        duplicate_of = {
+            str(index): ref for index, ref in dedup_result["duplicate_of"].get(filename, {}).items()
+        }
+        state = signature_state[filename]
+        if filename not in changed and not budget_changed and state.get("duplicate_of") == duplicate_of:
+            continue
+
+        output_path = f"{TV_CONTENT_CONSENSUS_DIR}/{info['output_file']}"
+        if filename in changed:
+            output_data = changed[filename]
+        else:
+            with open(output_path, 'r', encoding='utf-8') as f:
+                output_data = json.load(f)
+
+        tv_content = output_data["tv_content"]
+        for para in tv_content["paragraphs"]:
+            para.pop("duplicate_of", None)
+            ref = duplicate_of.get(str(para["paragraph_index"]))
+            if ref:
+                para["duplicate_of"] = ref
+
+        # 중복이 아닌 문단만 토큰 예산에 맞춰 점수 높은 문단부터 패킹
+        unique_paragraphs = [p for p in tv_content["paragraphs"] if "duplicate_of" not in p]
+        with timer("pack_paragraphs"):
+            packed = pack_paragraphs(unique_paragraphs, TV_CONTENT_TOKEN_BUDGET)
+        tv_content["duplicate_paragraph_count"] = len(tv_content["paragraphs"]) - len(unique_paragraphs)
+        tv_content["packed"] = packed
+        output_data["company"] = info["company"]
+        output_data["date"] = info["date"]
+
+        with open(output_path, 'w', encoding='utf-8') as f:
+            json.dump(output_data, f, ensure_ascii=False, indent=2)
+
+        info["duplicate_paragraph_count"] = tv_content["duplicate_paragraph_count"]
+        info["packed_tokens"] = packed["token_count"]
+        info["dropped_paragraph_count"] = len(packed["dropped_paragraphs"])
+        state["duplicate_of"] = duplicate_of
+        repacked += 1
+
+    stats = summarize_documents(documents_info)
+    for status, count in incremental.items():
+        increment("documents", count, status=status)
+    increment("documents", repacked, status="repacked")
+
+    # 중복 클러스터 저장 (원본 문단 → 중복 문단 역참조)
+    clusters_path = f"{TV_CONTENT_DIR}/paragraph_clusters.json"
+    with open(clusters_path, 'w', encoding='utf-8') as f:
+        json.dump({"clusters": dedup_result["clusters"], "statistics": dedup_stats},
+                  f, ensure_ascii=False, indent=2)
+
+    # 문단 서명 상태 저장 (다음 실행에서 변경되지 않은 문서의 서명 재사용)
+    with open(state_path, 'w', encoding='utf-8') as f:
+        json.dump({"settings": settings_fingerprint, "documents": signature_state}, f, ensure_ascii=False)
 
     # 통합 인덱스 생성
     tv_content_index = {
         "metadata": {
             "description": "TV 관련 문단만 추출한 Consensus 리포트",
             "tv_keywords": TV_KEYWORDS,
-            "context_sentences": 0,
-            "extraction_date": datetime.now().isoformat()
+            "context_sentences": CONTEXT_SENTENCES,
+            "token_budget": TV_CONTENT_TOKEN_BUDGET,
+            "tokenizer": tokenizer_name(),
+            "extraction_date": datetime.now().isoformat(),
+            "incremental": {**incremental, "repacked": repacked}
         },
         "statistics": {
             "total_documents": stats["total_documents"],
             "total_original_chars": stats["total_original_chars"],
             "total_tv_chars": stats["total_tv_chars"],
             "chars_reduced": stats["total_original_chars"] - stats["total_tv_chars"],
+            "total_original_tokens": stats["total_original_tokens"],
+            "total_packed_tokens": stats["total_packed_tokens"],
+            "total_dropped_paragraphs": stats["total_dropped_paragraphs"],
+            "deduplication": dedup_stats,
             "avg_reduction_rate": stats["avg_reduction_rate"],
             "by_company": stats["by_company"]
         },
@@ -243,7 +464,6 @@ def extract_consensus_tv_content():
     }
 
     # 인덱스 저장
-    index_path = f"{TV_CONTENT_DIR}/tv_content_index.json"
     with open(index_path, 'w', encoding='utf-8') as f:
         json.dump(tv_content_index, f, ensure_ascii=False, indent=2)
 
@@ -251,6 +471,11 @@ def extract_consensus_tv_content():
     print("=" * 80)
     print("추출 완료!")
     print("=" * 80)
+    print(f"\n[증분 처리]")
+    print(f"  신규: {incremental['new']}개, 변경: {incremental['changed']}개, "
+          f"변경 없음(건너뜀): {incremental['unchanged']}개, 제거: {incremental['removed']}개, "
+          f"실패: {incremental['failed']}개")
+    print(f"  다시 패킹된 문서: {repacked}개")
     print(f"\n[전체 통계]")
     print(f"  처리된 문서: {stats['total_documents']}개")
     print(f"  원본 총 글자 수: {stats['total_original_chars']:,}자")
@@ -267,18 +492,27 @@ def extract_consensus_tv_content():
         print(f"    원본: {company_stats['original_chars']:,}자")
         print(f"    TV 문단: {company_stats['tv_chars']:,}자")
         print(f"    감소율: {company_reduction:.1f}%")
+        print(f"    패킹 토큰: {company_stats['packed_tokens']:,}")
 
     print(f"\n[저장 위치]")
     print(f"  문서: {TV_CONTENT_CONSENSUS_DIR}/")
     print(f"  인덱스: {index_path}")
+    print(f"  중복 클러스터: {clusters_path}")
 
     # 비용 절감 예측
     print(f"\n[예상 비용 절감]")
-    tokens_saved = (stats['total_original_chars'] - stats['total_tv_chars']) * 1.5 / 1000
-    print(f"  절감 토큰 (한글 1.5배 환산): {tokens_saved:,.0f}K tokens")
+    tokens_saved = (stats['total_original_tokens'] - stats['total_packed_tokens']) / 1000
+    print(f"  원본 토큰: {stats['total_original_tokens']:,} → 패킹 토큰: {stats['total_packed_tokens']:,}")
+    print(f"  중복 제거: {dedup_stats['duplicate_paragraphs']}개 문단, "
+          f"{dedup_stats['duplicate_tokens']:,} tokens ({dedup_stats['token_reduction_rate']}%)")
+    print(f"  제외된 문단: {stats['total_dropped_paragraphs']}개 (토큰 예산 초과)")
+    print(f"  절감 토큰 ({tokenizer_name()}): {tokens_saved:,.0f}K tokens")
     print(f"  GPT-4 기준: ${tokens_saved * 0.03:,.2f} 절감")
     print(f"  Claude 3.5 Sonnet 기준: ${tokens_saved * 0.003:,.2f} 절감")
     print(f"  Gemini Pro 1.5 기준: ${tokens_saved * 0.00125:,.2f} 절감")
 
+    print(f"\n[실행 지표]")
+    write_metrics("06_extract_tv_content")
+
 if __name__ == "__main__":
     extract_consensus_tv_content()
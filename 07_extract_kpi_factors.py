@@ -1,40 +1,84 @@
 """
 Step 6: KPI-Factor 추출
 
-TV 관련 문단에서 Gemini API를 사용하여 KPI-Factor 관계를 추출합니다.
+TV 관련 문단에서 LLM(기본: Gemini API, llm_backends.py)을 사용하여 KPI-Factor 관계를 추출합니다.
+Consensus 문서와 함께 DART 보고서의 TV 관련 문단도 처리하며,
+긴 DART 문단은 chunk로 나눠 추출한 뒤 병합합니다.
 """
 
+import asyncio
 import json
 import os
 import time
 from datetime import datetime
-from dotenv import load_dotenv
-import google.generativeai as genai
+from types import SimpleNamespace
+from metrics import timer, increment, observe_count, write_metrics
+from token_counter import count_tokens
+from llm_backends import create_backend
+from llm_cache import LLMResponseCache, make_cache_key
+from cost_ledger import CostLedger, BudgetExceededError, estimate_cost
+from chunked_extraction import chunk_paragraphs, merge_chunk_results
+from prescreen import Prescreener, split_paragraphs
+from response_parser import (
+    JSON_RESPONSE_CONFIG,
+    ResponseParseError,
+    parse_extraction_response,
+    build_continuation_prompt,
+    merge_continuation
+)
+from llm_engine import (
+    AdaptiveRateLimiter,
+    run_concurrently,
+    is_rate_limit_error,
+    parse_retry_delay
+)
 from config import (
+    FILTERED_DIR,
     TV_CONTENT_DIR,
     TV_CONTENT_CONSENSUS_DIR,
     PROCESSED_DIR,
-    GEMINI_API_KEY,
     KPI_LIST,
-    FACTOR_LIST
+    FACTOR_LIST,
+    LLM_CONCURRENCY,
+    LLM_RPM_LIMIT,
+    LLM_TPM_LIMIT,
+    LLM_REQUEST_TIMEOUT,
+    LLM_MAX_RETRIES,
+    LLM_EXPECTED_OUTPUT_TOKENS,
+    LLM_CACHE_ENABLED,
+    LLM_CACHE_PATH,
+    LLM_CACHE_MAX_AGE_DAYS,
+    LLM_CACHE_MAX_BYTES,
+    LLM_BATCH_ENABLED,
+    LLM_BATCH_SHORT_DOC_TOKENS,
+    LLM_BATCH_TOKEN_BUDGET,
+    LLM_BATCH_MAX_DOCUMENTS,
+    LLM_INCLUDE_DART,
+    LLM_CHUNK_TOKENS,
+    LLM_CHUNK_OVERLAP_TOKENS,
+    LLM_LEDGER_PATH,
+    LLM_BUDGET_TOKENS,
+    LLM_BUDGET_USD,
+    LLM_BUDGET_DOWNGRADE_RATIO,
+    LLM_FALLBACK_MODEL,
+    LLM_CONTEXT_CACHE_ENABLED,
+    PRESCREEN_ENABLED,
+    PRESCREEN_MODEL_PATH
 )
 
-# .env 파일 로드
-load_dotenv()
-
-# Gemini API 설정
-if not GEMINI_API_KEY:
-    raise ValueError("GEMINI_API_KEY가 설정되지 않았습니다. .env 파일을 확인해주세요.")
-
-genai.configure(api_key=GEMINI_API_KEY)
-
 # Gemini Flash 2.5 모델 사용
 MODEL_NAME = "gemini-2.0-flash-exp"
 
+# 생성 설정 (캐시 키에 포함되므로 바꾸면 캐시가 무효화됨)
+# JSON 응답 모드를 요청해 code block/설명 문장이 섞이지 않게 함
+GENERATION_CONFIG = dict(JSON_RESPONSE_CONFIG)
+
 # 프롬프트 템플릿
-EXTRACTION_PROMPT = """당신은 TV 산업 애널리스트 리포트를 분석하는 전문가입니다.
+# 고정 지시문(KPI/Factor 목록, 출력 형식, 규칙)을 앞에 두고 문서별 내용은 맨 뒤에 붙임
+# -> 모든 요청의 앞부분이 같아 제공자 context cache(또는 implicit prefix cache)로 재사용됨
+EXTRACTION_INSTRUCTIONS = """당신은 TV 산업 애널리스트 리포트를 분석하는 전문가입니다.
 
-다음 텍스트에서 TV 사업과 관련된 **KPI(핵심성과지표)**와 **Factor(영향요인)** 간의 관계를 추출해주세요.
+맨 아래 "분석할 텍스트"에서 TV 사업과 관련된 **KPI(핵심성과지표)**와 **Factor(영향요인)** 간의 관계를 추출해주세요.
 
 # KPI 목록
 {kpi_list}
@@ -42,12 +86,6 @@ EXTRACTION_PROMPT = """당신은 TV 산업 애널리스트 리포트를 분석
 # Factor 목록
 {factor_list}
 
-# 분석할 텍스트
-회사: {company}
-날짜: {date}
-내용:
-{text}
-
 # 출력 형식 (JSON)
 다음 JSON 형식으로 출력해주세요. 문서에서 명확하게 언급된 관계만 추출하세요.
 
@@ -74,75 +112,571 @@ EXTRACTION_PROMPT = """당신은 TV 산업 애널리스트 리포트를 분석
 4. confidence는 해당 관계의 신뢰도를 "high", "medium", "low"로 표시하세요.
 5. 추측이나 일반적인 상식이 아닌, 문서에 명시된 내용만 추출하세요.
 6. JSON 형식만 출력하고, 다른 설명은 추가하지 마세요.
+
+"""
+
+EXTRACTION_DOCUMENT = """# 분석할 텍스트
+회사: {company}
+날짜: {date}
+내용:
+{text}
 """
 
-def extract_kpi_factors_from_text(text, company, date, model, max_retries=3):
-    """텍스트에서 KPI-Factor 관계 추출 (retry 로직 포함)"""
+# 여러 문서를 한 번에 요청하는 배치 프롬프트 템플릿
+# (짧은 문서마다 KPI/Factor 목록과 출력 형식을 반복해서 보내지 않도록 묶음)
+BATCH_EXTRACTION_INSTRUCTIONS = """당신은 TV 산업 애널리스트 리포트를 분석하는 전문가입니다.
 
-    prompt = EXTRACTION_PROMPT.format(
+맨 아래 "분석할 문서" 각각에서 TV 사업과 관련된 **KPI(핵심성과지표)**와 **Factor(영향요인)** 간의 관계를 추출해주세요.
+각 문서는 "=== 문서 [ID] ===" 와 "=== 문서 끝 [ID] ===" 사이에 있습니다. 문서끼리 내용을 섞지 마세요.
+
+# KPI 목록
+{kpi_list}
+
+# Factor 목록
+{factor_list}
+
+# 출력 형식 (JSON)
+다음 JSON 형식으로 출력해주세요. "documents"의 키는 문서 ID이며, 모든 문서 ID를 포함해야 합니다.
+관계가 없는 문서는 빈 리스트로 출력하세요.
+
+{{
+  "documents": {{
+    "D1": {{
+      "kpi_factor_relations": [
+        {{
+          "kpi": "매출",
+          "factor": "환율",
+          "relation": "positive/negative/neutral",
+          "evidence": "텍스트에서 발췌한 근거 문장",
+          "confidence": "high/medium/low"
+        }}
+      ],
+      "key_insights": [
+        "문서의 주요 인사이트 1"
+      ]
+    }}
+  }}
+}}
+
+**중요:**
+1. 각 문서의 텍스트에서 명확하게 언급된 관계만 해당 문서 ID 아래에 추출하세요.
+2. relation은 "positive" (긍정적 영향), "negative" (부정적 영향), "neutral" (중립적 언급) 중 하나로 표시하세요.
+3. evidence는 해당 문서 원문에서 관계를 뒷받침하는 문장을 그대로 발췌하세요.
+4. confidence는 해당 관계의 신뢰도를 "high", "medium", "low"로 표시하세요.
+5. 추측이나 일반적인 상식이 아닌, 문서에 명시된 내용만 추출하세요.
+6. JSON 형식만 출력하고, 다른 설명은 추가하지 마세요.
+
+"""
+
+BATCH_EXTRACTION_DOCUMENTS = """# 분석할 문서
+{documents}
+"""
+
+BATCH_DOCUMENT_TEMPLATE = """=== 문서 {doc_id} ===
+회사: {company}
+날짜: {date}
+내용:
+{text}
+=== 문서 끝 {doc_id} ==="""
+
+
+def build_prompt_prefix(batch=False):
+    """모든 요청에 공통인 고정 prefix (지시문, KPI/Factor 목록, 출력 형식)"""
+    template = BATCH_EXTRACTION_INSTRUCTIONS if batch else EXTRACTION_INSTRUCTIONS
+    return template.format(
         kpi_list=", ".join(KPI_LIST),
-        factor_list=", ".join(FACTOR_LIST),
+        factor_list=", ".join(FACTOR_LIST)
+    )
+
+
+def build_prompt(text, company, date):
+    """추출 프롬프트 생성 (고정 prefix + 문서)"""
+    return build_prompt_prefix() + EXTRACTION_DOCUMENT.format(
         company=company,
         date=date,
         text=text
     )
 
-    for attempt in range(max_retries):
-        try:
-            response = model.generate_content(prompt)
 
-            # JSON 파싱
-            response_text = response.text.strip()
+def build_batch_prompt(batch):
+    """
+    배치 프롬프트 생성 (고정 prefix + 문서들)
+
+    Args:
+        batch: [(doc_id, company, date, text), ...]
+    """
+    documents = "\n\n".join(
+        BATCH_DOCUMENT_TEMPLATE.format(doc_id=doc_id, company=company, date=date, text=text)
+        for doc_id, company, date, text in batch
+    )
+    return build_prompt_prefix(batch=True) + BATCH_EXTRACTION_DOCUMENTS.format(documents=documents)
+
+
+def make_usage(prompt_tokens, output_tokens, model_name, cached_tokens=0):
+    """토큰 사용량 (과금 모델, 입력 중 context cache에서 읽은 토큰 포함)"""
+    return SimpleNamespace(
+        prompt_token_count=prompt_tokens,
+        candidates_token_count=output_tokens,
+        cached_content_token_count=cached_tokens,
+        model=model_name
+    )
+
+
+def cached_tokens_of(usage):
+    """usage의 context cache 입력 토큰 수 (이전 버전 캐시 응답은 0)"""
+    return getattr(usage, "cached_content_token_count", 0) or 0
+
+
+def add_usage(usage, other):
+    """두 요청의 토큰 사용량 합계"""
+    if usage is None or other is None:
+        return usage or other
+    return make_usage(
+        usage.prompt_token_count + other.prompt_token_count,
+        usage.candidates_token_count + other.candidates_token_count,
+        getattr(usage, "model", None) or getattr(other, "model", None),
+        cached_tokens_of(usage) + cached_tokens_of(other)
+    )
+
+
+async def request_extraction(prompt, backend, limiter, label, cache=None, ledger=None,
+                             max_retries=LLM_MAX_RETRIES, batch=False, allow_continuation=True):
+    """
+    프롬프트 1개 요청 후 응답 파싱 (retry 로직 포함)
+
+    429 응답은 limiter에 알려 이후 요청 속도를 낮추며, 이 요청만 재시도 대기열에 다시 섭니다.
+    다른 문서의 요청은 limiter가 허용하는 범위에서 계속 진행됩니다.
+    cache가 주어지면 같은 프롬프트의 저장된 응답을 API 호출 없이 사용합니다.
+
+    trailing comma 등 형식 오류는 로컬에서 복구하고, 출력이 잘린 단일 문서 응답은
+    이미 받은 관계를 제외한 나머지만 한 번 더 요청해 합칩니다.
+    복구할 수 없는 응답만 전체 프롬프트를 다시 요청합니다.
+
+    프롬프트의 고정 prefix(build_prompt_prefix)는 백엔드에 함께 넘겨 context cache로 재사용하며,
+    입력 토큰 중 캐시에서 읽은 토큰과 새로 보낸 토큰을 지표로 나눠 기록합니다.
+
+    ledger가 주어지면 호출 결과를 원장에 기록하고, 예산 사용량에 따라 저가 모델로 전환하거나
+    요청 전에 BudgetExceededError를 발생시킵니다.
+
+    Returns:
+        tuple: (result, usage, from_cache)
+    """
 
-            # Markdown code block 제거 (```json ... ```)
-            if response_text.startswith("```"):
-                response_text = response_text.split("```")[1]
-                if response_text.startswith("json"):
-                    response_text = response_text[4:].strip()
+    if ledger is not None:
+        backend = ledger.select_backend(backend)
+    model_name = backend.model_name
 
-            result = json.loads(response_text)
+    started = time.perf_counter()
+    billed = make_usage(0, 0, model_name)  # 이 호출의 모든 시도에서 과금된 토큰 (이어쓰기 제외)
+    attempts = [0]
 
-            return result, response.usage_metadata
+    def finish(result, usage, from_cache, status):
+        """원장 기록 후 결과 반환"""
+        if ledger is not None:
+            ledger.record(
+                label, model_name, billed.prompt_token_count, billed.candidates_token_count,
+                time.perf_counter() - started, max(attempts[0] - 1, 0), from_cache, status,
+                cached_input_tokens=cached_tokens_of(billed)
+            )
+        if usage is not None:
+            usage = make_usage(usage.prompt_token_count, usage.candidates_token_count, model_name,
+                               cached_tokens_of(usage))
+        return result, usage, from_cache
+
+    # 캐시 조회 (파싱할 수 없는 응답은 삭제 후 API 호출)
+    cache_key = None
+    if cache is not None:
+        cache_key = make_cache_key(model_name, prompt, GENERATION_CONFIG)
+        cached_text, cached_usage = cache.get(cache_key)
+        if cached_text is not None:
+            try:
+                return finish(parse_extraction_response(cached_text, batch).data, cached_usage, True, "ok")
+            except ResponseParseError:
+                cache.delete(cache_key)
+
+    # 고정 prefix (이어쓰기 프롬프트도 같은 prefix로 시작)
+    prefix = build_prompt_prefix(batch)
+    if not prompt.startswith(prefix):
+        prefix = None
+
+    prompt_tokens = count_tokens(prompt)
+    estimated_tokens = prompt_tokens + LLM_EXPECTED_OUTPUT_TOKENS
+    response = None
 
-        except json.JSONDecodeError as e:
-            print(f"  [WARNING] JSON 파싱 실패 (시도 {attempt + 1}/{max_retries}): {str(e)}")
+    for attempt in range(max_retries):
+        # 예산 확인 (초과 시 BudgetExceededError)
+        reservation = None
+        if ledger is not None:
+            reservation = ledger.reserve(prompt_tokens, LLM_EXPECTED_OUTPUT_TOKENS, model_name)
+        request_id = await limiter.acquire(estimated_tokens)
+        attempts[0] += 1
+        try:
+            with timer("llm_generate", backend=backend.name, model=model_name):
+                response = await asyncio.wait_for(
+                    backend.generate(prompt, GENERATION_CONFIG, prefix),
+                    timeout=LLM_REQUEST_TIMEOUT
+                )
+            increment("llm_requests", backend=backend.name, model=model_name)
+            if attempt > 0:
+                increment("llm_retries", backend=backend.name, model=model_name)
+
+            usage = response.usage_metadata
+            if usage:
+                limiter.record_usage(request_id, usage.prompt_token_count + usage.candidates_token_count)
+                billed = add_usage(billed, usage)
+                cached_tokens = cached_tokens_of(usage)
+                increment("llm_input_tokens_cached", cached_tokens, backend=backend.name, model=model_name)
+                increment("llm_input_tokens_uncached", usage.prompt_token_count - cached_tokens,
+                          backend=backend.name, model=model_name)
+            limiter.on_success()
+
+            parsed = parse_extraction_response(response.text, batch)
+            result = parsed.data
+            response_text = response.text
+            if parsed.repaired:
+                increment("llm_responses_repaired", backend=backend.name, model=model_name)
+
+            # 잘린 응답: 나머지 부분만 이어서 요청
+            # (배치 응답은 parser가 잘린 마지막 문서를 빼므로 그 문서만 단독 요청으로 다시 추출됨)
+            if parsed.truncated:
+                increment("llm_responses_truncated", backend=backend.name, model=model_name)
+                if not batch:
+                    continuation = None
+                    if allow_continuation:
+                        print(f"  [PARTIAL] {label}: 응답이 잘림, 관계 {len(result['kpi_factor_relations'])}개 "
+                              f"이후 부분만 다시 요청")
+                        continuation, continuation_usage, _ = await request_extraction(
+                            build_continuation_prompt(prompt, result), backend, limiter, f"{label} (이어쓰기)",
+                            ledger=ledger, max_retries=max_retries, allow_continuation=False
+                        )
+                    if not continuation:
+                        # 일부만 받은 결과는 캐시/journal에 남기지 않고 실패로 처리 (다음 실행에서 다시 추출)
+                        print(f"  [PARTIAL] {label}: 잘린 응답을 완성하지 못해 실패로 처리")
+                        return finish(None, None, False, "partial")
+                    result = merge_continuation(result, continuation)
+                    usage = add_usage(usage, continuation_usage)
+                    response_text = json.dumps(result, ensure_ascii=False)
+
+            if cache is not None:
+                cache.put(cache_key, model_name, response_text, usage)
+
+            return finish(result, usage, False, "ok")
+
+        except ResponseParseError as e:
+            increment("llm_json_parse_failures", backend=backend.name, model=model_name)
+            print(f"  [WARNING] {label}: 응답 파싱 실패 (시도 {attempt + 1}/{max_retries}): {str(e)}")
             if attempt < max_retries - 1:
-                time.sleep(2)
                 continue
             else:
-                print(f"  응답 텍스트: {response.text[:200]}...")
-                return None, None
+                print(f"  {label} 응답 텍스트: {response.text[:200]}...")
+                return finish(None, None, False, "parse_failed")
 
-        except Exception as e:
-            error_msg = str(e)
+        except asyncio.TimeoutError:
+            increment("llm_timeouts", backend=backend.name, model=model_name)
+            print(f"  [TIMEOUT] {label}: {LLM_REQUEST_TIMEOUT}초 초과 (시도 {attempt + 1}/{max_retries})")
+            if attempt < max_retries - 1:
+                continue
+            else:
+                return finish(None, None, False, "timeout")
 
+        except Exception as e:
             # Rate limit 에러 체크 (429)
-            if "429" in error_msg or "quota" in error_msg.lower():
-                # retry_delay 추출 시도
-                import re
-                delay_match = re.search(r'retry_delay.*?seconds: (\d+)', error_msg)
-
-                if delay_match:
-                    delay_seconds = int(delay_match.group(1)) + 5  # 여유 5초 추가
-                else:
-                    delay_seconds = 60  # 기본 60초
+            if is_rate_limit_error(e):
+                increment("llm_rate_limited", backend=backend.name, model=model_name)
+                retry_delay = parse_retry_delay(e)
+                # retry_delay가 있으면 여유 5초 추가, 없으면 기본 대기 시간
+                delay_seconds = limiter.on_rate_limit(retry_delay + 5 if retry_delay is not None else None)
 
                 if attempt < max_retries - 1:
-                    print(f"  [RATE_LIMIT] API 제한 도달. {delay_seconds}초 대기 후 재시도 ({attempt + 1}/{max_retries})...")
-                    time.sleep(delay_seconds)
+                    print(f"  [RATE_LIMIT] {label}: API 제한 도달. {delay_seconds}초 후 재시도, "
+                          f"요청 속도 {limiter.current_rpm:.0f} RPM으로 조정 ({attempt + 1}/{max_retries})")
                     continue
                 else:
-                    print(f"  [ERROR] 최대 재시도 횟수 초과")
-                    return None, None
+                    print(f"  [ERROR] {label}: 최대 재시도 횟수 초과")
+                    return finish(None, None, False, "rate_limited")
             else:
-                print(f"  [ERROR] API 호출 실패 (시도 {attempt + 1}/{max_retries}): {str(e)}")
+                print(f"  [ERROR] {label}: API 호출 실패 (시도 {attempt + 1}/{max_retries}): {str(e)}")
                 if attempt < max_retries - 1:
-                    time.sleep(5)
+                    await asyncio.sleep(5)
                     continue
                 else:
-                    return None, None
+                    return finish(None, None, False, "error")
+
+        finally:
+            if reservation is not None:
+                ledger.release(reservation)
+
+    return finish(None, None, False, "error")
+
+
+async def extract_kpi_factors_from_text(text, company, date, backend, limiter, label, cache=None, ledger=None):
+    """
+    텍스트에서 KPI-Factor 관계 추출
+
+    Returns:
+        tuple: (result, usage, from_cache)
+    """
+    prompt = build_prompt(text, company, date)
+    return await request_extraction(prompt, backend, limiter, label, cache, ledger)
+
+
+async def extract_kpi_factors_from_batch(batch, backend, limiter, label, cache=None, ledger=None):
+    """
+    여러 문서를 요청 1개로 추출
+
+    Args:
+        batch: [(doc_id, company, date, text), ...]
+
+    Returns:
+        tuple: ({doc_id: result}, usage, from_cache)
+               응답에 빠진 문서 ID는 dict에 포함되지 않음
+    """
+    prompt = build_batch_prompt(batch)
+    result, usage, from_cache = await request_extraction(prompt, backend, limiter, label, cache, ledger, batch=True)
+    if not result:
+        return {}, usage, from_cache
+
+    documents = result.get("documents", {}) if isinstance(result, dict) else {}
+    results_by_id = {
+        doc_id: documents[doc_id]
+        for doc_id, _, _, _ in batch
+        if isinstance(documents.get(doc_id), dict)
+    }
+    return results_by_id, usage, from_cache
+
+
+async def extract_kpi_factors_chunked(paragraphs, company, date, backend, limiter, label, semaphore,
+                                      cache=None, ledger=None):
+    """
+    긴 문서를 chunk로 나눠 동시에 추출한 뒤 병합 (map-reduce)
+
+    Args:
+        paragraphs: 문단 텍스트 리스트
+        semaphore: chunk 요청 동시 실행 수 제한
+
+    Returns:
+        tuple: (result, usage, from_cache, api_requests, failed_chunks)
+               chunk가 하나라도 실패하면 result는 None (일부 결과만으로 완료 처리하지 않음)
+    """
+    chunks = chunk_paragraphs(paragraphs, LLM_CHUNK_TOKENS, LLM_CHUNK_OVERLAP_TOKENS)
+    observe_count("chunks_per_document", len(chunks))
+
+    async def extract_chunk(index, chunk):
+        async with semaphore:
+            return await extract_kpi_factors_from_text(
+                chunk, company, date, backend, limiter, f"{label} [chunk {index + 1}/{len(chunks)}]", cache, ledger
+            )
+
+    # 한 chunk에서 예외(예산 초과 등)가 나면 나머지 chunk 요청은 취소 (부분 결과는 쓰지 않으므로)
+    tasks = [asyncio.create_task(extract_chunk(i, chunk)) for i, chunk in enumerate(chunks)]
+    try:
+        outcomes = await asyncio.gather(*tasks)
+    except Exception:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+
+    results = [result for result, _, _ in outcomes]
+    api_requests = sum(1 for _, _, from_cache in outcomes if not from_cache)
+    failed_chunks = sum(1 for result in results if not result)
+    if failed_chunks:
+        # 성공한 chunk 응답은 응답 캐시에 남으므로 다음 실행에서는 실패한 chunk만 다시 요청됨
+        return None, None, False, api_requests, failed_chunks
+
+    usage = None
+    for _, chunk_usage, _ in outcomes:
+        usage = add_usage(usage, chunk_usage)
+    from_cache = all(from_cache for _, _, from_cache in outcomes)
+    return merge_chunk_results(results), usage, from_cache, api_requests, 0
+
+
+def build_batches(docs, token_counts, token_budget=LLM_BATCH_TOKEN_BUDGET,
+                  max_documents=LLM_BATCH_MAX_DOCUMENTS, short_doc_tokens=LLM_BATCH_SHORT_DOC_TOKENS):
+    """
+    짧은 문서를 토큰 예산 안에서 순서대로 묶음
+
+    Args:
+        docs: 문서 리스트
+        token_counts: filename -> 문서 텍스트 토큰 수 (없으면 단독 요청)
+
+    Returns:
+        list: 문서 리스트의 리스트 (긴 문서는 1개짜리 배치)
+    """
+    batches = []
+    current = []
+    current_tokens = 0
+
+    for doc in docs:
+        tokens = token_counts.get(doc["filename"])
+        if doc.get("source") == "dart" or tokens is None or tokens == 0 or tokens > short_doc_tokens:
+            batches.append([doc])
+            continue
+
+        if current and (current_tokens + tokens > token_budget or len(current) >= max_documents):
+            batches.append(current)
+            current = []
+            current_tokens = 0
+        current.append(doc)
+        current_tokens += tokens
+
+    if current:
+        batches.append(current)
+    return batches
+
+
+def split_usage(usage, weights):
+    """배치 요청의 usage를 문서별 가중치(토큰 수) 비율로 나눔"""
+    if usage is None:
+        return [None] * len(weights)
+    total = sum(weights) or 1
+    return [
+        make_usage(
+            round(usage.prompt_token_count * weight / total),
+            round(usage.candidates_token_count * weight / total),
+            getattr(usage, "model", None),
+            round(cached_tokens_of(usage) * weight / total)
+        )
+        for weight in weights
+    ]
+
+
+def estimate_run_usage(batches, texts):
+    """
+    실행 전 사용량 추정 (로컬 토큰 카운터, 캐시 적중은 고려하지 않은 상한)
+
+    Returns:
+        dict: {"requests", "input_tokens", "output_tokens", "cost_usd"}
+    """
+    requests = 0
+    input_tokens = 0
+    for batch in batches:
+        if len(batch) > 1:
+            entries = [(f"D{i + 1}", doc["company"], doc["date"], texts[doc["filename"]])
+                       for i, doc in enumerate(batch)]
+            input_tokens += count_tokens(build_batch_prompt(entries))
+            requests += 1
+            continue
+
+        doc = batch[0]
+        text = texts.get(doc["filename"])
+        if not text or not text.strip():
+            continue
+        if doc.get("source") == "dart" and count_tokens(text) > LLM_CHUNK_TOKENS:
+            chunks = chunk_paragraphs(doc["paragraphs"], LLM_CHUNK_TOKENS, LLM_CHUNK_OVERLAP_TOKENS)
+        else:
+            chunks = [text]
+        for chunk in chunks:
+            input_tokens += count_tokens(build_prompt(chunk, doc["company"], doc["date"]))
+            requests += 1
+
+    output_tokens = requests * LLM_EXPECTED_OUTPUT_TOKENS
+    return {
+        "requests": requests,
+        "input_tokens": input_tokens,
+        "output_tokens": output_tokens,
+        "cost_usd": round(estimate_cost(input_tokens, output_tokens, MODEL_NAME), 6)
+    }
+
+
+def dart_date(rcept_no):
+    """DART 접수번호(YYYYMMDD...)에서 날짜 추출"""
+    if len(rcept_no) < 8 or not rcept_no[:8].isdigit():
+        return ""
+    return f"{rcept_no[:4]}-{rcept_no[4:6]}-{rcept_no[6:8]}"
+
+
+def load_dart_documents():
+    """filtered_index.json에서 DART 보고서의 TV 관련 문단 로드"""
+    filtered_index_path = f"{FILTERED_DIR}/filtered_index.json"
+    if not os.path.exists(filtered_index_path):
+        return []
+
+    with open(filtered_index_path, 'r', encoding='utf-8') as f:
+        filtered_index = json.load(f)
+
+    documents = []
+    for report in filtered_index["filtered_reports"].get("dart", []):
+        paragraphs = [p["text"] for p in report.get("relevant_paragraphs", []) if p.get("text")]
+        if not paragraphs:
+            continue
+        documents.append({
+            "source": "dart",
+            "filename": report["filename"],
+            "company": report["company"],
+            "date": dart_date(report.get("rcept_no", "")),
+            "rcept_no": report.get("rcept_no", ""),
+            "tv_chars": report.get("relevant_char_count", sum(len(p) for p in paragraphs)),
+            "paragraphs": paragraphs
+        })
+    return documents
+
+
+def load_document_text(doc):
+    """TV content 파일에서 LLM에 보낼 텍스트 로드"""
+    if doc.get("source") == "dart":
+        return "\n\n".join(doc["paragraphs"])
+
+    tv_content_path = f"{TV_CONTENT_CONSENSUS_DIR}/{doc['output_file']}"
+    with open(tv_content_path, 'r', encoding='utf-8') as f:
+        tv_content = json.load(f)
+
+    # 토큰 예산으로 패킹된 텍스트 사용 (이전 버전 출력은 전체 문단 합치기)
+    packed = tv_content["tv_content"].get("packed")
+    if packed:
+        return packed["text"]
+    paragraphs = tv_content["tv_content"]["paragraphs"]
+    return "\n\n".join([p["text"] for p in paragraphs])
+
+
+def write_json_atomic(path, data):
+    """임시 파일에 쓴 뒤 교체 (중단되어도 반쯤 쓰인 파일이 남지 않음)"""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+
+
+def load_journal(journal_path):
+    """
+    완료 기록(journal) 로드
+
+    Returns:
+        dict: filename -> 마지막 완료 기록
+              (강제 종료로 마지막 줄이 잘린 경우 해당 줄은 무시)
+    """
+    journal = {}
+    if not os.path.exists(journal_path):
+        return journal
+
+    with open(journal_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            journal[record["filename"]] = record
+    return journal
+
+
+def append_journal(journal_file, record):
+    """완료 기록 1줄 추가 후 즉시 디스크에 반영"""
+    journal_file.write(json.dumps(record, ensure_ascii=False) + "\n")
+    journal_file.flush()
+    os.fsync(journal_file.fileno())
+
+
+def compact_journal(journal_path, records):
+    """현재 문서의 최신 기록만 남기도록 journal 재작성"""
+    tmp_path = f"{journal_path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        for record in records:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+    os.replace(tmp_path, journal_path)
 
-    return None, None
 
 def extract_kpi_factors():
     """TV 문단에서 KPI-Factor 관계 추출"""
@@ -153,8 +687,10 @@ def extract_kpi_factors():
     print(f"\n모델: {MODEL_NAME}")
     print(f"KPI 목록: {', '.join(KPI_LIST)}")
     print(f"Factor 목록: {', '.join(FACTOR_LIST)}")
-    print(f"최대 재시도: 3회")
-    print(f"Rate Limit 시 자동 대기 후 재시도\n")
+    print(f"최대 재시도: {LLM_MAX_RETRIES}회")
+    print(f"동시 요청: {LLM_CONCURRENCY}개, 한도: {LLM_RPM_LIMIT} RPM / {LLM_TPM_LIMIT:,} TPM, "
+          f"요청 timeout: {LLM_REQUEST_TIMEOUT}초")
+    print(f"Rate Limit 시 요청 속도를 낮춘 뒤 자동 재시도\n")
 
     # TV content index 로드
     tv_content_index_path = f"{TV_CONTENT_DIR}/tv_content_index.json"
@@ -167,15 +703,63 @@ def extract_kpi_factors():
         tv_content_index = json.load(f)
 
     documents = tv_content_index["documents"]
-
-    # Gemini 모델 초기화
-    model = genai.GenerativeModel(MODEL_NAME)
+    if LLM_INCLUDE_DART:
+        dart_documents = load_dart_documents()
+        documents = documents + dart_documents
+        print(f"DART 문서: {len(dart_documents)}개 (chunk: {LLM_CHUNK_TOKENS} 토큰, "
+              f"겹침: {LLM_CHUNK_OVERLAP_TOKENS} 토큰)\n")
+
+    # LLM 백엔드 초기화 (config.LLM_BACKEND)
+    try:
+        backend = create_backend(MODEL_NAME)
+    except ValueError as e:
+        print(f"[ERROR] {str(e)}")
+        return
+    print(f"LLM 백엔드: {backend.name}")
+    prefix_tokens = count_tokens(build_prompt_prefix())
+    if not (LLM_CONTEXT_CACHE_ENABLED and backend.supports_context_cache):
+        context_cache_text = "사용 안 함"
+    elif prefix_tokens < backend.context_cache_min_tokens:
+        context_cache_text = f"최소 {backend.context_cache_min_tokens:,} 토큰 미만, 고정 prefix 순서만 유지"
+    else:
+        context_cache_text = "사용"
+    print(f"고정 prefix: {prefix_tokens:,} 토큰 (context cache: {context_cache_text})\n")
+    limiter = AdaptiveRateLimiter(LLM_RPM_LIMIT, LLM_TPM_LIMIT)
+    cache = None
+    if LLM_CACHE_ENABLED:
+        cache = LLMResponseCache(LLM_CACHE_PATH, LLM_CACHE_MAX_AGE_DAYS, LLM_CACHE_MAX_BYTES)
+        evicted = cache.evict()
+        cache_stats = cache.stats()
+        print(f"응답 캐시: {LLM_CACHE_PATH} ({cache_stats['entries']}개, 만료/용량 초과 {evicted}개 정리)\n")
+
+    # 호출 원장 + 예산 (예산 근접 시 저가 모델로 전환, 소진 시 남은 문서는 다음 실행으로 연기)
+    fallback_backend = None
+    if LLM_FALLBACK_MODEL and (LLM_BUDGET_TOKENS or LLM_BUDGET_USD):
+        fallback_backend = create_backend(LLM_FALLBACK_MODEL)
+    ledger = CostLedger(LLM_LEDGER_PATH, LLM_BUDGET_TOKENS, LLM_BUDGET_USD,
+                        LLM_BUDGET_DOWNGRADE_RATIO, fallback_backend)
+    budget_text = ", ".join(filter(None, [
+        f"{LLM_BUDGET_TOKENS:,} 토큰" if LLM_BUDGET_TOKENS else None,
+        f"${LLM_BUDGET_USD}" if LLM_BUDGET_USD else None
+    ])) or "없음"
+    print(f"호출 원장: {LLM_LEDGER_PATH} (예산: {budget_text})\n")
+
+    # 로컬 사전 분류 (관계가 있을 법한 문단만 LLM에 전달)
+    prescreener = None
+    if PRESCREEN_ENABLED:
+        prescreener = Prescreener.load()
+        mode_text = "학습 모델" if prescreener.mode == "model" else f"사전 규칙 ({PRESCREEN_MODEL_PATH} 없음)"
+        print(f"문단 사전 분류: {mode_text}, threshold {prescreener.threshold}\n")
 
     # 출력 디렉토리 생성
     os.makedirs(PROCESSED_DIR, exist_ok=True)
     kpi_factors_dir = f"{PROCESSED_DIR}/kpi_factors"
     os.makedirs(kpi_factors_dir, exist_ok=True)
 
+    # 이전 실행의 완료 기록 (중단된 실행 재개용)
+    journal_path = f"{PROCESSED_DIR}/kpi_factors_journal.jsonl"
+    journal = load_journal(journal_path)
+
     # 통계
     stats = {
         "total_documents": 0,
@@ -184,22 +768,22 @@ def extract_kpi_factors():
         "total_relations": 0,
         "total_input_tokens": 0,
         "total_output_tokens": 0,
+        "total_cached_input_tokens": 0,
+        "cached_documents": 0,
+        "resumed_documents": 0,
+        "prescreen": {"paragraphs": 0, "forwarded": 0},
         "by_company": {}
     }
 
-    results = []
+    # 문서별 입력 텍스트와 입력 키 (모델 + 프롬프트 + generation config 해시)
+    texts = {}
+    input_keys = {}
+    completed_records = {}  # filename -> 이번 인덱스에 포함될 완료 기록
+    pending = []
 
-    print(f"처리할 문서: {len(documents)}개\n")
-
-    # 각 문서 처리
-    for idx, doc in enumerate(documents, 1):
+    for doc in documents:
         filename = doc["filename"]
         company = doc["company"]
-        date = doc["date"]
-        tv_char_count = doc["tv_chars"]
-
-        print(f"[{idx}/{len(documents)}] {filename}")
-
         # 회사별 통계 초기화
         if company not in stats["by_company"]:
             stats["by_company"][company] = {
@@ -207,84 +791,289 @@ def extract_kpi_factors():
                 "successful": 0,
                 "relations": 0
             }
-
         stats["total_documents"] += 1
         stats["by_company"][company]["count"] += 1
 
-        # TV content 파일 로드
-        tv_content_path = f"{TV_CONTENT_CONSENSUS_DIR}/{doc['output_file']}"
-
         try:
-            with open(tv_content_path, 'r', encoding='utf-8') as f:
-                tv_content = json.load(f)
+            texts[filename] = load_document_text(doc)
+        except Exception:
+            # 오류는 process_document에서 다시 발생시켜 보고
+            pending.append(doc)
+            continue
+        if prescreener is not None:
+            paragraphs = doc["paragraphs"] if doc.get("source") == "dart" else split_paragraphs(texts[filename])
+            kept = prescreener.filter(paragraphs)
+            stats["prescreen"]["paragraphs"] += len(paragraphs)
+            stats["prescreen"]["forwarded"] += len(kept)
+            if doc.get("source") == "dart":
+                doc["paragraphs"] = kept
+            texts[filename] = "\n\n".join(kept)
+        input_keys[filename] = make_cache_key(
+            MODEL_NAME, build_prompt(texts[filename], company, doc["date"]), GENERATION_CONFIG
+        )
+
+        # 입력이 같고 결과 파일이 남아 있으면 이전 결과 재사용
+        record = journal.get(filename)
+        if (record and record["input_key"] == input_keys[filename]
+                and os.path.exists(f"{kpi_factors_dir}/{record['result']['output_file']}")):
+            completed_records[filename] = record
+            relations_count = record["result"]["relations_count"]
+            stats["resumed_documents"] += 1
+            stats["successful_extractions"] += 1
+            stats["total_relations"] += relations_count
+            stats["by_company"][company]["successful"] += 1
+            stats["by_company"][company]["relations"] += relations_count
+        else:
+            pending.append(doc)
+
+    # 짧은 문서는 요청 1개로 묶음
+    if LLM_BATCH_ENABLED:
+        token_counts = {
+            doc["filename"]: count_tokens(texts[doc["filename"]])
+            for doc in pending if doc["filename"] in texts
+        }
+        batches = build_batches(pending, token_counts)
+    else:
+        batches = [[doc] for doc in pending]
+    multi_batches = [batch for batch in batches if len(batch) > 1]
+
+    print(f"처리할 문서: {len(pending)}개 (이전 실행에서 완료: {stats['resumed_documents']}개)")
+    print(f"요청 단위: {len(batches)}개 (배치 {len(multi_batches)}개에 문서 "
+          f"{sum(len(batch) for batch in multi_batches)}개)")
+
+    # 사전 추정
+    preflight = estimate_run_usage(batches, texts)
+    stats["preflight_estimate"] = preflight
+    print(f"사전 추정: 요청 {preflight['requests']}회, 입력 {preflight['input_tokens']:,} / "
+          f"출력 {preflight['output_tokens']:,} 토큰, ${preflight['cost_usd']:.4f} (캐시 미적용 기준)")
+    if ((LLM_BUDGET_TOKENS and preflight["input_tokens"] + preflight["output_tokens"] > LLM_BUDGET_TOKENS)
+            or (LLM_BUDGET_USD and preflight["cost_usd"] > LLM_BUDGET_USD)):
+        print(f"[WARNING] 추정 사용량이 예산을 넘습니다. 예산 소진 후 남은 문서는 다음 실행으로 연기됩니다.")
+    print()
+
+    stats["api_requests"] = 0
+    stats["chunked_documents"] = 0
+    stats["partial_chunk_documents"] = 0
+    stats["deferred_documents"] = 0
+    chunk_semaphore = asyncio.Semaphore(LLM_CONCURRENCY)
+
+    async def process_document(doc):
+        """문서 1개 추출 (결과 저장은 on_result에서 순서대로 처리)"""
+        try:
+            combined_text = texts.get(doc["filename"])
+            if combined_text is None:
+                combined_text = load_document_text(doc)
+
+            # 모든 문단이 다른 문서의 중복이거나 사전 분류에서 걸러지면 호출 생략
+            if not combined_text.strip():
+                return {"status": "skipped"}
+
+            # 긴 DART 문서는 chunk로 나눠 추출
+            if doc.get("source") == "dart" and count_tokens(combined_text) > LLM_CHUNK_TOKENS:
+                stats["chunked_documents"] += 1
+                extraction_result, usage, from_cache, api_requests, failed_chunks = await extract_kpi_factors_chunked(
+                    doc["paragraphs"], doc["company"], doc["date"], backend, limiter, doc["filename"],
+                    chunk_semaphore, cache, ledger
+                )
+                stats["api_requests"] += api_requests
+                if failed_chunks:
+                    return {"status": "partial", "failed_chunks": failed_chunks}
+            else:
+                extraction_result, usage, from_cache = await extract_kpi_factors_from_text(
+                    combined_text, doc["company"], doc["date"], backend, limiter, doc["filename"], cache, ledger
+                )
+                if not from_cache:
+                    stats["api_requests"] += 1
+            if extraction_result:
+                return {"status": "ok", "extraction": extraction_result, "usage": usage,
+                        "from_cache": from_cache, "batch_size": 1}
+            return {"status": "failed"}
 
-            # TV 문단들을 하나의 텍스트로 합치기
-            paragraphs = tv_content["tv_content"]["paragraphs"]
-            combined_text = "\n\n".join([p["text"] for p in paragraphs])
+        except BudgetExceededError:
+            return {"status": "deferred"}
+        except Exception as e:
+            return {"status": "error", "error": str(e)}
 
-            # Gemini API 호출
-            extraction_result, usage = extract_kpi_factors_from_text(
-                combined_text, company, date, model
-            )
+    async def process_batch(batch):
+        """
+        배치 1개 추출
 
-            if extraction_result:
-                stats["successful_extractions"] += 1
-                stats["by_company"][company]["successful"] += 1
-
-                relations_count = len(extraction_result.get("kpi_factor_relations", []))
-                stats["total_relations"] += relations_count
-                stats["by_company"][company]["relations"] += relations_count
-
-                # Usage 통계
-                if usage:
-                    stats["total_input_tokens"] += usage.prompt_token_count
-                    stats["total_output_tokens"] += usage.candidates_token_count
-
-                # 결과 저장
-                output_filename = filename.replace(".pdf", "_kpi_factors.json")
-                output_path = f"{kpi_factors_dir}/{output_filename}"
-
-                output_data = {
-                    "source": "consensus",
-                    "filename": filename,
-                    "company": company,
-                    "date": date,
-                    "tv_char_count": tv_char_count,
-                    "extraction": extraction_result,
-                    "metadata": {
-                        "model": MODEL_NAME,
-                        "extracted_at": datetime.now().isoformat(),
-                        "input_tokens": usage.prompt_token_count if usage else None,
-                        "output_tokens": usage.candidates_token_count if usage else None
-                    }
-                }
-
-                with open(output_path, 'w', encoding='utf-8') as f:
-                    json.dump(output_data, f, ensure_ascii=False, indent=2)
-
-                # 결과 리스트에 추가
-                results.append({
-                    "filename": filename,
-                    "company": company,
-                    "date": date,
-                    "relations_count": relations_count,
-                    "output_file": output_filename
-                })
-
-                print(f"  [OK] 추출 성공: {relations_count}개 관계")
-                if usage:
-                    print(f"  토큰: {usage.prompt_token_count} in / {usage.candidates_token_count} out")
+        응답에 빠진 문서나 배치 요청 실패 시 해당 문서는 단독 요청으로 다시 추출합니다.
 
-            else:
-                stats["failed_extractions"] += 1
-                print(f"  [FAIL] 추출 실패")
+        Returns:
+            list: batch와 같은 순서의 문서별 outcome
+        """
+        if len(batch) == 1:
+            return [await process_document(batch[0])]
 
+        entries = [
+            (f"D{i + 1}", doc["company"], doc["date"], texts[doc["filename"]])
+            for i, doc in enumerate(batch)
+        ]
+        label = f"{batch[0]['filename']} 외 {len(batch) - 1}개 (배치)"
+        try:
+            results_by_id, usage, from_cache = await extract_kpi_factors_from_batch(
+                entries, backend, limiter, label, cache, ledger
+            )
+            # 요청이 끝까지 진행된 경우만 집계 (예산/limiter 오류로 요청 전에 실패하면 제외)
+            if not from_cache:
+                stats["api_requests"] += 1
+        except BudgetExceededError:
+            return [{"status": "deferred"} for _ in batch]
         except Exception as e:
+            print(f"  [WARNING] {label}: 배치 요청 실패, 문서별로 재시도: {str(e)}")
+            results_by_id, usage, from_cache = {}, None, False
+
+        usages = split_usage(usage, [count_tokens(text) for _, _, _, text in entries])
+        outcomes = [None] * len(batch)
+        fallback = []  # 단독 요청으로 다시 추출할 문서 위치
+        for i, ((doc_id, _, _, _), doc_usage) in enumerate(zip(entries, usages)):
+            if doc_id in results_by_id:
+                outcomes[i] = {"status": "ok", "extraction": results_by_id[doc_id], "usage": doc_usage,
+                               "from_cache": from_cache, "batch_size": len(batch)}
+            else:
+                increment("batch_fallback_documents")
+                fallback.append(i)
+
+        # 빠진 문서는 동시에 단독 요청 (속도는 limiter가 제한)
+        fallback_outcomes = await run_concurrently([batch[i] for i in fallback], process_document, LLM_CONCURRENCY)
+        for i, outcome in zip(fallback, fallback_outcomes):
+            outcomes[i] = outcome
+        return outcomes
+
+    completed = [0]
+
+    def on_result(doc, outcome):
+        """문서 1개가 끝날 때마다 통계 갱신 및 결과 저장"""
+        completed[0] += 1
+        filename = doc["filename"]
+        company = doc["company"]
+        print(f"[{completed[0]}/{len(pending)}] {filename}")
+
+        if outcome["status"] == "deferred":
+            stats["deferred_documents"] += 1
+            print(f"  [DEFER] 예산 소진, 다음 실행에서 처리\n")
+            return
+        if outcome["status"] == "skipped":
+            print(f"  [SKIP] LLM에 보낼 문단 없음 (중복 제거/사전 분류)\n")
+            return
+        if outcome["status"] == "error":
+            stats["failed_extractions"] += 1
+            print(f"  [ERROR] 처리 실패: {outcome['error']}\n")
+            return
+        if outcome["status"] == "failed":
             stats["failed_extractions"] += 1
-            print(f"  [ERROR] 처리 실패: {str(e)}")
+            print(f"  [FAIL] 추출 실패\n")
+            return
+        if outcome["status"] == "partial":
+            # journal에 기록하지 않으므로 다음 실행에서 다시 추출
+            stats["failed_extractions"] += 1
+            stats["partial_chunk_documents"] += 1
+            print(f"  [FAIL] chunk {outcome['failed_chunks']}개 추출 실패, 다음 실행에서 다시 추출\n")
+            return
+
+        extraction_result = outcome["extraction"]
+        usage = outcome["usage"]
+
+        stats["successful_extractions"] += 1
+        stats["by_company"][company]["successful"] += 1
+
+        relations_count = len(extraction_result.get("kpi_factor_relations", []))
+        stats["total_relations"] += relations_count
+        stats["by_company"][company]["relations"] += relations_count
+
+        # Usage 통계 (캐시 응답은 과금되지 않으므로 제외)
+        if outcome["from_cache"]:
+            stats["cached_documents"] += 1
+        elif usage:
+            stats["total_input_tokens"] += usage.prompt_token_count
+            stats["total_output_tokens"] += usage.candidates_token_count
+            stats["total_cached_input_tokens"] += cached_tokens_of(usage)
+            increment("llm_input_tokens", usage.prompt_token_count, backend=backend.name, model=getattr(usage, "model", None) or MODEL_NAME)
+            increment("llm_output_tokens", usage.candidates_token_count, backend=backend.name, model=getattr(usage, "model", None) or MODEL_NAME)
+        observe_count("relations_per_document", relations_count)
+
+        # 결과 저장
+        output_filename = os.path.splitext(filename)[0] + "_kpi_factors.json"
+        output_path = f"{kpi_factors_dir}/{output_filename}"
+
+        output_data = {
+            "source": doc.get("source", "consensus"),
+            "filename": filename,
+            "company": company,
+            "date": doc["date"],
+            "tv_char_count": doc["tv_chars"],
+            "extraction": extraction_result,
+            "metadata": {
+                "model": getattr(usage, "model", None) or MODEL_NAME,
+                "extracted_at": datetime.now().isoformat(),
+                "input_tokens": usage.prompt_token_count if usage else None,
+                "output_tokens": usage.candidates_token_count if usage else None,
+                "cached_input_tokens": cached_tokens_of(usage) if usage else None,
+                "from_cache": outcome["from_cache"],
+                "batch_size": outcome["batch_size"],
+                "prescreened": prescreener is not None
+            }
+        }
+
+        write_json_atomic(output_path, output_data)
+
+        # 결과 파일을 쓴 뒤 완료 기록 추가 (기록이 있으면 결과 파일도 있음)
+        record = {
+            "filename": filename,
+            "input_key": input_keys.get(filename),
+            "completed_at": datetime.now().isoformat(),
+            "input_tokens": output_data["metadata"]["input_tokens"],
+            "output_tokens": output_data["metadata"]["output_tokens"],
+            "from_cache": outcome["from_cache"],
+            "result": {
+                "filename": filename,
+                "source": output_data["source"],
+                "company": company,
+                "date": doc["date"],
+                "relations_count": relations_count,
+                "output_file": output_filename
+            }
+        }
+        append_journal(journal_file, record)
+        completed_records[filename] = record
 
+        print(f"  [OK] 추출 성공: {relations_count}개 관계" + (" (캐시)" if outcome["from_cache"] else ""))
+        if usage and not outcome["from_cache"]:
+            print(f"  토큰: {usage.prompt_token_count} in / {usage.candidates_token_count} out")
         print()
 
+    def on_batch_result(batch, outcomes):
+        """배치 1개가 끝나면 문서별로 결과 저장"""
+        for doc, outcome in zip(batch, outcomes):
+            on_result(doc, outcome)
+
+    # 동시 요청으로 남은 문서 처리 (완료될 때마다 journal에 기록)
+    with open(journal_path, 'a', encoding='utf-8') as journal_file:
+        with timer("extract_all_documents"):
+            asyncio.run(
+                run_concurrently(batches, process_batch, LLM_CONCURRENCY, on_batch_result)
+            )
+
+    # 결과 리스트: journal 기록에서 index 순서대로 재구성
+    results = [
+        completed_records[doc["filename"]]["result"]
+        for doc in documents if doc["filename"] in completed_records
+    ]
+    compact_journal(journal_path, [
+        completed_records[doc["filename"]]
+        for doc in documents if doc["filename"] in completed_records
+    ])
+    stats["rate_limit_events"] = limiter.rate_limit_events
+    if cache is not None:
+        stats["cache"] = cache.stats()
+        cache.close()
+    stats["ledger"] = ledger.summary()
+    ledger.close()
+    backend.close()
+    if ledger.fallback_backend is not None:
+        ledger.fallback_backend.close()
+
     # 통합 인덱스 생성
     kpi_factors_index = {
         "metadata": {
@@ -300,8 +1089,7 @@ def extract_kpi_factors():
 
     # 인덱스 저장
     index_path = f"{PROCESSED_DIR}/kpi_factors_index.json"
-    with open(index_path, 'w', encoding='utf-8') as f:
-        json.dump(kpi_factors_index, f, ensure_ascii=False, indent=2)
+    write_json_atomic(index_path, kpi_factors_index)
 
     # 최종 통계 출력
     print("=" * 80)
@@ -311,10 +1099,35 @@ def extract_kpi_factors():
     print(f"  처리된 문서: {stats['total_documents']}개")
     print(f"  성공: {stats['successful_extractions']}개")
     print(f"  실패: {stats['failed_extractions']}개")
+    print(f"  이전 실행 결과 재사용: {stats['resumed_documents']}개")
+    if stats["deferred_documents"]:
+        print(f"  예산 소진으로 연기: {stats['deferred_documents']}개")
+    if stats["partial_chunk_documents"]:
+        print(f"  chunk 일부 실패 (다음 실행에서 다시 추출): {stats['partial_chunk_documents']}개")
+    print(f"  API 요청: {stats['api_requests']}회 (배치 {len(multi_batches)}개, "
+          f"chunk 분할 문서 {stats['chunked_documents']}개)")
+    if multi_batches:
+        # 문서당 고정 프롬프트(지시문/목록/출력 형식) 토큰 추정
+        single_overhead = count_tokens(build_prompt("", "", ""))
+        batch_overhead = count_tokens(build_batch_prompt([]))
+        batched_docs = sum(len(batch) for batch in multi_batches)
+        fixed_tokens = single_overhead * (len(pending) - batched_docs) + batch_overhead * len(multi_batches)
+        print(f"  문서당 고정 프롬프트 토큰(추정): {single_overhead} -> {fixed_tokens / max(len(pending), 1):.0f}")
+    if prescreener is not None:
+        prescreen_stats = stats["prescreen"]
+        print(f"  사전 분류: 문단 {prescreen_stats['paragraphs']}개 중 {prescreen_stats['forwarded']}개 LLM 전달")
     print(f"  추출된 관계: {stats['total_relations']}개")
+    print(f"  Rate Limit 발생: {stats['rate_limit_events']}회")
+    if "cache" in stats:
+        print(f"  캐시: {stats['cache']['hits']}회 적중 / {stats['cache']['misses']}회 미적중 "
+              f"(적중률 {stats['cache']['hit_rate']}%, API 호출 없이 처리: {stats['cached_documents']}개)")
 
     print(f"\n[토큰 사용량]")
     print(f"  입력 토큰: {stats['total_input_tokens']:,}")
+    if stats["total_input_tokens"]:
+        cached_ratio = stats["total_cached_input_tokens"] / stats["total_input_tokens"] * 100
+        print(f"    prefix 캐시: {stats['total_cached_input_tokens']:,} ({cached_ratio:.1f}%) / "
+              f"새로 전송: {stats['total_input_tokens'] - stats['total_cached_input_tokens']:,}")
     print(f"  출력 토큰: {stats['total_output_tokens']:,}")
     print(f"  총 토큰: {stats['total_input_tokens'] + stats['total_output_tokens']:,}")
 
@@ -327,18 +1140,24 @@ def extract_kpi_factors():
     print(f"\n[저장 위치]")
     print(f"  문서: {kpi_factors_dir}/")
     print(f"  인덱스: {index_path}")
-
-    # 비용 계산 (Gemini Flash 2.5 pricing)
-    # Input: $0.075 per 1M tokens (128K context)
-    # Output: $0.30 per 1M tokens
-    input_cost = stats['total_input_tokens'] / 1_000_000 * 0.075
-    output_cost = stats['total_output_tokens'] / 1_000_000 * 0.30
-    total_cost = input_cost + output_cost
-
-    print(f"\n[예상 비용 (Gemini Flash 2.5)]")
-    print(f"  입력: ${input_cost:.4f}")
-    print(f"  출력: ${output_cost:.4f}")
-    print(f"  총계: ${total_cost:.4f}")
+    print(f"  완료 기록: {journal_path}")
+
+    print(f"  호출 원장: {LLM_LEDGER_PATH}")
+
+    # 비용 (호출 원장 기준, 가격: config.LLM_PRICING)
+    ledger_summary = stats["ledger"]
+    print(f"\n[비용]")
+    print(f"  사전 추정: ${preflight['cost_usd']:.4f} / 실제: ${ledger_summary['spent_usd']:.4f} "
+          f"({ledger_summary['spent_tokens']:,} 토큰, 호출 {ledger_summary['calls']}회 중 캐시 {ledger_summary['cache_hits']}회)")
+    for model_name, model_stats in ledger_summary["by_model"].items():
+        print(f"  {model_name}: {model_stats['calls']}회, 입력 {model_stats['input_tokens']:,} "
+              f"(prefix 캐시 {model_stats['cached_input_tokens']:,}) / "
+              f"출력 {model_stats['output_tokens']:,} 토큰, ${model_stats['cost_usd']:.4f}")
+    if ledger_summary["downgraded"]:
+        print(f"  예산 {LLM_BUDGET_DOWNGRADE_RATIO:.0%} 도달 후 {LLM_FALLBACK_MODEL} 모델 사용")
+
+    print(f"\n[실행 지표]")
+    write_metrics("07_extract_kpi_factors")
 
 if __name__ == "__main__":
     extract_kpi_factors()
@@ -2,12 +2,38 @@
 Step 7: KPI-Factor 집계
 
 개별 문서에서 추출된 모든 KPI-Factor를 통합 인덱스에 집계합니다.
+모든 통계는 관계를 한 번 읽으면서 Counter/배열 누산기에 채우므로
+집계 시간은 관계 수에 비례합니다.
+
+이전 실행의 집계 상태(aggregate_state.py)가 있으면 새로 추출되었거나 다시 추출된 문서만 읽어
+반영하고, 인덱스에서 빠진 문서는 집계에서 뺍니다.
+
+KPI/Factor 이름은 entity_normalizer.py로 KPI_LIST/FACTOR_LIST 용어에 맞춰 집계합니다.
+
+문서별 관계는 인덱스가 있는 SQLite 저장소(relation_store.py)에 문서 단위로 저장되어
+회사/기간/KPI/Factor 조건으로 조회할 수 있습니다. 집계 상태 파일에는 카운트와 예시만 남습니다.
+
+회사 × KPI-Factor 조합 × 주/월/분기별 추세 롤업(trend_rollups.py)도 함께 저장합니다.
+증분 집계에서는 바뀐 문서의 관계만으로 증감분을 만들어 저장된 롤업에 더합니다.
 """
 
 import json
 import os
-from collections import defaultdict
-from config import PROCESSED_DIR
+from aggregate_state import AggregateState, file_signature
+from relation_store import RelationStore
+from entity_normalizer import EntityNormalizer
+from trend_rollups import GRANULARITIES, build_rollups, load_saved_rollups, merge_rollups, save_rollups
+from config import (
+    PROCESSED_DIR,
+    AGGREGATE_INCREMENTAL,
+    AGGREGATE_STATE_PATH,
+    RELATION_STORE_PATH,
+    ENTITY_NORMALIZATION_ENABLED,
+    ENTITY_ALIAS_CACHE_PATH,
+    TREND_ROLLUP_PATH
+)
+from metrics import timer, increment, write_metrics
+
 
 def aggregate_kpi_factors():
     """개별 KPI-Factor 파일에서 모든 관계를 집계"""
@@ -29,125 +55,110 @@ def aggregate_kpi_factors():
 
     kpi_factors_dir = f"{PROCESSED_DIR}/kpi_factors"
 
-    # 모든 관계 수집
-    all_relations = []
-    unique_kpis = set()
-    unique_factors = set()
-
-    # KPI-Factor 조합별 통계
-    kpi_factor_stats = defaultdict(lambda: {
-        "positive": 0,
-        "negative": 0,
-        "neutral": 0,
-        "total": 0,
-        "examples": []
-    })
-
-    # 회사별 통계
-    company_stats = defaultdict(lambda: {
-        "kpis": set(),
-        "factors": set(),
-        "relations": []
-    })
-
-    print(f"처리할 문서: {len(index_data['results'])}개\n")
-
-    # 각 결과 파일 처리
-    for idx, result in enumerate(index_data['results'], 1):
+    # KPI/Factor 이름 정규화 (alias 캐시)
+    normalizer = EntityNormalizer() if ENTITY_NORMALIZATION_ENABLED else None
+
+    # 문서별 관계 저장소
+    store = RelationStore(RELATION_STORE_PATH)
+
+    # 이전 집계 상태 (없거나 형식/정규화 규칙이 바뀌었거나 저장소와 맞지 않으면 전체 재집계)
+    state = None
+    if AGGREGATE_INCREMENTAL:
+        with timer("load_aggregate_state"):
+            state = AggregateState.load(AGGREGATE_STATE_PATH, store, normalizer)
+    full_rebuild = state is None
+    if full_rebuild:
+        store.clear()
+        state = AggregateState(store, normalizer)
+
+    # 바뀐 문서만 골라냄 (결과 파일의 mtime/크기 비교)
+    results = index_data['results']
+    current_filenames = {result['filename'] for result in results}
+    changed = []
+    for result in results:
+        filepath = f"{kpi_factors_dir}/{result['output_file']}"
+        signature = file_signature(filepath) if os.path.exists(filepath) else None
+        if signature is None or not state.is_current(result['filename'], signature):
+            changed.append((result, filepath, signature))
+
+    # 추세 롤업 증감분용 (더한 관계 / 뺀 관계)
+    added_records = []
+    removed_records = []
+
+    def retract(filename):
+        records = state.retract_document(filename)
+        removed_records.extend(records)
+        increment("relations_retracted", len(records))
+
+    # 인덱스에서 빠진 문서는 집계에서 제외
+    removed = [filename for filename in state.documents if filename not in current_filenames]
+    for filename in removed:
+        retract(filename)
+
+    print(f"처리할 문서: {len(results)}개 ({'전체 재집계' if full_rebuild else '증분 집계'}: "
+          f"새로 읽을 문서 {len(changed)}개, 변경 없음 {len(results) - len(changed)}개, 제외 {len(removed)}개)\n")
+
+    # 바뀐 결과 파일 처리
+    for idx, (result, filepath, signature) in enumerate(changed, 1):
         output_file = result['output_file']
-        filepath = f"{kpi_factors_dir}/{output_file}"
+        filename = result['filename']
 
         try:
-            with open(filepath, 'r', encoding='utf-8') as f:
-                doc_data = json.load(f)
-
-            company = doc_data['company']
-            date = doc_data['date']
-            filename = doc_data['filename']
+            if signature is None:
+                raise FileNotFoundError(filepath)
+            with timer("load_kpi_factor_file"):
+                with open(filepath, 'r', encoding='utf-8') as f:
+                    doc_data = json.load(f)
 
-            # KPI-Factor 관계 추출
+            # KPI-Factor 관계 추출 (다시 추출된 문서는 이전 관계를 빼고 반영)
             relations = doc_data['extraction'].get('kpi_factor_relations', [])
+            retract(filename)
+            added_records.extend(
+                state.add_document(filename, doc_data['company'], doc_data['date'], relations, signature)
+            )
+            increment("relations_aggregated", len(relations))
 
             if relations:
-                print(f"[{idx}/{len(index_data['results'])}] {filename}: {len(relations)}개 관계")
-
-            for rel in relations:
-                kpi = rel['kpi']
-                factor = rel['factor']
-                relation = rel['relation']
-                evidence = rel.get('evidence', '')
-                confidence = rel.get('confidence', 'unknown')
-
-                # 유니크 KPI/Factor 추가
-                unique_kpis.add(kpi)
-                unique_factors.add(factor)
-
-                # 전체 관계 리스트에 추가
-                relation_record = {
-                    "company": company,
-                    "date": date,
-                    "filename": filename,
-                    "kpi": kpi,
-                    "factor": factor,
-                    "relation": relation,
-                    "evidence": evidence,
-                    "confidence": confidence
-                }
-                all_relations.append(relation_record)
-
-                # KPI-Factor 조합별 통계
-                key = f"{kpi}|{factor}"
-                kpi_factor_stats[key]["total"] += 1
-                kpi_factor_stats[key][relation] += 1
-
-                # 예시는 최대 3개까지만 저장 (high confidence 우선)
-                if len(kpi_factor_stats[key]["examples"]) < 3:
-                    kpi_factor_stats[key]["examples"].append({
-                        "company": company,
-                        "date": date,
-                        "relation": relation,
-                        "evidence": evidence[:100] + "..." if len(evidence) > 100 else evidence,
-                        "confidence": confidence
-                    })
-
-                # 회사별 통계
-                company_stats[company]["kpis"].add(kpi)
-                company_stats[company]["factors"].add(factor)
-                company_stats[company]["relations"].append(relation_record)
+                print(f"[{idx}/{len(changed)}] {filename}: {len(relations)}개 관계")
 
         except Exception as e:
+            # 읽을 수 없는 문서는 이전 버전도 집계에서 뺌
+            retract(filename)
             print(f"[ERROR] {output_file} 처리 실패: {str(e)}")
 
     print()
     print("=" * 80)
 
-    # KPI-Factor 조합별 통계를 리스트로 변환 (정렬용)
-    kpi_factor_summary = []
-    for key, stats in kpi_factor_stats.items():
-        kpi, factor = key.split("|")
-        kpi_factor_summary.append({
-            "kpi": kpi,
-            "factor": factor,
-            "total_mentions": stats["total"],
-            "positive": stats["positive"],
-            "negative": stats["negative"],
-            "neutral": stats["neutral"],
-            "examples": stats["examples"]
-        })
-
-    # 빈도순으로 정렬
-    kpi_factor_summary.sort(key=lambda x: x["total_mentions"], reverse=True)
-
-    # 회사별 통계를 JSON 직렬화 가능하게 변환
-    company_summary = {}
-    for company, stats in company_stats.items():
-        company_summary[company] = {
-            "unique_kpis": sorted(list(stats["kpis"])),
-            "unique_factors": sorted(list(stats["factors"])),
-            "kpi_count": len(stats["kpis"]),
-            "factor_count": len(stats["factors"]),
-            "relation_count": len(stats["relations"])
-        }
+    with timer("build_aggregated"):
+        aggregated = state.build_aggregated([result['filename'] for result in results])
+    all_relations = aggregated["all_relations"]
+    unique_kpis = aggregated["summary"]["unique_kpis"]
+    unique_factors = aggregated["summary"]["unique_factors"]
+    kpi_factor_summary = aggregated["kpi_factor_combinations"]
+    company_summary = aggregated["by_company"]
+
+    normalization = state.normalization_stats()
+
+    # 관계 저장소 반영 (집계 상태보다 먼저 commit, 상태 저장 전에 중단되면 다음 실행은 전체 재집계)
+    with timer("commit_relation_store"):
+        store.commit()
+        store_stats = store.stats()
+
+    # 추세 롤업 (회사 × 조합 × 기간, 저장된 롤업이 있으면 바뀐 문서의 증감분만 더함)
+    with timer("build_trend_rollups"):
+        saved_rollups = None if full_rebuild else load_saved_rollups(TREND_ROLLUP_PATH)
+        if saved_rollups is None:
+            rollups = build_rollups(store.all_relations())
+        else:
+            rollups = merge_rollups(saved_rollups, build_rollups(added_records, removed_records))
+        save_rollups(rollups, TREND_ROLLUP_PATH)
+
+    if AGGREGATE_INCREMENTAL:
+        with timer("save_aggregate_state"):
+            state.save(AGGREGATE_STATE_PATH)
+    store.close()
+    if normalizer is not None:
+        normalizer.save()
 
     # 집계 결과 생성
     aggregated_data = {
@@ -157,12 +168,9 @@ def aggregate_kpi_factors():
             "source_index": "kpi_factors_index.json"
         },
         "summary": {
-            "total_relations": len(all_relations),
-            "unique_kpis": sorted(list(unique_kpis)),
-            "unique_factors": sorted(list(unique_factors)),
-            "unique_kpi_count": len(unique_kpis),
-            "unique_factor_count": len(unique_factors),
-            "total_documents": len(index_data['results'])
+            **aggregated["summary"],
+            "total_documents": len(results),
+            "name_normalization": normalization
         },
         "by_company": company_summary,
         "kpi_factor_combinations": kpi_factor_summary,
@@ -171,8 +179,9 @@ def aggregate_kpi_factors():
 
     # 집계 결과 저장
     output_path = f"{PROCESSED_DIR}/kpi_factors_aggregated.json"
-    with open(output_path, 'w', encoding='utf-8') as f:
-        json.dump(aggregated_data, f, ensure_ascii=False, indent=2)
+    with timer("write_aggregated_json"):
+        with open(output_path, 'w', encoding='utf-8') as f:
+            json.dump(aggregated_data, f, ensure_ascii=False, indent=2)
 
     # 통계 출력
     print("집계 완료!")
@@ -182,16 +191,29 @@ def aggregate_kpi_factors():
     print(f"  유니크 KPI: {len(unique_kpis)}개")
     print(f"  유니크 Factor: {len(unique_factors)}개")
     print(f"  KPI-Factor 조합: {len(kpi_factor_summary)}개")
+    if normalizer is not None:
+        print(f"\n[이름 정규화]")
+        for key, label in (("kpi", "KPI"), ("factor", "Factor"), ("pair", "KPI-Factor 조합")):
+            raw_count = normalization[key]["raw"]
+            normalized_count = normalization[key]["normalized"]
+            reduction = (1 - normalized_count / raw_count) * 100 if raw_count else 0
+            print(f"  {label}: {raw_count}개 -> {normalized_count}개 ({reduction:.1f}% 감소)")
+
+    print(f"\n[추세 롤업] (회사 × 조합 × 기간)")
+    for granularity in GRANULARITIES:
+        periods = rollups[f"{granularity}_periods"]
+        period_range = f"{periods[0]} ~ {periods[-1]}" if len(periods) else "-"
+        print(f"  {granularity}: {len(rollups['companies'])} × {len(rollups['kpis'])} × {len(periods)} ({period_range})")
+    if rollups["skipped_relations"]:
+        print(f"  날짜가 없어 제외된 관계: {int(rollups['skipped_relations'])}개")
 
     print(f"\n[추출된 KPI 목록]")
-    for kpi in sorted(list(unique_kpis)):
-        kpi_count = sum(1 for r in all_relations if r['kpi'] == kpi)
-        print(f"  - {kpi}: {kpi_count}회 언급")
+    for kpi in unique_kpis:
+        print(f"  - {kpi}: {state.kpi_counts[kpi]}회 언급")
 
     print(f"\n[추출된 Factor 목록]")
-    for factor in sorted(list(unique_factors)):
-        factor_count = sum(1 for r in all_relations if r['factor'] == factor)
-        print(f"  - {factor}: {factor_count}회 언급")
+    for factor in unique_factors:
+        print(f"  - {factor}: {state.factor_counts[factor]}회 언급")
 
     print(f"\n[회사별 통계]")
     for company, stats in company_summary.items():
@@ -207,6 +229,14 @@ def aggregate_kpi_factors():
 
     print(f"\n[저장 위치]")
     print(f"  {output_path}")
+    if AGGREGATE_INCREMENTAL:
+        print(f"  집계 상태: {AGGREGATE_STATE_PATH}")
+    if normalizer is not None:
+        print(f"  이름 alias 캐시: {ENTITY_ALIAS_CACHE_PATH}")
+    print(f"  추세 롤업: {TREND_ROLLUP_PATH}")
+    print(f"  관계 저장소: {RELATION_STORE_PATH} (관계 {store_stats['relations']}개, "
+          f"이번 실행에서 문서 {len(changed)}개 갱신 / {len(removed)}개 삭제)")
+    write_metrics("08_aggregate_kpi_factors")
 
     return aggregated_data
 
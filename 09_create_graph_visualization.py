@@ -2,20 +2,47 @@
 Step 8: Graph 생성 및 시각화
 
 KPI-Factor 관계 데이터를 Graph 형태로 시각화하고 Graph RAG를 위한 데이터를 준비합니다.
+엣지는 종류(긍정/부정/중립 영향, 회사 연결)별로 trace 1개에 묶어 그리므로
+엣지 수가 늘어도 trace 수는 일정합니다.
+노드 위치는 graph_layout.py가 캐시하므로 노드가 바뀌지 않으면 layout을 다시 계산하지 않습니다.
+
+근거 문장은 엣지에 넣지 않고 관계 id로 참조합니다. GraphML에는 엣지별 id 목록만 쓰고,
+근거는 id 순서의 별도 테이블(kpi_factor_evidence.jsonl)에 한 번만 저장합니다.
 """
 
 import json
 import os
 import networkx as nx
+import numpy as np
 import plotly.graph_objects as go
 from collections import defaultdict
 import community as community_louvain
-from config import PROCESSED_DIR
+from graph_layout import compute_layout
+from config import PROCESSED_DIR, GRAPH_WEBGL_EDGE_THRESHOLD, GRAPH_LAYOUT_CACHE_PATH
+from metrics import timer, increment, write_metrics
+
+# Factor -> KPI 엣지의 관계 종류별 카운트 속성 (대표 관계는 가장 많은 종류, 동률이면 neutral)
+POLARITIES = ('positive', 'negative', 'neutral')
+
+
+def dominant_relation(data):
+    """엣지의 대표 관계 (positive/negative/neutral 중 가장 많은 것, 동률이면 neutral)"""
+    counts = [data[polarity] for polarity in POLARITIES]
+    top = max(counts)
+    return POLARITIES[counts.index(top)] if counts.count(top) == 1 else 'neutral'
+
 
 def create_graph_from_data(aggregated_data):
-    """집계된 데이터에서 NetworkX 그래프 생성"""
+    """
+    집계된 데이터에서 NetworkX 그래프 생성
+
+    Factor -> KPI 엣지는 (Factor, KPI) 쌍마다 1개이며 관계 종류별 카운트(positive/negative/neutral),
+    대표 관계(relation), 근거 관계 id 목록(evidence_ids)을 가집니다.
+    근거 id는 all_relations의 위치(int32 배열)이고, 원문은 G.graph['relations'][id]로 찾습니다.
+    """
 
     G = nx.DiGraph()  # 방향성 그래프 (KPI <- Factor 영향)
+    G.graph['relations'] = aggregated_data['all_relations']  # 근거 id -> 관계 (복사하지 않고 참조)
 
     # 노드 타입별 카운터
     node_stats = defaultdict(int)
@@ -37,15 +64,11 @@ def create_graph_from_data(aggregated_data):
         node_stats['factor'] += 1
 
     # 관계(엣지) 추가
-    for relation in aggregated_data['all_relations']:
+    for relation_id, relation in enumerate(aggregated_data['all_relations']):
         company = relation['company']
         kpi = relation['kpi']
         factor = relation['factor']
-        relation_type = relation['relation']
-        evidence = relation['evidence']
-        confidence = relation['confidence']
-        date = relation['date']
-        filename = relation['filename']
+        relation_type = relation['relation'] if relation['relation'] in POLARITIES else 'neutral'
 
         kpi_node = f"KPI_{kpi}"
         factor_node = f"Factor_{factor}"
@@ -61,148 +84,161 @@ def create_graph_from_data(aggregated_data):
             edge_stats['company_factor'] += 1
 
         # Factor -> KPI 영향 관계 (핵심 엣지)
-        edge_key = (factor_node, kpi_node, relation_type)
-
-        if G.has_edge(factor_node, kpi_node):
-            # 기존 엣지에 정보 추가
-            edge_data = G[factor_node][kpi_node]
-            edge_data['weight'] += 1
-            edge_data['evidences'].append({
-                'company': company,
-                'date': date,
-                'filename': filename,
-                'evidence': evidence,
-                'confidence': confidence
-            })
-        else:
-            # 새 엣지 생성
+        if not G.has_edge(factor_node, kpi_node):
             G.add_edge(
                 factor_node,
                 kpi_node,
                 edge_type='influences',
-                relation=relation_type,
-                weight=1,
-                evidences=[{
-                    'company': company,
-                    'date': date,
-                    'filename': filename,
-                    'evidence': evidence,
-                    'confidence': confidence
-                }]
+                weight=0,
+                positive=0,
+                negative=0,
+                neutral=0,
+                evidence_ids=[]
             )
-            edge_stats[f'influence_{relation_type}'] += 1
+        edge_data = G[factor_node][kpi_node]
+        edge_data['weight'] += 1
+        edge_data[relation_type] += 1
+        edge_data['evidence_ids'].append(relation_id)
+
+    # 대표 관계 (시각화 색상, 하위 호환용 relation 속성), 근거 id는 정수 배열로 압축
+    for _, _, data in G.edges(data=True):
+        if data['edge_type'] == 'influences':
+            data['relation'] = dominant_relation(data)
+            data['evidence_ids'] = np.array(data['evidence_ids'], dtype=np.int32)
+            edge_stats[f"influence_{data['relation']}"] += 1
 
     return G, node_stats, edge_stats
 
 
-def create_interactive_visualization(G, output_path):
-    """Plotly를 사용한 인터랙티브 시각화 생성"""
-
-    # Spring layout으로 노드 위치 계산
-    pos = nx.spring_layout(G, k=2, iterations=50, seed=42)
-
-    # 엣지 데이터 준비
-    edge_traces = []
-
-    # 엣지 타입별로 분리
-    for edge in G.edges(data=True):
-        source, target, data = edge
-        edge_type = data.get('edge_type', 'unknown')
-
-        x0, y0 = pos[source]
-        x1, y1 = pos[target]
-
-        # 색상 설정
-        if edge_type == 'influences':
-            relation = data.get('relation', 'neutral')
-            if relation == 'positive':
-                color = 'green'
-                width = 2
-            elif relation == 'negative':
-                color = 'red'
-                width = 2
-            else:
-                color = 'gray'
-                width = 1
-        else:
-            color = 'lightgray'
-            width = 0.5
-
-        edge_trace = go.Scatter(
-            x=[x0, x1, None],
-            y=[y0, y1, None],
+# 근거 테이블에 쓰는 관계 필드 (id 다음 순서)
+EVIDENCE_FIELDS = ('company', 'date', 'filename', 'kpi', 'factor', 'relation', 'confidence', 'evidence')
+
+
+# 엣지 종류별 스타일 (종류마다 trace 1개)
+EDGE_STYLES = {
+    'influences_positive': dict(color='green', width=2),
+    'influences_negative': dict(color='red', width=2),
+    'influences_neutral': dict(color='gray', width=1),
+    'membership': dict(color='lightgray', width=0.5)
+}
+
+# 노드 타입별 색상
+NODE_COLORS = {
+    'company': '#1f77b4',  # 파란색
+    'kpi': '#ff7f0e',      # 주황색
+    'factor': '#2ca02c'    # 녹색
+}
+
+
+def edge_class(data):
+    """엣지 스타일 종류 (EDGE_STYLES 키)"""
+    if data.get('edge_type') != 'influences':
+        return 'membership'
+    relation = data.get('relation', 'neutral')
+    return f"influences_{relation}" if relation in ('positive', 'negative') else 'influences_neutral'
+
+
+def segment_coordinates(starts, ends):
+    """
+    선분 좌표를 trace 1개용 배열로 변환 (선분 사이는 NaN으로 끊음)
+
+    Args:
+        starts, ends: (엣지 수, 2) 배열
+
+    Returns:
+        tuple: (x, y) 길이 3 * 엣지 수 배열 [x0, x1, NaN, x0, x1, NaN, ...]
+    """
+    segments = np.full((len(starts), 3, 2), np.nan)
+    segments[:, 0] = starts
+    segments[:, 1] = ends
+    return segments[:, :, 0].ravel(), segments[:, :, 1].ravel()
+
+
+def build_edge_traces(G, pos, scatter=go.Scatter):
+    """엣지를 종류별로 묶어 trace 생성 (엣지 수와 무관하게 최대 len(EDGE_STYLES)개)"""
+    edges_by_class = defaultdict(list)
+    for source, target, data in G.edges(data=True):
+        edges_by_class[edge_class(data)].append((source, target))
+
+    traces = []
+    for edge_cls, style in EDGE_STYLES.items():
+        edges = edges_by_class.get(edge_cls)
+        if not edges:
+            continue
+        starts = np.array([pos[source] for source, _ in edges], dtype=float)
+        ends = np.array([pos[target] for _, target in edges], dtype=float)
+        x, y = segment_coordinates(starts, ends)
+        traces.append(scatter(
+            x=x,
+            y=y,
             mode='lines',
-            line=dict(width=width, color=color),
+            name=edge_cls,
+            line=style,
             hoverinfo='none',
             showlegend=False,
             opacity=0.5
-        )
-        edge_traces.append(edge_trace)
+        ))
+    return traces
 
-    # 노드 데이터 준비 (타입별로 분리)
-    node_traces = {}
 
-    for node in G.nodes(data=True):
-        node_id, data = node
+def build_node_traces(G, pos, scatter=go.Scatter):
+    """노드를 타입별로 묶어 trace 생성"""
+    node_traces = {}
+    for node_id, data in G.nodes(data=True):
         node_type = data.get('node_type', 'unknown')
-
-        if node_type not in node_traces:
-            node_traces[node_type] = {
-                'x': [],
-                'y': [],
-                'text': [],
-                'size': [],
-                'customdata': []
-            }
+        trace_data = node_traces.setdefault(node_type, {
+            'x': [],
+            'y': [],
+            'label': [],
+            'text': [],
+            'size': [],
+            'customdata': []
+        })
 
         x, y = pos[node_id]
-        label = data.get('label', node_id)
+        label = data.get('label', data.get('name', node_id))
 
         # 노드 크기 (연결 개수에 비례)
         degree = G.degree(node_id)
-        size = 10 + degree * 2
-
-        # Hover 텍스트
-        hover_text = f"{label}<br>타입: {node_type}<br>연결: {degree}개"
-
-        node_traces[node_type]['x'].append(x)
-        node_traces[node_type]['y'].append(y)
-        node_traces[node_type]['text'].append(hover_text)
-        node_traces[node_type]['size'].append(size)
-        node_traces[node_type]['customdata'].append(node_id)
-
-    # 노드 타입별 색상
-    node_colors = {
-        'company': '#1f77b4',  # 파란색
-        'kpi': '#ff7f0e',      # 주황색
-        'factor': '#2ca02c'    # 녹색
-    }
-
-    # Plotly Figure 생성
-    fig = go.Figure()
-
-    # 엣지 추가
-    for trace in edge_traces:
-        fig.add_trace(trace)
-
-    # 노드 추가 (타입별)
-    for node_type, trace_data in node_traces.items():
-        fig.add_trace(go.Scatter(
+
+        trace_data['x'].append(x)
+        trace_data['y'].append(y)
+        trace_data['label'].append(label)
+        trace_data['text'].append(f"{label}<br>타입: {node_type}<br>연결: {degree}개")  # Hover 텍스트
+        trace_data['size'].append(10 + degree * 2)
+        trace_data['customdata'].append(node_id)
+
+    return [
+        scatter(
             x=trace_data['x'],
             y=trace_data['y'],
             mode='markers+text',
             name=node_type.upper(),
-            text=[data.get('label', data.get('name', '')) for node, data in G.nodes(data=True) if data.get('node_type') == node_type],
+            text=trace_data['label'],
             textposition="top center",
             hovertext=trace_data['text'],
             hoverinfo='text',
             marker=dict(
                 size=trace_data['size'],
-                color=node_colors.get(node_type, 'gray'),
+                color=NODE_COLORS.get(node_type, 'gray'),
                 line=dict(width=2, color='white')
             ),
             customdata=trace_data['customdata']
-        ))
+        )
+        for node_type, trace_data in node_traces.items()
+    ]
+
+
+def build_figure(G, pos):
+    """
+    그래프 Figure 생성
+
+    엣지가 GRAPH_WEBGL_EDGE_THRESHOLD개 이상이면 SVG 대신 WebGL(Scattergl)로 그립니다.
+    """
+    scatter = go.Scattergl if G.number_of_edges() >= GRAPH_WEBGL_EDGE_THRESHOLD else go.Scatter
+
+    # Plotly Figure 생성 (엣지를 먼저 넣어 노드 아래에 그려지도록)
+    fig = go.Figure(data=build_edge_traces(G, pos, scatter) + build_node_traces(G, pos, scatter))
 
     # 레이아웃 설정
     fig.update_layout(
@@ -226,27 +262,62 @@ def create_interactive_visualization(G, output_path):
             x=0.01
         )
     )
+    return fig
+
+
+def create_interactive_visualization(G, output_path):
+    """Plotly를 사용한 인터랙티브 시각화 생성"""
+
+    # 노드 위치 계산 (캐시 재사용, 새 노드만 배치, 대규모 그래프는 격자 근사 layout)
+    with timer("graph_layout"):
+        pos, layout_info = compute_layout(G, GRAPH_LAYOUT_CACHE_PATH)
+    layout_modes = {"cached": "캐시 재사용", "incremental": f"새 노드 {layout_info['new_nodes']}개 배치", "full": "전체 계산"}
+    print(f"  레이아웃: {layout_modes[layout_info['mode']]}"
+          + (f" ({layout_info['algorithm']})" if layout_info['algorithm'] else ""))
+
+    with timer("build_figure"):
+        fig = build_figure(G, pos)
 
     # HTML 파일로 저장
-    fig.write_html(output_path)
-    print(f"  시각화 저장: {output_path}")
+    with timer("write_html"):
+        fig.write_html(output_path)
+    print(f"  시각화 저장: {output_path} (trace {len(fig.data)}개, "
+          f"{'WebGL' if G.number_of_edges() >= GRAPH_WEBGL_EDGE_THRESHOLD else 'SVG'})")
 
     return fig
 
 
-def export_for_graph_rag(G, output_path):
-    """Graph RAG를 위한 GraphML 형식으로 저장"""
+def export_for_graph_rag(G, output_path, evidence_path):
+    """
+    Graph RAG를 위한 GraphML + 근거 테이블 저장
 
-    # GraphML은 리스트 타입을 지원하지 않으므로 JSON 문자열로 변환
-    G_export = G.copy()
-    for u, v, data in G_export.edges(data=True):
-        if 'evidences' in data:
-            # evidences 리스트를 JSON 문자열로 변환
-            data['evidences'] = json.dumps(data['evidences'], ensure_ascii=False)
+    GraphML 엣지에는 근거 관계 id 목록만 공백으로 구분한 문자열(evidence_ids="3 17 42")로 쓰고,
+    근거는 evidence_path에 관계 id 순서대로 한 줄씩(JSONL) 저장합니다.
+    엣지마다 근거를 복사하지 않으므로 GraphML 크기가 근거 길이와 무관합니다.
+    """
+
+    # GraphML은 배열 타입을 지원하지 않으므로 id 목록은 문자열로 변환
+    G_export = nx.DiGraph()
+    G_export.add_nodes_from(G.nodes(data=True))
+    for u, v, data in G.edges(data=True):
+        attributes = dict(data)
+        if 'evidence_ids' in data:
+            attributes['evidence_ids'] = " ".join(map(str, data['evidence_ids'].tolist()))
+        G_export.add_edge(u, v, **attributes)
 
     # GraphML로 저장 (LangChain, LlamaIndex와 호환)
     nx.write_graphml(G_export, output_path)
-    print(f"  GraphML 저장: {output_path}")
+    print(f"  GraphML 저장: {output_path} ({os.path.getsize(output_path) / 1024:.1f} KB)")
+
+    # 근거 테이블 (줄 번호 = 관계 id)
+    tmp_path = f"{evidence_path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        for relation_id, relation in enumerate(G.graph['relations']):
+            record = {'id': relation_id, **{key: relation[key] for key in EVIDENCE_FIELDS}}
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+    os.replace(tmp_path, evidence_path)
+    print(f"  근거 테이블 저장: {evidence_path} (관계 {len(G.graph['relations'])}개, "
+          f"{os.path.getsize(evidence_path) / 1024:.1f} KB)")
 
 
 def analyze_graph(G):
@@ -295,6 +366,18 @@ def analyze_graph(G):
         label = G.nodes[node].get('label', node)
         print(f"  {label}: {degree}개 연결")
 
+    # Factor -> KPI 엣지의 관계 종류
+    influences = [data for _, _, data in G.edges(data=True) if data.get('edge_type') == 'influences']
+    dominant = defaultdict(int)
+    for data in influences:
+        dominant[data['relation']] += 1
+    mixed = sum(1 for data in influences if data['positive'] and data['negative'])
+
+    print(f"\n[Factor -> KPI 엣지 대표 관계]")
+    for polarity in POLARITIES:
+        print(f"  {polarity}: {dominant[polarity]}개")
+    print(f"  긍정/부정 관계가 모두 있는 엣지: {mixed}개")
+
 
 def main():
     """메인 함수"""
@@ -323,12 +406,16 @@ def main():
 
     # 그래프 생성
     print("그래프 생성 중...")
-    G, node_stats, edge_stats = create_graph_from_data(aggregated_data)
+    with timer("build_graph"):
+        G, node_stats, edge_stats = create_graph_from_data(aggregated_data)
+    increment("graph_nodes", G.number_of_nodes())
+    increment("graph_edges", G.number_of_edges())
     print(f"  [OK] 노드 {G.number_of_nodes()}개, 엣지 {G.number_of_edges()}개 생성")
     print()
 
     # 그래프 분석
-    analyze_graph(G)
+    with timer("analyze_graph"):
+        analyze_graph(G)
     print()
 
     # 시각화 생성
@@ -341,7 +428,9 @@ def main():
     # GraphML 저장
     print("Graph RAG용 데이터 저장 중...")
     graphml_output = f"{PROCESSED_DIR}/kpi_factor_graph.graphml"
-    export_for_graph_rag(G, graphml_output)
+    evidence_output = f"{PROCESSED_DIR}/kpi_factor_evidence.jsonl"
+    with timer("export_graphml"):
+        export_for_graph_rag(G, graphml_output, evidence_output)
     print()
 
     print("=" * 80)
@@ -352,6 +441,9 @@ def main():
     print(f"     브라우저에서 열어 인터랙티브 그래프를 확인하세요")
     print(f"  2. {graphml_output}")
     print(f"     Graph RAG 구현에 사용할 수 있습니다")
+    print(f"  3. {evidence_output}")
+    print(f"     GraphML 엣지의 evidence_ids가 가리키는 근거 테이블 (줄 번호 = 관계 id)")
+    write_metrics("09_create_graph_visualization")
     print()
 
 
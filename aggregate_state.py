@@ -0,0 +1,388 @@
+"""
+Step 7 증분 집계 상태
+
+KPI-Factor 집계 결과(카운트, 회사별 KPI/Factor, 조합별 예시)를 저장해 두고,
+다음 실행에서는 새로 추출되었거나 다시 추출된 문서만 읽어 반영합니다.
+  - add_document: 문서의 관계를 카운트에 더함 (이미 있던 문서면 이전 버전을 먼저 뺌)
+  - retract_document: 문서의 관계를 카운트에서 빼고, 그 문서의 예시는 다른 문서로 채움
+
+문서별 관계 레코드는 상태 파일이 아니라 관계 저장소(relation_store.RelationStore)에 있습니다.
+상태 파일에는 카운트, 예시, 문서별 signature만 있으므로 저장/로드 비용은 관계 수와 무관하고,
+문서를 빼거나 예시를 다시 채울 때는 저장소에서 그 문서/조합의 관계만 읽습니다.
+
+문서가 바뀌었는지는 결과 파일의 (mtime, 크기)로 판단하므로 변경 없는 문서는 파일을 열지 않습니다.
+
+조합별 예시는 크기 AGGREGATE_MAX_EXAMPLES의 min-heap으로 유지합니다 (관계 1개당 O(log k)).
+신뢰도(high > medium > low) > 날짜(최신) > 근거 길이 순으로 좋은 예시가 남고, 동점은 파일명/위치로 정하므로
+예시와 조합 순서는 문서를 반영한 순서와 무관하고 증분 집계와 전체 재집계 결과가 같습니다.
+
+normalizer(entity_normalizer.EntityNormalizer)가 주어지면 KPI/Factor 이름을 대표 용어로 바꿔 집계하고,
+원래 이름은 관계 레코드의 kpi_raw/factor_raw에 남깁니다.
+"""
+
+import heapq
+import json
+import os
+from collections import Counter, defaultdict
+from config import AGGREGATE_MAX_EXAMPLES, AGGREGATE_EXAMPLE_EVIDENCE_CHARS
+
+# 저장 형식이나 집계 규칙이 바뀌면 올려서 전체 재집계
+STATE_VERSION = 4
+
+# 관계 종류별 카운트 배열의 위치 (알 수 없는 값은 neutral로 집계)
+RELATION_TYPES = ("positive", "negative", "neutral")
+RELATION_INDEX = {relation: i for i, relation in enumerate(RELATION_TYPES)}
+NEUTRAL_INDEX = RELATION_INDEX["neutral"]
+
+# 예시 선택 시 신뢰도 순위 (알 수 없는 값은 가장 낮음)
+CONFIDENCE_RANK = {"high": 3, "medium": 2, "low": 1}
+
+# 예시에만 있고 결과 파일에는 쓰지 않는 필드
+_EXAMPLE_INTERNAL_FIELDS = ("filename", "position", "evidence_length")
+
+
+def file_signature(path):
+    """결과 파일 변경 여부 판단용 (mtime_ns, 크기)"""
+    stat = os.stat(path)
+    return [stat.st_mtime_ns, stat.st_size]
+
+
+def _pair_key(kpi, factor):
+    return f"{kpi}|{factor}"
+
+
+def _decrement(counter, key):
+    """카운트를 1 줄이고 0이 되면 키 삭제 (유니크 목록에서 빠지도록)"""
+    counter[key] -= 1
+    if counter[key] <= 0:
+        del counter[key]
+
+
+def _make_example(record, position):
+    """관계 1개를 조합 예시로 변환 (근거 문장은 AGGREGATE_EXAMPLE_EVIDENCE_CHARS자까지)"""
+    evidence = record["evidence"]
+    limit = AGGREGATE_EXAMPLE_EVIDENCE_CHARS
+    return {
+        "company": record["company"],
+        "date": record["date"],
+        "relation": record["relation"],
+        "evidence": evidence[:limit] + "..." if len(evidence) > limit else evidence,
+        "confidence": record["confidence"],
+        "filename": record["filename"],
+        "position": position,
+        "evidence_length": len(evidence)
+    }
+
+
+def _example_rank(example):
+    """예시 순위 (클수록 좋음): 신뢰도, 날짜, 근거 길이, 그다음은 동점 처리용"""
+    return (
+        CONFIDENCE_RANK.get(example["confidence"], 0),
+        example["date"] or "",
+        min(example["evidence_length"], AGGREGATE_EXAMPLE_EVIDENCE_CHARS),
+        example["filename"],
+        -example["position"]
+    )
+
+
+def _offer_example(heap, example):
+    """
+    예시 heap에 후보 추가 (heap[0]이 가장 나쁜 예시, 최대 AGGREGATE_MAX_EXAMPLES개)
+
+    heap 항목은 (순위, 예시)이며 순위에 파일명/위치가 들어 있어 예시 dict끼리 비교할 일은 없습니다.
+    """
+    entry = (_example_rank(example), example)
+    if len(heap) < AGGREGATE_MAX_EXAMPLES:
+        heapq.heappush(heap, entry)
+    elif entry[0] > heap[0][0]:
+        heapq.heapreplace(heap, entry)
+
+
+def _examples_heap(examples):
+    """저장된 예시 리스트 -> heap"""
+    heap = [(_example_rank(example), example) for example in examples]
+    heapq.heapify(heap)
+    return heap
+
+
+class AggregateState:
+    """문서별 기여분을 빼고 더할 수 있는 집계 상태"""
+
+    def __init__(self, store, normalizer=None):
+        self.store = store
+        self.normalizer = normalizer
+        self.documents = {}  # filename -> signature
+        self.kpi_counts = Counter()
+        self.factor_counts = Counter()
+        self.combination_counts = {}  # "kpi|factor" -> [긍정, 부정, 중립]
+        self.combination_examples = {}  # "kpi|factor" -> 예시 heap [(순위, 예시)]
+        self.company_kpi_counts = defaultdict(Counter)
+        self.company_factor_counts = defaultdict(Counter)
+        self.company_relation_counts = Counter()
+        self.raw_name_counts = {"kpi": Counter(), "factor": Counter(), "pair": Counter()}  # 정규화 전 이름
+        self._examples_to_refill = set()
+
+    def is_current(self, filename, signature):
+        """이미 같은 버전의 문서가 반영되어 있는지"""
+        return self.documents.get(filename) == signature
+
+    def _make_record(self, filename, company, date, position, rel):
+        """
+        추출 결과의 관계 1개를 집계 레코드로 변환
+
+        Raises:
+            ValueError: kpi/factor/relation이 없거나 문자열이 아닌 관계
+        """
+        if not isinstance(rel, dict):
+            raise ValueError(f"관계 {position}: 객체가 아닙니다")
+        for field in ("kpi", "factor", "relation"):
+            if not isinstance(rel.get(field), str):
+                raise ValueError(f"관계 {position}: {field} 필드가 없거나 문자열이 아닙니다")
+        kpi = rel['kpi']
+        factor = rel['factor']
+        if self.normalizer is not None:
+            kpi = self.normalizer.normalize(kpi, "kpi")
+            factor = self.normalizer.normalize(factor, "factor")
+        return {
+            "company": company,
+            "date": date,
+            "filename": filename,
+            "kpi": kpi,
+            "factor": factor,
+            "kpi_raw": rel['kpi'],
+            "factor_raw": rel['factor'],
+            "relation": rel['relation'],
+            "evidence": str(rel.get('evidence') or ''),
+            "confidence": str(rel.get('confidence') or 'unknown')
+        }
+
+    def add_document(self, filename, company, date, relations, signature):
+        """
+        문서 1개의 관계를 집계에 반영
+
+        레코드를 모두 만든 뒤에 카운트/저장소/문서 목록을 갱신하므로, 잘못된 관계가 있으면
+        아무것도 바꾸지 않고 예외가 발생합니다 (이전 버전의 문서도 그대로 남음).
+
+        Args:
+            relations: 추출 결과의 kpi_factor_relations
+            signature: file_signature() 값
+
+        Returns:
+            list: 반영한 관계 레코드
+
+        Raises:
+            ValueError: 형식이 잘못된 관계
+        """
+        records = [
+            self._make_record(filename, company, date, position, rel)
+            for position, rel in enumerate(relations)
+        ]
+
+        if filename in self.documents:
+            self.retract_document(filename)
+
+        for position, record in enumerate(records):
+            key = _pair_key(record["kpi"], record["factor"])
+            self.kpi_counts[record["kpi"]] += 1
+            self.factor_counts[record["factor"]] += 1
+            counts = self.combination_counts.setdefault(key, [0] * len(RELATION_TYPES))
+            counts[RELATION_INDEX.get(record["relation"], NEUTRAL_INDEX)] += 1
+            self.company_kpi_counts[company][record["kpi"]] += 1
+            self.company_factor_counts[company][record["factor"]] += 1
+            self.company_relation_counts[company] += 1
+            self.raw_name_counts["kpi"][record["kpi_raw"]] += 1
+            self.raw_name_counts["factor"][record["factor_raw"]] += 1
+            self.raw_name_counts["pair"][_pair_key(record["kpi_raw"], record["factor_raw"])] += 1
+
+            _offer_example(self.combination_examples.setdefault(key, []), _make_example(record, position))
+
+        self.store.replace_document(filename, signature, records)
+        self.documents[filename] = signature
+        return records
+
+    def retract_document(self, filename):
+        """
+        문서 1개의 관계를 집계에서 뺌 (문서가 삭제되었거나 다시 추출됨)
+
+        Returns:
+            list: 뺀 관계 레코드
+        """
+        if self.documents.pop(filename, None) is None:
+            return []
+
+        records = self.store.document_relations(filename)
+        self.store.delete_document(filename)
+        for record in records:
+            key = _pair_key(record["kpi"], record["factor"])
+            company = record["company"]
+            _decrement(self.kpi_counts, record["kpi"])
+            _decrement(self.factor_counts, record["factor"])
+            counts = self.combination_counts[key]
+            counts[RELATION_INDEX.get(record["relation"], NEUTRAL_INDEX)] -= 1
+            if sum(counts) <= 0:
+                del self.combination_counts[key]
+                self.combination_examples.pop(key, None)
+                self._examples_to_refill.discard(key)
+            _decrement(self.company_kpi_counts[company], record["kpi"])
+            _decrement(self.company_factor_counts[company], record["factor"])
+            _decrement(self.company_relation_counts, company)
+            if company not in self.company_relation_counts:
+                del self.company_kpi_counts[company]
+                del self.company_factor_counts[company]
+            _decrement(self.raw_name_counts["kpi"], record["kpi_raw"])
+            _decrement(self.raw_name_counts["factor"], record["factor_raw"])
+            _decrement(self.raw_name_counts["pair"], _pair_key(record["kpi_raw"], record["factor_raw"]))
+
+            heap = self.combination_examples.get(key)
+            if heap and any(example["filename"] == filename for _, example in heap):
+                self.combination_examples[key] = _examples_heap(
+                    [example for _, example in heap if example["filename"] != filename]
+                )
+                self._examples_to_refill.add(key)
+
+        return records
+
+    def refill_examples(self):
+        """뺀 문서의 예시가 있던 조합을 저장소에 남은 관계로 다시 채움 (해당 조합의 관계만 읽음)"""
+        for key in self._examples_to_refill:
+            heap = self.combination_examples[key] = []
+            for position, record in self.store.pair_relations(*key.split("|", 1)):
+                _offer_example(heap, _make_example(record, position))
+        self._examples_to_refill = set()
+
+    def build_aggregated(self, filenames):
+        """
+        집계 결과 생성 (kpi_factors_aggregated.json 형식)
+
+        Args:
+            filenames: 인덱스 순서의 문서 파일명 (all_relations 순서, 관계는 저장소에서 읽음)
+
+        Returns:
+            dict: {"summary", "by_company", "kpi_factor_combinations", "all_relations"}
+        """
+        self.refill_examples()
+
+        kpi_factor_summary = []
+        for key, counts in self.combination_counts.items():
+            kpi, factor = key.split("|", 1)
+            combination = {
+                "kpi": kpi,
+                "factor": factor,
+                "total_mentions": sum(counts)
+            }
+            combination.update(zip(RELATION_TYPES, counts))
+            combination["examples"] = [
+                {k: v for k, v in example.items() if k not in _EXAMPLE_INTERNAL_FIELDS}
+                for _, example in sorted(self.combination_examples.get(key, []), reverse=True)
+            ]
+            kpi_factor_summary.append(combination)
+        kpi_factor_summary.sort(key=lambda x: (-x["total_mentions"], x["kpi"], x["factor"]))
+
+        company_summary = {}
+        for company, relation_count in sorted(self.company_relation_counts.items()):
+            company_summary[company] = {
+                "unique_kpis": sorted(self.company_kpi_counts[company]),
+                "unique_factors": sorted(self.company_factor_counts[company]),
+                "kpi_count": len(self.company_kpi_counts[company]),
+                "factor_count": len(self.company_factor_counts[company]),
+                "relation_count": relation_count
+            }
+
+        all_relations = [
+            record
+            for filename in filenames if filename in self.documents
+            for record in self.store.document_relations(filename)
+        ]
+        return {
+            "summary": {
+                "total_relations": len(all_relations),
+                "unique_kpis": sorted(self.kpi_counts),
+                "unique_factors": sorted(self.factor_counts),
+                "unique_kpi_count": len(self.kpi_counts),
+                "unique_factor_count": len(self.factor_counts)
+            },
+            "by_company": company_summary,
+            "kpi_factor_combinations": kpi_factor_summary,
+            "all_relations": all_relations
+        }
+
+    def normalization_stats(self):
+        """
+        이름 정규화 전후의 키 개수
+
+        Returns:
+            dict: {"kpi", "factor", "pair"} 각각 {"raw", "normalized"}
+        """
+        normalized = {
+            "kpi": len(self.kpi_counts),
+            "factor": len(self.factor_counts),
+            "pair": len(self.combination_counts)
+        }
+        return {key: {"raw": len(self.raw_name_counts[key]), "normalized": normalized[key]} for key in normalized}
+
+    def _normalization_fingerprint(self):
+        return self.normalizer.fingerprint() if self.normalizer is not None else None
+
+    def save(self, path):
+        """상태 저장 (임시 파일에 쓴 뒤 교체)"""
+        self.refill_examples()
+        data = {
+            "version": STATE_VERSION,
+            "normalization": self._normalization_fingerprint(),
+            "example_settings": [AGGREGATE_MAX_EXAMPLES, AGGREGATE_EXAMPLE_EVIDENCE_CHARS],
+            "documents": self.documents,
+            "kpi_counts": self.kpi_counts,
+            "factor_counts": self.factor_counts,
+            "combination_counts": self.combination_counts,
+            "combination_examples": {
+                key: [example for _, example in heap] for key, heap in self.combination_examples.items()
+            },
+            "company_kpi_counts": self.company_kpi_counts,
+            "company_factor_counts": self.company_factor_counts,
+            "company_relation_counts": self.company_relation_counts,
+            "raw_name_counts": self.raw_name_counts
+        }
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path, store, normalizer=None):
+        """
+        저장된 상태 로드
+
+        Returns:
+            AggregateState 또는 None (파일이 없거나 버전/정규화 규칙/예시 설정이 다르거나,
+            저장소의 문서 목록이 상태와 다르면 전체 재집계)
+        """
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return None
+        state = cls(store, normalizer)
+        if (data.get("version") != STATE_VERSION
+                or data.get("normalization") != state._normalization_fingerprint()
+                or data.get("example_settings") != [AGGREGATE_MAX_EXAMPLES, AGGREGATE_EXAMPLE_EVIDENCE_CHARS]
+                or data.get("documents") != store.document_signatures()):
+            return None
+
+        state.documents = data["documents"]
+        state.kpi_counts = Counter(data["kpi_counts"])
+        state.factor_counts = Counter(data["factor_counts"])
+        state.combination_counts = data["combination_counts"]
+        state.combination_examples = {
+            key: _examples_heap(examples) for key, examples in data["combination_examples"].items()
+        }
+        state.company_kpi_counts = defaultdict(Counter, {
+            company: Counter(counts) for company, counts in data["company_kpi_counts"].items()
+        })
+        state.company_factor_counts = defaultdict(Counter, {
+            company: Counter(counts) for company, counts in data["company_factor_counts"].items()
+        })
+        state.company_relation_counts = Counter(data["company_relation_counts"])
+        state.raw_name_counts = {key: Counter(counts) for key, counts in data["raw_name_counts"].items()}
+        return state
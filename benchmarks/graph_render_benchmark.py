@@ -0,0 +1,158 @@
+"""
+Step 09 그래프 시각화 벤치마크
+
+엣지 수별 합성 그래프로 Plotly Figure 생성 시간과 HTML 크기를 측정합니다.
+  - combined: 09_create_graph_visualization.build_figure (엣지 종류별 trace 1개,
+    GRAPH_WEBGL_EDGE_THRESHOLD 이상이면 Scattergl)
+  - per_edge: 엣지마다 go.Scatter 1개를 만들던 이전 방식 (--per-edge-max 이하 규모에서만 측정)
+
+레이아웃 계산은 측정에서 제외하기 위해 노드 위치는 난수로 정합니다.
+
+사용 예:
+    python benchmarks/graph_render_benchmark.py --edges 1000 10000 100000
+    python benchmarks/graph_render_benchmark.py --edges 1000 --per-edge-max 1000 --output graph_bench.json
+"""
+
+import argparse
+import importlib
+import json
+import math
+import random
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import networkx as nx  # noqa: E402
+import plotly.graph_objects as go  # noqa: E402
+from config import GRAPH_WEBGL_EDGE_THRESHOLD  # noqa: E402
+
+graph_step = importlib.import_module("09_create_graph_visualization")
+
+RELATIONS = ("positive", "negative", "neutral")
+
+
+def make_graph(num_edges, num_companies=2, seed=42):
+    """
+    합성 KPI-Factor 그래프 (Factor -> KPI 영향 엣지 num_edges개 + 회사 연결 엣지)
+
+    Returns:
+        tuple: (G, pos)
+    """
+    rng = random.Random(seed)
+    side = math.ceil(math.sqrt(num_edges * 1.2))
+    kpis = [f"KPI_k{i}" for i in range(side)]
+    factors = [f"Factor_f{i}" for i in range(side)]
+    companies = [f"company{i}" for i in range(num_companies)]
+
+    G = nx.DiGraph()
+    for company in companies:
+        G.add_node(company, node_type='company', label=company)
+    for kpi in kpis:
+        G.add_node(kpi, node_type='kpi', label=kpi[4:], name=kpi[4:])
+    for factor in factors:
+        G.add_node(factor, node_type='factor', label=factor[7:], name=factor[7:])
+
+    for index in rng.sample(range(side * side), num_edges):
+        factor, kpi = factors[index // side], kpis[index % side]
+        G.add_edge(factor, kpi, edge_type='influences', relation=rng.choice(RELATIONS), weight=1)
+        company = rng.choice(companies)
+        G.add_edge(company, kpi, edge_type='has_kpi', weight=1)
+        G.add_edge(company, factor, edge_type='has_factor', weight=1)
+
+    pos = {node: (rng.random() * 2 - 1, rng.random() * 2 - 1) for node in G.nodes}
+    return G, pos
+
+
+def build_figure_per_edge(G, pos):
+    """이전 방식: 엣지마다 trace 1개"""
+    fig = go.Figure()
+    for source, target, data in G.edges(data=True):
+        x0, y0 = pos[source]
+        x1, y1 = pos[target]
+        style = graph_step.EDGE_STYLES[graph_step.edge_class(data)]
+        fig.add_trace(go.Scatter(
+            x=[x0, x1, None],
+            y=[y0, y1, None],
+            mode='lines',
+            line=style,
+            hoverinfo='none',
+            showlegend=False,
+            opacity=0.5
+        ))
+    for trace in graph_step.build_node_traces(G, pos):
+        fig.add_trace(trace)
+    return fig
+
+
+def measure(build, G, pos):
+    """Figure 생성 시간, HTML 직렬화 시간, HTML 크기"""
+    start = time.perf_counter()
+    fig = build(G, pos)
+    build_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    html = fig.to_html(include_plotlyjs=False)
+    html_seconds = time.perf_counter() - start
+
+    return {
+        "traces": len(fig.data),
+        "build_seconds": round(build_seconds, 3),
+        "to_html_seconds": round(html_seconds, 3),
+        "html_mb": round(len(html.encode('utf-8')) / 1024 / 1024, 3)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Step 09 그래프 시각화 벤치마크")
+    parser.add_argument("--edges", type=int, nargs="+", default=[1000, 10000, 100000],
+                        help="Factor -> KPI 엣지 수 (여러 개 지정 시 규모별로 반복 실행)")
+    parser.add_argument("--per-edge-max", type=int, default=10000,
+                        help="이전 방식(엣지마다 trace)을 측정할 최대 엣지 수")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default="graph_render_benchmark.json", help="결과 JSON 경로")
+    args = parser.parse_args()
+
+    print("=" * 80)
+    print("Graph Render Benchmark (Step 09)")
+    print("=" * 80)
+    print(f"WebGL 전환 기준: 엣지 {GRAPH_WEBGL_EDGE_THRESHOLD:,}개 이상 (GRAPH_WEBGL_EDGE_THRESHOLD)")
+
+    runs = []
+    for num_edges in args.edges:
+        G, pos = make_graph(num_edges, seed=args.seed)
+        run = {
+            "influence_edges": num_edges,
+            "nodes": G.number_of_nodes(),
+            "edges": G.number_of_edges(),
+            "combined": measure(graph_step.build_figure, G, pos),
+            "per_edge": measure(build_figure_per_edge, G, pos) if G.number_of_edges() <= args.per_edge_max else None
+        }
+        runs.append(run)
+
+        print(f"\n[엣지 {G.number_of_edges():,}개, 노드 {G.number_of_nodes():,}개]")
+        for method in ("combined", "per_edge"):
+            result = run[method]
+            if result is None:
+                print(f"  {method:<10} 생략 (--per-edge-max {args.per_edge_max:,})")
+                continue
+            print(f"  {method:<10} trace {result['traces']:>7,}개  build {result['build_seconds']:>8.3f}s  "
+                  f"to_html {result['to_html_seconds']:>8.3f}s  HTML {result['html_mb']:>8.2f} MB")
+
+    report = {
+        "created_at": datetime.now().isoformat(),
+        "python": sys.version.split()[0],
+        "platform": sys.platform,
+        "webgl_edge_threshold": GRAPH_WEBGL_EDGE_THRESHOLD,
+        "runs": runs
+    }
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+
+    print(f"\n[저장 위치]\n  {args.output}")
+
+
+if __name__ == "__main__":
+    main()
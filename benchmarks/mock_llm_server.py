@@ -0,0 +1,245 @@
+"""
+오프라인 부하 테스트용 로컬 LLM mock 서버
+
+llm_backends.MockHTTPBackend가 호출하는 POST /generate 를 제공합니다.
+프롬프트의 문서 텍스트에서 KPI/Factor가 함께 등장한 문장으로 합성 관계를 만들어
+Gemini와 같은 형식(```json 코드 블록)의 응답을 돌려주며, 배치 프롬프트(문서 ID별 결과)도 지원합니다.
+
+Gemini CachedContent처럼 POST /cache 로 고정 prefix를 등록하고 generate 요청에서
+"cached_content" 이름으로 참조할 수 있으며, 이때 usage에 캐시에서 읽은 토큰 수를 함께 돌려줍니다.
+
+지연 시간, 에러(500) 비율, 429 비율, 잘린 응답 비율, 서버 측 RPM 한도를 설정할 수 있어
+네트워크 없이 Step 07의 스케줄러/재시도/캐시 동작을 시험할 수 있습니다.
+
+사용 예:
+    python benchmarks/mock_llm_server.py --port 8765 --latency 0.5 --rate-limit-rate 0.05
+    LLM_BACKEND=mock LLM_MOCK_URL=http://127.0.0.1:8765 python 07_extract_kpi_factors.py
+"""
+
+import argparse
+import json
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from token_counter import count_tokens  # noqa: E402
+from synthetic_corpus import synthesize_relations  # noqa: E402
+
+BATCH_DOCUMENT_PATTERN = re.compile(r"=== 문서 (\S+) ===\n(.*?)\n=== 문서 끝 \1 ===", re.DOTALL)
+SINGLE_TEXT_PATTERN = re.compile(r"\n내용:\n(.*?)(?:\n\n# |\Z)", re.DOTALL)
+
+
+def build_response(prompt, rng):
+    """프롬프트에 맞는 합성 추출 결과 (JSON dict)"""
+    batch_documents = BATCH_DOCUMENT_PATTERN.findall(prompt)
+    if batch_documents:
+        return {
+            "documents": {
+                doc_id: {"kpi_factor_relations": synthesize_relations(body, rng), "key_insights": []}
+                for doc_id, body in batch_documents
+            }
+        }
+
+    match = SINGLE_TEXT_PATTERN.search(prompt)
+    text = match.group(1) if match else prompt
+    return {"kpi_factor_relations": synthesize_relations(text, rng), "key_insights": []}
+
+
+class MockLLMState:
+    """서버 설정과 요청 통계 (핸들러 스레드 간 공유)"""
+
+    def __init__(self, latency=0.2, jitter=0.1, error_rate=0.0, rate_limit_rate=0.0,
+                 retry_delay=1, rpm_limit=0, canned_response=None, truncate_rate=0.0, seed=42):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.retry_delay = retry_delay
+        self.rpm_limit = rpm_limit
+        self.canned_response = canned_response
+        self.truncate_rate = truncate_rate
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.request_times = deque()
+        self.context_caches = {}  # name -> (content, token 수)
+        self.stats = {"requests": 0, "ok": 0, "errors": 0, "rate_limited": 0, "truncated": 0,
+                      "context_caches": 0, "context_cache_hits": 0}
+
+    def decide(self):
+        """요청 1개의 결과 결정: ("ok" | "error" | "rate_limited", 지연 시간)"""
+        with self.lock:
+            now = time.monotonic()
+            self.stats["requests"] += 1
+            while self.request_times and self.request_times[0] < now - 60:
+                self.request_times.popleft()
+
+            delay = max(0.0, self.latency + self.rng.uniform(-self.jitter, self.jitter))
+            if self.rpm_limit and len(self.request_times) >= self.rpm_limit:
+                outcome = "rate_limited"
+            elif self.rng.random() < self.rate_limit_rate:
+                outcome = "rate_limited"
+            elif self.rng.random() < self.error_rate:
+                outcome = "error"
+            else:
+                outcome = "ok"
+                self.request_times.append(now)
+            self.stats[outcome if outcome != "error" else "errors"] += 1
+            return outcome, delay
+
+
+def make_handler(state):
+    class MockLLMHandler(BaseHTTPRequestHandler):
+        def _send_json(self, status, data, headers=None):
+            body = json.dumps(data, ensure_ascii=False).encode('utf-8')
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            for key, value in (headers or {}).items():
+                self.send_header(key, value)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if self.path == "/stats":
+                self._send_json(200, state.stats)
+            else:
+                self._send_json(404, {"error": "not found"})
+
+        def _read_json(self):
+            length = int(self.headers.get("Content-Length", 0))
+            return json.loads(self.rfile.read(length).decode('utf-8')) if length else {}
+
+        def do_DELETE(self):
+            name = self.path[len("/cache/"):] if self.path.startswith("/cache/") else None
+            with state.lock:
+                found = state.context_caches.pop(name, None) is not None
+            self._send_json(200 if found else 404, {"deleted": found})
+
+        def do_POST(self):
+            if self.path == "/cache":
+                payload = self._read_json()
+                content = payload.get("content", "")
+                name = f"cachedContents/{uuid.uuid4().hex[:12]}"
+                token_count = count_tokens(content)
+                with state.lock:
+                    state.context_caches[name] = (content, token_count)
+                    state.stats["context_caches"] += 1
+                self._send_json(200, {"name": name, "token_count": token_count})
+                return
+            if self.path != "/generate":
+                self._send_json(404, {"error": "not found"})
+                return
+
+            payload = self._read_json()
+            prompt = payload.get("prompt", "")
+            cached_tokens = 0
+            if payload.get("cached_content"):
+                with state.lock:
+                    cached = state.context_caches.get(payload["cached_content"])
+                    if cached is not None:
+                        state.stats["context_cache_hits"] += 1
+                if cached is None:
+                    self._send_json(404, {"error": f"cached content not found: {payload['cached_content']}"})
+                    return
+                prefix, cached_tokens = cached
+                prompt = prefix + prompt
+
+            outcome, delay = state.decide()
+            if outcome == "rate_limited":
+                self._send_json(429, {"error": "Resource has been exhausted (e.g. check quota)."},
+                                {"Retry-After": str(state.retry_delay)})
+                return
+
+            time.sleep(delay)
+            if outcome == "error":
+                self._send_json(500, {"error": "internal error (mock)"})
+                return
+
+            with state.lock:
+                if state.canned_response is not None:
+                    result = state.canned_response
+                else:
+                    result = build_response(prompt, state.rng)
+                truncate = state.rng.random() < state.truncate_rate
+            text = "```json\n" + json.dumps(result, ensure_ascii=False, indent=2) + "\n```"
+            if truncate:
+                # 출력 토큰 한도에 걸린 것처럼 응답 후반부에서 자름
+                with state.lock:
+                    state.stats["truncated"] += 1
+                    text = text[:state.rng.randint(len(text) // 2, len(text) - 1)]
+            self._send_json(200, {
+                "text": text,
+                "usage": {
+                    "prompt_token_count": count_tokens(prompt),
+                    "candidates_token_count": count_tokens(text),
+                    "cached_content_token_count": cached_tokens
+                }
+            })
+
+        def log_message(self, format, *args):
+            pass
+
+    return MockLLMHandler
+
+
+def start_mock_server(host="127.0.0.1", port=8765, **options):
+    """
+    백그라운드 스레드에서 mock 서버 시작
+
+    Returns:
+        tuple: (server, state) — server.shutdown()으로 종료
+    """
+    state = MockLLMState(**options)
+    server = ThreadingHTTPServer((host, port), make_handler(state))
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server, state
+
+
+def main():
+    parser = argparse.ArgumentParser(description="오프라인 부하 테스트용 LLM mock 서버")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.2, help="평균 응답 지연 (초)")
+    parser.add_argument("--jitter", type=float, default=0.1, help="지연 변동 폭 (초)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="500 에러 비율")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="429 응답 비율")
+    parser.add_argument("--retry-delay", type=int, default=1, help="429 응답의 Retry-After (초)")
+    parser.add_argument("--truncate-rate", type=float, default=0.0, help="잘린 응답 비율")
+    parser.add_argument("--rpm", type=int, default=0, help="서버 측 분당 요청 한도 (0: 제한 없음)")
+    parser.add_argument("--response-file", default=None, help="모든 요청에 돌려줄 고정 JSON 파일")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    canned_response = None
+    if args.response_file:
+        with open(args.response_file, 'r', encoding='utf-8') as f:
+            canned_response = json.load(f)
+
+    server, state = start_mock_server(
+        args.host, args.port,
+        latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate, retry_delay=args.retry_delay,
+        rpm_limit=args.rpm, canned_response=canned_response, truncate_rate=args.truncate_rate,
+        seed=args.seed
+    )
+    print(f"Mock LLM 서버: http://{args.host}:{args.port} (Ctrl+C로 종료)")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        server.shutdown()
+        print(f"요청 통계: {state.stats}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,263 @@
+"""
+파이프라인 end-to-end 벤치마크
+
+합성 코퍼스를 생성한 뒤 Step 04~09를 오프라인으로 실행하고,
+단계별 소요 시간, 처리량(docs/sec), 최대 메모리(peak RSS), 기록된 바이트 수를 측정합니다.
+각 단계는 별도 프로세스로 실행되므로 peak RSS는 단계마다 독립적으로 측정됩니다.
+
+Step 07은 로컬 mock LLM 서버(mock_llm_server.py)를 백엔드로 실제 스크립트를 실행합니다.
+(--step07 synthetic 지정 시 synthetic_corpus.py의 합성 출력으로 대체)
+
+사용 예:
+    python benchmarks/run_pipeline_benchmark.py --docs 10 100 1000
+    python benchmarks/run_pipeline_benchmark.py --docs 10000 --keep
+    python benchmarks/run_pipeline_benchmark.py --docs 100 --mock-latency 1.0 --mock-rate-limit-rate 0.05
+"""
+
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+REPO_DIR = Path(__file__).resolve().parent.parent
+BENCH_DIR = Path(__file__).resolve().parent
+
+sys.path.insert(0, str(REPO_DIR))
+
+import config  # noqa: E402
+from synthetic_corpus import generate_corpus  # noqa: E402
+from mock_llm_server import start_mock_server  # noqa: E402
+
+# Step 07 실행 방식별 명령
+STEP07_COMMANDS = {
+    "mock": ("07_extract_kpi_factors (mock LLM)", [str(REPO_DIR / "07_extract_kpi_factors.py")]),
+    "synthetic": ("07_extract_kpi_factors (synthetic)", [str(BENCH_DIR / "synthetic_corpus.py"), "step07"]),
+}
+
+
+def build_stages(step07="mock"):
+    """(단계 이름, 실행 명령) 리스트 — 모두 작업 디렉토리를 cwd로 실행"""
+    return [
+        ("04_extract_text", [str(REPO_DIR / "04_extract_text.py")]),
+        ("05_filter_tv_reports", [str(REPO_DIR / "05_filter_tv_reports.py")]),
+        ("06_extract_tv_content", [str(REPO_DIR / "06_extract_tv_content.py")]),
+        STEP07_COMMANDS[step07],
+        ("08_aggregate_kpi_factors", [str(REPO_DIR / "08_aggregate_kpi_factors.py")]),
+        ("09_create_graph_visualization", [str(REPO_DIR / "09_create_graph_visualization.py")]),
+    ]
+
+
+def dir_size(path):
+    """디렉토리 전체 파일 크기 (bytes)"""
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+    return total
+
+
+def _load_json(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def count_stage_documents(stage, workdir, corpus):
+    """
+    단계별 입력 문서 수 (처리량 계산용, 단계 실행 전 이전 단계 결과로 계산)
+
+    06은 Consensus 리포트만 처리하고 (DART는 05의 relevant_paragraphs를 그대로 사용),
+    07은 06의 Consensus 문서와 LLM_INCLUDE_DART이면 TV 문단이 있는 DART 보고서를 함께 처리합니다.
+    """
+    data = os.path.join(workdir, config.DATA_DIR)
+    try:
+        if stage.startswith("04") or stage.startswith("05"):
+            return corpus["consensus"] + corpus["dart"]
+        if stage.startswith("06"):
+            filtered = _load_json(os.path.join(workdir, config.FILTERED_DIR, "filtered_index.json"))
+            return len(filtered["filtered_reports"]["consensus"])
+        if stage.startswith("07"):
+            index = _load_json(os.path.join(workdir, config.TV_CONTENT_DIR, "tv_content_index.json"))
+            documents = len(index["documents"])
+            if config.LLM_INCLUDE_DART:
+                filtered = _load_json(os.path.join(workdir, config.FILTERED_DIR, "filtered_index.json"))
+                # 07_extract_kpi_factors.load_dart_documents와 같은 기준 (텍스트 있는 문단이 없으면 제외)
+                documents += sum(
+                    1 for report in filtered["filtered_reports"].get("dart", [])
+                    if any(p.get("text") for p in report.get("relevant_paragraphs", []))
+                )
+            return documents
+        index = _load_json(os.path.join(workdir, config.PROCESSED_DIR, "kpi_factors_index.json"))
+        return len(index["results"])
+    except (OSError, KeyError, json.JSONDecodeError):
+        return 0 if not os.path.exists(data) else None
+
+
+def run_stage(name, command, workdir, log_file, env=None):
+    """
+    단계 1개를 하위 프로세스로 실행하고 자원 사용량 측정
+
+    Returns:
+        dict: {"stage", "returncode", "elapsed_seconds", "peak_rss_mb", "bytes_written"}
+    """
+    data_dir = os.path.join(workdir, config.DATA_DIR)
+    size_before = dir_size(data_dir)
+
+    log_file.write(f"\n{'=' * 80}\n{name}\n{'=' * 80}\n")
+    log_file.flush()
+
+    start = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable] + command,
+        cwd=workdir,
+        stdout=log_file,
+        stderr=subprocess.STDOUT,
+        env={**os.environ, "PYTHONIOENCODING": "utf-8", **(env or {})}
+    )
+
+    peak_rss_mb = None
+    if hasattr(os, "wait4"):
+        _, status, rusage = os.wait4(proc.pid, 0)
+        returncode = os.waitstatus_to_exitcode(status)
+        proc.returncode = returncode
+        # Linux: KB 단위, macOS: bytes 단위
+        divisor = 1024 * 1024 if sys.platform == "darwin" else 1024
+        peak_rss_mb = round(rusage.ru_maxrss / divisor, 1)
+    else:
+        # Windows 등 wait4 미지원 환경에서는 메모리 측정 생략
+        returncode = proc.wait()
+
+    elapsed = time.perf_counter() - start
+
+    return {
+        "stage": name,
+        "returncode": returncode,
+        "elapsed_seconds": round(elapsed, 3),
+        "peak_rss_mb": peak_rss_mb,
+        "bytes_written": dir_size(data_dir) - size_before
+    }
+
+
+def run_benchmark(num_docs, workdir, dart_ratio=0.1, paragraphs=12, seed=42, stages=None, env=None):
+    """합성 코퍼스 1세트 생성 후 전체 단계 실행"""
+    print(f"\n[{num_docs:,}개 문서] 작업 디렉토리: {workdir}")
+
+    gen_start = time.perf_counter()
+    corpus = generate_corpus(workdir, num_docs, dart_ratio, paragraphs, seed)
+    gen_elapsed = time.perf_counter() - gen_start
+    print(f"  코퍼스 생성: Consensus {corpus['consensus']}개, DART {corpus['dart']}개, "
+          f"{corpus['bytes'] / 1024 / 1024:.1f} MB ({gen_elapsed:.1f}s)")
+
+    results = []
+    with open(os.path.join(workdir, "benchmark.log"), 'w', encoding='utf-8') as log_file:
+        for name, command in stages or build_stages():
+            docs = count_stage_documents(name, workdir, corpus)
+            result = run_stage(name, command, workdir, log_file, env)
+            result["documents"] = docs
+            result["docs_per_sec"] = (
+                round(docs / result["elapsed_seconds"], 2)
+                if docs and result["elapsed_seconds"] > 0 else None
+            )
+            results.append(result)
+
+            status = "OK" if result["returncode"] == 0 else f"FAIL({result['returncode']})"
+            print(f"  {name:<40} {status:<8} {result['elapsed_seconds']:>8.2f}s "
+                  f"{result['docs_per_sec'] or 0:>9.1f} docs/s "
+                  f"{result['peak_rss_mb'] or 0:>8.1f} MB "
+                  f"{result['bytes_written'] / 1024 / 1024:>8.2f} MB written")
+
+            if result["returncode"] != 0:
+                print(f"  [ERROR] {name} 실패, 이후 단계 생략 (로그: {workdir}/benchmark.log)")
+                break
+
+    return {
+        "documents": num_docs,
+        "corpus": corpus,
+        "corpus_generation_seconds": round(gen_elapsed, 3),
+        "stages": results,
+        "total_elapsed_seconds": round(sum(s["elapsed_seconds"] for s in results), 3)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="합성 코퍼스 기반 파이프라인 벤치마크 (Step 04~09)")
+    parser.add_argument("--docs", type=int, nargs="+", default=[10, 100],
+                        help="문서 수 (여러 개 지정 시 규모별로 반복 실행)")
+    parser.add_argument("--dart-ratio", type=float, default=0.1, help="DART 문서 비율")
+    parser.add_argument("--paragraphs", type=int, default=12, help="문서당 문단 수")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--workdir", default=None, help="작업 디렉토리 (기본: 임시 디렉토리)")
+    parser.add_argument("--keep", action="store_true", help="작업 디렉토리 유지")
+    parser.add_argument("--output", default="benchmark_report.json", help="결과 JSON 경로")
+    parser.add_argument("--step07", choices=sorted(STEP07_COMMANDS), default="mock",
+                        help="Step 07 실행 방식 (mock: mock LLM 서버로 실제 스크립트 실행)")
+    parser.add_argument("--mock-port", type=int, default=8765)
+    parser.add_argument("--mock-latency", type=float, default=0.2, help="mock 응답 평균 지연 (초)")
+    parser.add_argument("--mock-error-rate", type=float, default=0.0, help="mock 500 에러 비율")
+    parser.add_argument("--mock-rate-limit-rate", type=float, default=0.0, help="mock 429 응답 비율")
+    parser.add_argument("--llm-rpm", type=int, default=6000, help="Step 07 RPM 한도 (LLM_RPM_LIMIT)")
+    args = parser.parse_args()
+
+    print("=" * 80)
+    print("Pipeline Benchmark (Step 04~09, offline)")
+    print("=" * 80)
+
+    stages = build_stages(args.step07)
+    env = {}
+    mock_server = mock_state = None
+    if args.step07 == "mock":
+        mock_server, mock_state = start_mock_server(
+            port=args.mock_port, latency=args.mock_latency, error_rate=args.mock_error_rate,
+            rate_limit_rate=args.mock_rate_limit_rate, seed=args.seed
+        )
+        env = {
+            "LLM_BACKEND": "mock",
+            "LLM_MOCK_URL": f"http://127.0.0.1:{args.mock_port}",
+            "LLM_RPM_LIMIT": str(args.llm_rpm)
+        }
+        print(f"Mock LLM 서버: {env['LLM_MOCK_URL']} (지연 {args.mock_latency}s, "
+              f"에러 {args.mock_error_rate:.0%}, 429 {args.mock_rate_limit_rate:.0%})")
+
+    runs = []
+    for num_docs in args.docs:
+        if args.workdir:
+            workdir = os.path.join(args.workdir, f"docs_{num_docs}")
+            shutil.rmtree(workdir, ignore_errors=True)
+            os.makedirs(workdir)
+        else:
+            workdir = tempfile.mkdtemp(prefix=f"pwc_bench_{num_docs}_")
+
+        try:
+            runs.append(run_benchmark(num_docs, workdir, args.dart_ratio, args.paragraphs, args.seed,
+                                      stages, env))
+        finally:
+            if not args.keep:
+                shutil.rmtree(workdir, ignore_errors=True)
+
+    if mock_server:
+        mock_server.shutdown()
+
+    report = {
+        "created_at": datetime.now().isoformat(),
+        "python": sys.version.split()[0],
+        "platform": sys.platform,
+        "step07": args.step07,
+        "mock_llm": dict(mock_state.stats) if mock_state else None,
+        "runs": runs
+    }
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+
+    print(f"\n[저장 위치]\n  {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,421 @@
+"""
+벤치마크용 합성 코퍼스 생성기
+
+실제 크롤링 없이 파이프라인 성능을 측정할 수 있도록 다음을 생성합니다.
+  - 한경 컨센서스 형식의 PDF (data/raw/consensus/*.pdf)
+  - DART 원문 공시 형식의 ZIP/XML (data/raw/dart/*.zip, SUMMARY/EXTRACTION 및 SECTION 구조)
+  - Step 1/2 크롤러와 같은 형식의 메타데이터 JSON (data/raw/*.json)
+
+PDF는 외부 라이브러리 없이 직접 작성합니다. 한글 텍스트는 Identity-H 인코딩의
+Type0 폰트와 ToUnicode CMap으로 기록하므로 pdfplumber로 그대로 추출됩니다.
+
+Step 07(LLM 추출)을 오프라인으로 대신할 수 있도록, TV 문단에 등장한 KPI/Factor로
+합성 관계를 만들어 07 단계와 같은 형식의 출력을 쓰는 기능도 제공합니다.
+
+사용 예:
+    python benchmarks/synthetic_corpus.py generate --docs 100 --workdir bench_run
+    cd bench_run && python ../benchmarks/synthetic_corpus.py step07
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import zipfile
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import config  # noqa: E402
+
+# 문단 템플릿 (TV 관련 / KPI-Factor 관계 / 비관련 / 반복 면책 문구)
+TV_TEMPLATES = [
+    "{company}의 {tv} 부문은 {factor} 영향으로 {kpi}이(가) {direction}할 전망이다.",
+    "{tv} 수요 둔화에도 {factor} 효과로 {kpi} 개선이 기대된다. {quarter} {kpi}은(는) 전년 대비 {pct}% {direction}.",
+    "{quarter} {tv} 출하량은 전분기 대비 {pct}% {direction}했으며, {factor} 부담이 {kpi}에 반영되었다.",
+    "프리미엄 {tv} 비중 확대로 {kpi}이(가) {direction}했고, {factor} 변화는 하반기 {kpi}의 변수이다.",
+]
+OTHER_TEMPLATES = [
+    "반도체 부문은 HBM 수요 증가로 {quarter} 영업이익이 {pct}% {direction}했다.",
+    "가전 부문은 에어컨 성수기 효과로 매출이 {direction}했다.",
+    "전장 부품 수주잔고는 {pct}조원 수준을 유지하고 있다.",
+    "목표주가를 유지하며 투자의견 매수를 제시한다.",
+]
+DISCLAIMER = (
+    "본 조사분석자료는 당사의 리서치센터가 신뢰할 수 있는 자료 및 정보로부터 얻은 것이나, "
+    "당사는 그 정확성이나 완전성을 보장할 수 없습니다. 따라서 어떠한 경우에도 본 자료는 고객의 "
+    "투자 결과에 대한 법적 책임소재의 증빙자료로 사용될 수 없습니다. TV 및 디스플레이 관련 수치는 추정치입니다."
+)
+DIRECTIONS = ["증가", "감소", "개선", "악화", "유지"]
+QUARTERS = ["1Q", "2Q", "3Q", "4Q"]
+
+# PDF 페이지 설정 (A4, pt)
+PAGE_WIDTH = 595
+PAGE_HEIGHT = 842
+FONT_SIZE = 9
+LINE_HEIGHT = 13
+CHARS_PER_LINE = 55
+
+
+def _fill(template, rng, company):
+    return template.format(
+        company=company,
+        tv=rng.choice(config.TV_KEYWORDS),
+        kpi=rng.choice(config.KPI_LIST),
+        factor=rng.choice(config.FACTOR_LIST),
+        direction=rng.choice(DIRECTIONS),
+        quarter=rng.choice(QUARTERS),
+        pct=rng.randint(1, 40)
+    )
+
+
+def generate_paragraphs(rng, company, count):
+    """리포트 문단 생성 (TV 관련 문단 약 50%, 마지막은 면책 문구)"""
+    paragraphs = []
+    for _ in range(count - 1):
+        if rng.random() < 0.5:
+            sentences = [_fill(rng.choice(TV_TEMPLATES), rng, company) for _ in range(rng.randint(1, 3))]
+        else:
+            sentences = [_fill(rng.choice(OTHER_TEMPLATES), rng, company) for _ in range(rng.randint(1, 2))]
+        paragraphs.append(" ".join(sentences))
+    paragraphs.append(DISCLAIMER)
+    return paragraphs
+
+
+# ---------------------------------------------------------------------------
+# PDF
+# ---------------------------------------------------------------------------
+
+def _wrap(text, width):
+    return [text[i:i + width] for i in range(0, len(text), width)] or [""]
+
+
+def _hex_cids(text):
+    """Identity-H: 문자 코드 포인트를 2바이트 CID로 그대로 사용"""
+    return "".join(f"{ord(ch):04X}" for ch in text if ord(ch) <= 0xFFFF)
+
+
+def _to_unicode_cmap(chars):
+    """사용된 문자만 매핑하는 ToUnicode CMap"""
+    codes = sorted({ord(ch) for ch in chars if ord(ch) <= 0xFFFF})
+    blocks = []
+    for i in range(0, len(codes), 100):
+        chunk = codes[i:i + 100]
+        entries = "\n".join(f"<{c:04X}> <{c:04X}>" for c in chunk)
+        blocks.append(f"{len(chunk)} beginbfchar\n{entries}\nendbfchar")
+    return (
+        "/CIDInit /ProcSet findresource begin\n12 dict begin\nbegincmap\n"
+        "/CIDSystemInfo << /Registry (Adobe) /Ordering (UCS) /Supplement 0 >> def\n"
+        "/CMapName /Adobe-Identity-UCS def\n/CMapType 2 def\n"
+        "1 begincodespacerange\n<0000> <FFFF>\nendcodespacerange\n"
+        + "\n".join(blocks)
+        + "\nendcmap\nCMapName currentdict /CMap defineresource pop\nend\nend"
+    )
+
+
+def write_pdf(path, pages):
+    """
+    문단 리스트를 페이지별로 기록한 PDF 작성
+
+    Args:
+        path: 출력 경로
+        pages: 페이지별 텍스트 리스트 (페이지 1개 = 문단 1개, 04 단계에서 "\\n\\n"으로 합쳐짐)
+    """
+    objects = {}
+    page_ids = []
+    font_id, cid_font_id, descriptor_id, cmap_id = 3, 4, 5, 6
+    next_id = 7
+
+    for text in pages:
+        lines = _wrap(text, CHARS_PER_LINE)
+        ops = [f"BT /F1 {FONT_SIZE} Tf {LINE_HEIGHT} TL 50 {PAGE_HEIGHT - 60} Td"]
+        for line in lines:
+            ops.append(f"<{_hex_cids(line)}> Tj T*")
+        ops.append("ET")
+        content = "\n".join(ops).encode("latin-1")
+
+        content_id, page_id = next_id, next_id + 1
+        next_id += 2
+        objects[content_id] = b"<< /Length %d >>\nstream\n" % len(content) + content + b"\nendstream"
+        objects[page_id] = (
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {PAGE_WIDTH} {PAGE_HEIGHT}] "
+            f"/Resources << /Font << /F1 {font_id} 0 R >> >> /Contents {content_id} 0 R >>"
+        ).encode("latin-1")
+        page_ids.append(page_id)
+
+    cmap = _to_unicode_cmap("".join(pages)).encode("latin-1")
+    objects[1] = b"<< /Type /Catalog /Pages 2 0 R >>"
+    objects[2] = (
+        f"<< /Type /Pages /Kids [{' '.join(f'{p} 0 R' for p in page_ids)}] /Count {len(page_ids)} >>"
+    ).encode("latin-1")
+    objects[font_id] = (
+        f"<< /Type /Font /Subtype /Type0 /BaseFont /SyntheticGothic /Encoding /Identity-H "
+        f"/DescendantFonts [{cid_font_id} 0 R] /ToUnicode {cmap_id} 0 R >>"
+    ).encode("latin-1")
+    objects[cid_font_id] = (
+        f"<< /Type /Font /Subtype /CIDFontType2 /BaseFont /SyntheticGothic "
+        f"/CIDSystemInfo << /Registry (Adobe) /Ordering (Identity) /Supplement 0 >> "
+        f"/FontDescriptor {descriptor_id} 0 R /DW 1000 >>"
+    ).encode("latin-1")
+    objects[descriptor_id] = (
+        b"<< /Type /FontDescriptor /FontName /SyntheticGothic /Flags 4 /FontBBox [0 -200 1000 900] "
+        b"/ItalicAngle 0 /Ascent 900 /Descent -200 /CapHeight 700 /StemV 80 >>"
+    )
+    objects[cmap_id] = b"<< /Length %d >>\nstream\n" % len(cmap) + cmap + b"\nendstream"
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = {}
+    for obj_id in sorted(objects):
+        offsets[obj_id] = len(out)
+        out += b"%d 0 obj\n" % obj_id + objects[obj_id] + b"\nendobj\n"
+
+    xref_offset = len(out)
+    max_id = max(objects)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (max_id + 1)
+    for obj_id in range(1, max_id + 1):
+        out += b"%010d 00000 n \n" % offsets.get(obj_id, 0)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (max_id + 1, xref_offset)
+
+    with open(path, 'wb') as f:
+        f.write(out)
+
+
+# ---------------------------------------------------------------------------
+# DART ZIP/XML
+# ---------------------------------------------------------------------------
+
+def _xml_escape(text):
+    return text.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+
+
+def build_dart_xml(company, report_type, rcept_no, paragraphs, rng):
+    """DART 원문 공시 형식 XML (DOCUMENT-NAME, COMPANY-NAME, SUMMARY/EXTRACTION, SECTION)"""
+    summary = "\n".join(
+        f'<EXTRACTION ACODE="{acode}">{value}</EXTRACTION>'
+        for acode, value in [
+            ("FSC", rng.randint(100000, 3000000)),
+            ("CORP_NAME", company),
+            ("RCEPT_NO", rcept_no),
+            ("REPORT_TYPE", report_type)
+        ]
+    )
+    sections = []
+    for sec_idx in range(0, len(paragraphs), 5):
+        body = "\n".join(f"<P>{_xml_escape(p)}</P>" for p in paragraphs[sec_idx:sec_idx + 5])
+        sections.append(
+            f"<SECTION-1><TITLE>{sec_idx // 5 + 1}. 사업의 내용</TITLE>\n{body}\n</SECTION-1>"
+        )
+    return (
+        '<?xml version="1.0" encoding="utf-8"?>\n<DOCUMENT>\n'
+        f'<DOCUMENT-NAME ACODE="11011">{report_type}</DOCUMENT-NAME>\n'
+        f'<COMPANY-NAME AREGCIK="{rng.randint(10000000, 99999999)}">{company}</COMPANY-NAME>\n'
+        f"<SUMMARY>\n{summary}\n</SUMMARY>\n<BODY>\n" + "\n".join(sections) + "\n</BODY>\n</DOCUMENT>\n"
+    )
+
+
+def write_dart_zip(path, company, report_type, rcept_no, paragraphs, rng):
+    """본문 XML + 감사보고서 XML(_00760)을 담은 ZIP 작성"""
+    main_xml = build_dart_xml(company, report_type, rcept_no, paragraphs, rng)
+    audit_xml = build_dart_xml(company, "감사보고서", rcept_no, [DISCLAIMER], rng)
+    with zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED) as z:
+        z.writestr(f"{rcept_no}.xml", main_xml)
+        z.writestr(f"{rcept_no}_00760.xml", audit_xml)
+
+
+# ---------------------------------------------------------------------------
+# Corpus
+# ---------------------------------------------------------------------------
+
+def generate_corpus(workdir, num_docs, dart_ratio=0.1, paragraphs_per_doc=12, seed=42):
+    """
+    합성 코퍼스 생성
+
+    Args:
+        workdir: 작업 디렉토리 (그 아래 data/raw/... 구조로 생성)
+        num_docs: 전체 문서 수 (Consensus + DART)
+        dart_ratio: DART 문서 비율
+        paragraphs_per_doc: 문서당 문단 수 (Consensus 기준, DART는 5배)
+        seed: 난수 시드
+
+    Returns:
+        dict: {"consensus": int, "dart": int, "bytes": int}
+    """
+    rng = random.Random(seed)
+    consensus_dir = os.path.join(workdir, config.CONSENSUS_DIR)
+    dart_dir = os.path.join(workdir, config.DART_DIR)
+    raw_dir = os.path.join(workdir, config.RAW_DIR)
+    os.makedirs(consensus_dir, exist_ok=True)
+    os.makedirs(dart_dir, exist_ok=True)
+
+    num_dart = int(num_docs * dart_ratio)
+    num_consensus = num_docs - num_dart
+    companies = list(config.COMPANIES.keys())
+    start_date = datetime(2023, 1, 1)
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+
+    consensus_meta = {company: [] for company in companies}
+    for i in range(num_consensus):
+        company = companies[i % len(companies)]
+        date = start_date + timedelta(days=rng.randint(0, config.CRAWL_DATE_RANGE_DAYS))
+        title = f"합성리포트{i:05d}"
+        filename = f"{company}_{date.strftime('%Y%m%d')}_{title}.pdf"
+        write_pdf(os.path.join(consensus_dir, filename),
+                  generate_paragraphs(rng, company, paragraphs_per_doc))
+        consensus_meta[company].append({
+            'company_name': company,
+            'date': date.strftime('%Y-%m-%d'),
+            'category': '기업',
+            'title': title,
+            'author': '합성',
+            'source': '벤치마크증권',
+            'report_link': '',
+            'pdf_link': '',
+            'crawled_at': datetime.now().isoformat()
+        })
+
+    dart_meta = {company: [] for company in companies}
+    report_types = list(config.DART_REPORT_TYPES.items())
+    for i in range(num_dart):
+        company = companies[i % len(companies)]
+        report_type, report_code = report_types[i % len(report_types)]
+        date = start_date + timedelta(days=rng.randint(0, config.CRAWL_DATE_RANGE_DAYS))
+        rcept_no = f"{date.strftime('%Y%m%d')}{i:06d}"
+        filename = f"{company}_{rcept_no}_{report_type}.zip"
+        write_dart_zip(os.path.join(dart_dir, filename), company, report_type, rcept_no,
+                       generate_paragraphs(rng, company, paragraphs_per_doc * 5), rng)
+        dart_meta[company].append({
+            'corp_name': company,
+            'stock_code': config.COMPANIES[company],
+            'report_nm': f"{report_type} ({date.strftime('%Y.%m')})",
+            'rcept_no': rcept_no,
+            'rcept_dt': date.strftime('%Y%m%d'),
+            'report_type': report_type,
+            'report_type_code': report_code
+        })
+
+    for company in companies:
+        with open(os.path.join(raw_dir, f"{company}_{timestamp}.json"), 'w', encoding='utf-8') as f:
+            json.dump(consensus_meta[company], f, ensure_ascii=False, indent=2)
+        with open(os.path.join(raw_dir, f"{company}_DART_{timestamp}.json"), 'w', encoding='utf-8') as f:
+            json.dump(dart_meta[company], f, ensure_ascii=False, indent=2)
+
+    total_bytes = sum(
+        os.path.getsize(os.path.join(root, name))
+        for root, _, files in os.walk(raw_dir) for name in files
+    )
+    return {"consensus": num_consensus, "dart": num_dart, "bytes": total_bytes}
+
+
+# ---------------------------------------------------------------------------
+# Step 07 substitute
+# ---------------------------------------------------------------------------
+
+def synthesize_relations(text, rng):
+    """텍스트의 각 문장에서 함께 등장한 KPI/Factor 쌍을 합성 관계로 생성"""
+    relations = []
+    for sentence in text.replace("\n", " ").split(". "):
+        kpis = [k for k in config.KPI_LIST if k in sentence]
+        factors = [f for f in config.FACTOR_LIST if f in sentence]
+        for kpi in kpis:
+            for factor in factors:
+                relations.append({
+                    "kpi": kpi,
+                    "factor": factor,
+                    "relation": rng.choice(["positive", "negative", "neutral"]),
+                    "evidence": sentence.strip(),
+                    "confidence": rng.choice(["high", "medium", "low"])
+                })
+    return relations
+
+
+def synthesize_kpi_factor_outputs(seed=42):
+    """
+    LLM 호출 없이 Step 07 출력 생성 (현재 디렉토리 기준 data/ 사용)
+
+    TV 문단의 각 문장에서 함께 등장한 KPI/Factor 쌍을 관계로 기록합니다.
+    출력 형식은 07_extract_kpi_factors.py와 같으므로 08/09 단계를 그대로 실행할 수 있습니다.
+    """
+    rng = random.Random(seed)
+    index_path = f"{config.TV_CONTENT_DIR}/tv_content_index.json"
+    with open(index_path, 'r', encoding='utf-8') as f:
+        tv_content_index = json.load(f)
+
+    kpi_factors_dir = f"{config.PROCESSED_DIR}/kpi_factors"
+    os.makedirs(kpi_factors_dir, exist_ok=True)
+
+    results = []
+    total_relations = 0
+    for doc in tv_content_index["documents"]:
+        with open(f"{config.TV_CONTENT_CONSENSUS_DIR}/{doc['output_file']}", 'r', encoding='utf-8') as f:
+            tv_content = json.load(f)
+
+        packed = tv_content["tv_content"].get("packed")
+        text = packed["text"] if packed else "\n\n".join(p["text"] for p in tv_content["tv_content"]["paragraphs"])
+
+        relations = synthesize_relations(text, rng)
+
+        output_filename = doc["filename"].replace(".pdf", "_kpi_factors.json")
+        with open(f"{kpi_factors_dir}/{output_filename}", 'w', encoding='utf-8') as f:
+            json.dump({
+                "source": "consensus",
+                "filename": doc["filename"],
+                "company": doc["company"],
+                "date": doc["date"],
+                "tv_char_count": doc["tv_chars"],
+                "extraction": {"kpi_factor_relations": relations, "key_insights": []},
+                "metadata": {"model": "synthetic", "extracted_at": datetime.now().isoformat(),
+                             "input_tokens": None, "output_tokens": None}
+            }, f, ensure_ascii=False, indent=2)
+
+        total_relations += len(relations)
+        results.append({
+            "filename": doc["filename"],
+            "company": doc["company"],
+            "date": doc["date"],
+            "relations_count": len(relations),
+            "output_file": output_filename
+        })
+
+    with open(f"{config.PROCESSED_DIR}/kpi_factors_index.json", 'w', encoding='utf-8') as f:
+        json.dump({
+            "metadata": {
+                "description": "합성 KPI-Factor 관계 (벤치마크용, LLM 미사용)",
+                "model": "synthetic",
+                "kpi_list": config.KPI_LIST,
+                "factor_list": config.FACTOR_LIST,
+                "extraction_date": datetime.now().isoformat()
+            },
+            "statistics": {"total_documents": len(results), "total_relations": total_relations},
+            "results": results
+        }, f, ensure_ascii=False, indent=2)
+
+    print(f"합성 Step 07 출력: {len(results)}개 문서, {total_relations}개 관계")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="벤치마크용 합성 코퍼스 생성")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    gen = sub.add_parser("generate", help="합성 PDF/ZIP/메타데이터 생성")
+    gen.add_argument("--docs", type=int, default=100, help="전체 문서 수")
+    gen.add_argument("--dart-ratio", type=float, default=0.1, help="DART 문서 비율")
+    gen.add_argument("--paragraphs", type=int, default=12, help="문서당 문단 수")
+    gen.add_argument("--workdir", default=".", help="작업 디렉토리")
+    gen.add_argument("--seed", type=int, default=42)
+
+    step07 = sub.add_parser("step07", help="LLM 없이 Step 07 출력 생성 (현재 디렉토리 기준)")
+    step07.add_argument("--seed", type=int, default=42)
+
+    args = parser.parse_args()
+    if args.command == "generate":
+        counts = generate_corpus(args.workdir, args.docs, args.dart_ratio, args.paragraphs, args.seed)
+        print(f"합성 코퍼스 생성: Consensus {counts['consensus']}개, DART {counts['dart']}개, "
+              f"{counts['bytes'] / 1024 / 1024:.1f} MB")
+    else:
+        synthesize_kpi_factor_outputs(args.seed)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,198 @@
+"""
+긴 문서(DART 사업보고서 등)의 분할 추출 (map-reduce)
+
+문단 경계에서 토큰 예산 크기의 chunk로 나누고(앞 chunk의 끝 문단 일부를 겹침),
+chunk별로 추출한 KPI-Factor 관계를 하나의 문서 결과로 합칩니다.
+겹치는 구간에서 중복 추출된 관계는 (kpi, factor, relation)이 같고 근거 문장이 겹치면 하나로 병합합니다.
+"""
+
+import re
+from difflib import SequenceMatcher
+from token_counter import count_tokens, truncate_to_tokens
+
+# 근거 문장이 이 유사도 이상이면 같은 관계로 간주
+EVIDENCE_SIMILARITY_THRESHOLD = 0.8
+
+CONFIDENCE_RANK = {"high": 3, "medium": 2, "low": 1}
+
+# 긴 단위를 나눌 때의 문장 경계 (마침표/물음표/느낌표 뒤 공백)
+SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?。])\s+")
+
+
+def split_units(paragraphs):
+    """
+    문단 리스트를 chunk 구성 단위로 분리
+
+    DART 문단은 여러 줄이 병합된 긴 텍스트일 수 있으므로 줄 단위로 나눕니다.
+
+    Returns:
+        list: 비어 있지 않은 텍스트 단위
+    """
+    units = []
+    for paragraph in paragraphs:
+        for line in paragraph.split("\n"):
+            line = line.strip()
+            if line:
+                units.append(line)
+    return units
+
+
+def _token_windows(text, max_tokens):
+    """텍스트를 앞에서부터 max_tokens 이하 조각으로 나눔 (문장 경계가 없는 긴 문장용)"""
+    pieces = []
+    rest = text
+    while rest:
+        piece = truncate_to_tokens(rest, max_tokens)
+        if not piece or not rest.startswith(piece):
+            # 글자 1개가 예산을 넘거나 디코딩 경계가 어긋난 경우에도 진행은 보장
+            piece = rest[:max(1, len(piece))]
+        pieces.append(piece)
+        rest = rest[len(piece):]
+    return pieces
+
+
+def split_long_unit(unit, max_tokens):
+    """
+    max_tokens를 넘는 단위를 내용 손실 없이 max_tokens 이하 조각으로 분할
+
+    문장 경계에서 먼저 나누고 문장 여러 개를 예산 안에서 다시 묶으며,
+    문장 하나가 예산을 넘으면 토큰 창 단위로 자릅니다.
+
+    Returns:
+        list: (조각 텍스트, 토큰 수) 리스트
+    """
+    pieces = []
+    current = ""
+    for sentence in SENTENCE_BOUNDARY.split(unit):
+        if not sentence:
+            continue
+        candidate = f"{current} {sentence}" if current else sentence
+        if count_tokens(candidate) <= max_tokens:
+            current = candidate
+            continue
+        if current:
+            pieces.append(current)
+            current = ""
+        if count_tokens(sentence) <= max_tokens:
+            current = sentence
+        else:
+            pieces.extend(_token_windows(sentence, max_tokens))
+    if current:
+        pieces.append(current)
+    return [(piece, count_tokens(piece)) for piece in pieces]
+
+
+def chunk_paragraphs(paragraphs, max_tokens, overlap_tokens=0):
+    """
+    문단 경계에서 토큰 예산 크기의 chunk로 분할
+
+    Args:
+        paragraphs: 문단 텍스트 리스트
+        max_tokens: chunk당 최대 토큰 수
+        overlap_tokens: 다음 chunk 앞에 다시 포함할 이전 chunk 끝부분 토큰 수
+
+    Returns:
+        list: chunk 텍스트 리스트 (단위 1개가 max_tokens를 넘으면 split_long_unit으로 나눠서 배치)
+    """
+    units = []
+    for unit in split_units(paragraphs):
+        tokens = count_tokens(unit)
+        if tokens > max_tokens:
+            units.extend(split_long_unit(unit, max_tokens))
+        else:
+            units.append((unit, tokens))
+    chunks = []
+    current = []
+    current_tokens = 0
+
+    for unit, tokens in units:
+        if current and current_tokens + tokens > max_tokens:
+            chunks.append("\n".join(text for text, _ in current))
+
+            # 끝 단위들을 overlap 예산만큼 다음 chunk로 이월
+            carried = []
+            carried_tokens = 0
+            for text, text_tokens in reversed(current):
+                if carried_tokens + text_tokens > overlap_tokens or carried_tokens + text_tokens + tokens > max_tokens:
+                    break
+                carried.insert(0, (text, text_tokens))
+                carried_tokens += text_tokens
+            current = carried
+            current_tokens = carried_tokens
+
+        current.append((unit, tokens))
+        current_tokens += tokens
+
+    if current:
+        chunks.append("\n".join(text for text, _ in current))
+    return chunks
+
+
+def _evidence_overlaps(a, b):
+    """근거 문장이 같은 내용인지 (포함 관계 또는 높은 유사도)"""
+    a = " ".join(a.split())
+    b = " ".join(b.split())
+    if not a or not b:
+        return a == b
+    if a in b or b in a:
+        return True
+    return SequenceMatcher(None, a, b).ratio() >= EVIDENCE_SIMILARITY_THRESHOLD
+
+
+def merge_chunk_results(chunk_results):
+    """
+    chunk별 추출 결과를 문서 결과 1개로 병합
+
+    Args:
+        chunk_results: chunk 순서대로의 추출 결과 리스트 (실패한 chunk는 None)
+
+    Returns:
+        dict: {"kpi_factor_relations": [...], "key_insights": [...], "merge_statistics": {...}}
+    """
+    merged = []
+    insights = []
+    total_relations = 0
+
+    for chunk_index, result in enumerate(chunk_results):
+        if not result:
+            continue
+
+        for relation in result.get("kpi_factor_relations", []):
+            total_relations += 1
+            relation = dict(relation)
+            relation["chunk_index"] = chunk_index
+
+            duplicate = None
+            for existing in merged:
+                if (existing.get("kpi") == relation.get("kpi")
+                        and existing.get("factor") == relation.get("factor")
+                        and existing.get("relation") == relation.get("relation")
+                        and _evidence_overlaps(existing.get("evidence", ""), relation.get("evidence", ""))):
+                    duplicate = existing
+                    break
+
+            if duplicate is None:
+                merged.append(relation)
+                continue
+
+            # 더 긴 근거 문장과 더 높은 신뢰도 유지
+            if len(relation.get("evidence", "")) > len(duplicate.get("evidence", "")):
+                duplicate["evidence"] = relation["evidence"]
+            if (CONFIDENCE_RANK.get(relation.get("confidence"), 0)
+                    > CONFIDENCE_RANK.get(duplicate.get("confidence"), 0)):
+                duplicate["confidence"] = relation["confidence"]
+
+        for insight in result.get("key_insights", []):
+            if insight not in insights:
+                insights.append(insight)
+
+    return {
+        "kpi_factor_relations": merged,
+        "key_insights": insights,
+        "merge_statistics": {
+            "chunks": len(chunk_results),
+            "failed_chunks": sum(1 for result in chunk_results if not result),
+            "extracted_relations": total_relations,
+            "merged_relations": len(merged)
+        }
+    }
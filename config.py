@@ -31,6 +31,23 @@ FACTOR_LIST = [
     "마케팅비", "경쟁사 전략", "계절성"
 ]
 
+# KPI/Factor synonyms (prescreen.py, entity_normalizer.py)
+KPI_FACTOR_SYNONYMS = {  # 대표 용어 -> 동의어 (KPI_LIST/FACTOR_LIST 용어 자체는 자동 포함)
+    "매출": ["매출액", "외형", "revenue"],
+    "수익성": ["영업이익", "이익률", "마진", "적자", "흑자", "OPM"],
+    "ASP": ["판가", "평균판매가격", "판매가격"],
+    "판매량": ["출하량", "출하", "판매 대수", "수요"],
+    "점유율": ["시장점유율", "M/S", "share"],
+    "원가": ["원가율", "부품 가격", "제조원가"],
+    "환율": ["원/달러", "원달러", "달러 강세", "원화"],
+    "패널 가격": ["패널가", "LCD 가격", "패널 단가"],
+    "프로모션": ["판촉", "할인", "블랙프라이데이"],
+    "유통사 재고": ["채널 재고", "유통 재고", "재고"],
+    "마케팅비": ["마케팅 비용", "광고비", "판관비"],
+    "경쟁사 전략": ["경쟁사", "중국 업체", "경쟁 심화"],
+    "계절성": ["성수기", "비수기", "계절"],
+}
+
 # Directories
 DATA_DIR = "data"
 RAW_DIR = f"{DATA_DIR}/raw"
@@ -43,6 +60,7 @@ FILTERED_DIR = f"{DATA_DIR}/filtered"
 TV_CONTENT_DIR = f"{FILTERED_DIR}/tv_content"  # TV 관련 문단만 추출
 TV_CONTENT_CONSENSUS_DIR = f"{TV_CONTENT_DIR}/consensus"  # Consensus TV 문단
 PROCESSED_DIR = f"{DATA_DIR}/processed"
+METRICS_DIR = f"{DATA_DIR}/metrics"  # 단계별 소요 시간/처리량 지표
 
 # URLs
 HANKYUNG_CONSENSUS_URL = "https://consensus.hankyung.com"
@@ -64,3 +82,89 @@ DART_REPORT_TYPES = {
 # Crawling settings
 CRAWL_DATE_RANGE_DAYS = 1095  # 3 years (365 * 3)
 MAX_REPORTS_PER_COMPANY = 150  # Maximum reports to crawl per company (increased for 3 years)
+
+# LLM input packing (06_extract_tv_content.py)
+TOKENIZER_ENCODING = "cl100k_base"  # 로컬 토큰 카운트용 tiktoken 인코딩
+TV_CONTENT_TOKEN_BUDGET = 3000  # 문서당 LLM 입력 토큰 상한
+
+# Near-duplicate paragraph elimination (paragraph_dedup.py)
+DEDUP_SIMILARITY_THRESHOLD = 0.8  # 추정 Jaccard 유사도가 이 값 이상이면 중복
+DEDUP_NUM_PERM = 64  # MinHash 순열 수
+DEDUP_BANDS = 16  # LSH 밴드 수 (밴드당 행 = NUM_PERM / BANDS)
+DEDUP_SHINGLE_SIZE = 5  # 문자 n-gram 크기
+
+# LLM extraction scheduling (07_extract_kpi_factors.py)
+LLM_BACKEND = os.getenv('LLM_BACKEND', 'gemini')  # gemini | mock (llm_backends.py)
+LLM_MOCK_URL = os.getenv('LLM_MOCK_URL', 'http://127.0.0.1:8765')  # benchmarks/mock_llm_server.py
+LLM_CONCURRENCY = 8  # 최대 동시 요청 수
+LLM_RPM_LIMIT = int(os.getenv('LLM_RPM_LIMIT', 60))  # 분당 요청 수 한도 (제공자 할당량에 맞춤)
+LLM_TPM_LIMIT = int(os.getenv('LLM_TPM_LIMIT', 1_000_000))  # 분당 토큰 수 한도
+LLM_REQUEST_TIMEOUT = 120  # 요청별 timeout (초)
+LLM_MAX_RETRIES = 3  # 요청별 최대 시도 횟수
+LLM_EXPECTED_OUTPUT_TOKENS = 1024  # TPM 예산 계산용 출력 토큰 추정치
+
+# LLM response cache (llm_cache.py)
+LLM_CACHE_ENABLED = True
+LLM_CACHE_PATH = f"{PROCESSED_DIR}/llm_cache.sqlite"
+LLM_CACHE_MAX_AGE_DAYS = 180  # 이보다 오래된 응답은 삭제
+LLM_CACHE_MAX_BYTES = 512 * 1024 * 1024  # 초과 시 오래 사용하지 않은 응답부터 삭제
+
+# Multi-document batching (07_extract_kpi_factors.py)
+LLM_BATCH_ENABLED = True
+LLM_BATCH_SHORT_DOC_TOKENS = 800  # 이 토큰 수 이하의 문서만 묶어서 요청
+LLM_BATCH_TOKEN_BUDGET = 6000  # 요청 1개에 묶는 문서 텍스트의 최대 토큰 수
+LLM_BATCH_MAX_DOCUMENTS = 10  # 요청 1개에 묶는 최대 문서 수
+
+# Chunked extraction for long DART sections (07_extract_kpi_factors.py)
+LLM_INCLUDE_DART = True  # filtered_index.json의 DART relevant_paragraphs도 추출
+LLM_CHUNK_TOKENS = 3000  # 이보다 긴 문서는 chunk로 나눠 추출
+LLM_CHUNK_OVERLAP_TOKENS = 200  # 인접 chunk가 겹치는 토큰 수
+
+# LLM cost ledger and budget (cost_ledger.py)
+LLM_PRICING = {  # USD per 1M tokens
+    "gemini-2.0-flash-exp": {"input": 0.075, "cached_input": 0.01875, "output": 0.30},
+    "gemini-1.5-flash-8b": {"input": 0.0375, "cached_input": 0.01, "output": 0.15},
+}
+LLM_LEDGER_PATH = f"{PROCESSED_DIR}/llm_ledger.jsonl"
+LLM_BUDGET_TOKENS = int(os.getenv('LLM_BUDGET_TOKENS', 0)) or None  # 실행당 토큰 예산 (없으면 무제한)
+LLM_BUDGET_USD = float(os.getenv('LLM_BUDGET_USD', 0)) or None  # 실행당 비용 예산 (USD)
+LLM_BUDGET_DOWNGRADE_RATIO = 0.8  # 예산의 이 비율 이상 사용 시 저가 모델로 전환
+LLM_FALLBACK_MODEL = "gemini-1.5-flash-8b"  # 전환할 저가 모델 (None이면 전환 없이 예산 소진 시 중단)
+
+# Prompt-prefix reuse via provider context caching (llm_backends.py)
+LLM_CONTEXT_CACHE_ENABLED = True  # 고정 지시문(KPI/Factor 목록, 출력 형식)을 제공자 context cache로 재사용
+LLM_CONTEXT_CACHE_MIN_TOKENS = 4096  # 제공자 최소 캐시 크기 (더 짧은 prefix는 캐시 없이 전체 전송)
+LLM_CONTEXT_CACHE_TTL_SECONDS = 3600  # context cache 유지 시간
+LLM_CONTEXT_CACHE_REFRESH_MARGIN_SECONDS = 300  # 만료 이 시간 전부터는 요청 전에 캐시를 새로 생성
+
+# Local pre-screen before LLM extraction (prescreen.py)
+PRESCREEN_ENABLED = False  # python prescreen.py로 학습/평가 후 threshold를 정하고 켬
+PRESCREEN_MODEL_PATH = f"{PROCESSED_DIR}/prescreen_model.json"
+PRESCREEN_THRESHOLD = 0.2  # 관계 포함 확률이 이 값 이상인 문단만 LLM에 전달 (낮출수록 recall↑, 비용↑)
+PRESCREEN_HOLDOUT_RATIO = 0.2  # 평가용으로 남기는 문서 비율
+
+# Incremental aggregation (08_aggregate_kpi_factors.py)
+AGGREGATE_INCREMENTAL = True  # 이전 집계 상태에 바뀐 문서만 반영 (False면 매번 전체 재집계)
+AGGREGATE_STATE_PATH = f"{PROCESSED_DIR}/kpi_factors_aggregate_state.json"
+AGGREGATE_MAX_EXAMPLES = 3  # KPI-Factor 조합별 예시 수 (신뢰도 > 최신 > 근거 길이 순으로 선택)
+AGGREGATE_EXAMPLE_EVIDENCE_CHARS = 200  # 예시 근거 문장 최대 길이 (더 긴 근거는 잘라서 저장)
+RELATION_STORE_PATH = f"{PROCESSED_DIR}/kpi_factors.sqlite"  # 관계 저장소 (relation_store.py)
+
+# KPI/Factor name normalization (entity_normalizer.py)
+ENTITY_NORMALIZATION_ENABLED = True  # 집계 시 LLM이 돌려준 이름을 KPI_LIST/FACTOR_LIST 용어로 맞춤
+ENTITY_ALIAS_CACHE_PATH = f"{PROCESSED_DIR}/entity_aliases.json"  # 정규화 결과 + 수동 alias
+ENTITY_SIMILARITY_THRESHOLD = 0.7  # 문자 bigram Dice 유사도가 이 값 이상이면 같은 용어로 봄
+ENTITY_CONTAINMENT_MIN_LENGTH = 3  # 이름 안에 들어 있는지로 맞추는 용어/동의어의 최소 글자 수 ("재고", "매출" 등 2글자는 제외)
+
+# KPI-Factor trend rollups (trend_rollups.py)
+TREND_ROLLUP_PATH = f"{PROCESSED_DIR}/kpi_factor_trends.npz"
+TREND_CONFIDENCE_WEIGHTS = {"high": 1.0, "medium": 0.6, "low": 0.3}  # 그 외 값은 TREND_DEFAULT_WEIGHT
+TREND_DEFAULT_WEIGHT = 0.5
+
+# Graph visualization (09_create_graph_visualization.py)
+GRAPH_WEBGL_EDGE_THRESHOLD = 5000  # 엣지가 이 수 이상이면 Scattergl(WebGL)로 렌더링
+GRAPH_LAYOUT_CACHE_PATH = f"{PROCESSED_DIR}/kpi_factor_graph_layout.json"  # 노드 위치 캐시 (graph_layout.py)
+GRAPH_LAYOUT_FAST_NODE_THRESHOLD = 1000  # 노드가 이 수 이상이면 spring_layout 대신 격자 근사 force layout
+GRAPH_LAYOUT_GRID_SIZE = 16  # 격자 근사 layout의 한 변 칸 수 (반발력을 칸 중심으로 근사)
+GRAPH_LAYOUT_INCREMENTAL_ITERATIONS = 20  # 새 노드만 배치할 때 반복 수 (기존 노드는 고정)
+GRAPH_LAYOUT_INCREMENTAL_MAX_NEW_RATIO = 0.5  # 새 노드 비율이 이보다 크면 처음부터 다시 계산
@@ -0,0 +1,151 @@
+"""
+토큰 예산 기반 LLM 입력 패커
+
+TV 문단마다 키워드 밀도와 KPI/Factor 동시 출현 점수를 매기고,
+점수가 높은 문단부터 문서당 토큰 예산을 채웁니다.
+예산을 넘는 문단은 버리고 목록으로 남겨 LLM 호출당 입력 크기를 일정하게 유지합니다.
+"""
+
+from config import TV_KEYWORDS, KPI_LIST, FACTOR_LIST
+from token_counter import count_tokens, truncate_to_tokens
+
+# 문단 구분자 ("\n\n") 토큰 수
+SEPARATOR_TOKENS = 1
+
+# 점수 가중치
+KPI_FACTOR_WEIGHT = 2  # KPI/Factor 용어 1회 출현 = TV 키워드 2회
+COOCCURRENCE_BONUS = 5  # KPI-Factor 쌍 1개당 가산점
+
+
+def _count_occurrences(text_lower, terms):
+    """용어별 출현 횟수 (0회는 제외)"""
+    counts = {}
+    for term in terms:
+        n = text_lower.count(term.lower())
+        if n:
+            counts[term] = n
+    return counts
+
+
+def score_paragraph(text, token_count=None):
+    """
+    문단 점수 계산
+
+    점수 = 토큰 100개당 (TV 키워드 + 가중 KPI/Factor 출현 수)
+         + KPI-Factor 동시 출현 쌍 수 * COOCCURRENCE_BONUS
+
+    Args:
+        text: 문단 텍스트
+        token_count: 문단 토큰 수 (없으면 계산)
+
+    Returns:
+        dict: {"score", "kpi_terms", "factor_terms", "keyword_hits"}
+    """
+    if token_count is None:
+        token_count = count_tokens(text)
+
+    text_lower = text.lower()
+    tv_hits = _count_occurrences(text_lower, TV_KEYWORDS)
+    kpi_hits = _count_occurrences(text_lower, KPI_LIST)
+    factor_hits = _count_occurrences(text_lower, FACTOR_LIST)
+
+    keyword_hits = sum(tv_hits.values()) + KPI_FACTOR_WEIGHT * (
+        sum(kpi_hits.values()) + sum(factor_hits.values())
+    )
+    density = keyword_hits / max(token_count, 1) * 100
+    cooccurrence = len(kpi_hits) * len(factor_hits)
+
+    return {
+        "score": round(density + cooccurrence * COOCCURRENCE_BONUS, 3),
+        "kpi_terms": sorted(kpi_hits),
+        "factor_terms": sorted(factor_hits),
+        "keyword_hits": keyword_hits
+    }
+
+
+def pack_paragraphs(paragraphs, token_budget):
+    """
+    점수 순으로 문단을 골라 토큰 예산 안에 담기 (greedy)
+
+    선택된 문단은 원래 순서대로 이어 붙입니다. 예산보다 큰 문단 하나만 남은 경우에는
+    그 문단을 예산 크기로 잘라서라도 포함하여 빈 입력이 되지 않도록 합니다.
+
+    Args:
+        paragraphs: extract_tv_paragraphs()의 relevant_paragraphs 리스트
+        token_budget: 문서당 최대 토큰 수
+
+    Returns:
+        dict: {
+            "text": 패킹된 텍스트,
+            "token_count": int,
+            "token_budget": int,
+            "paragraph_indices": [...],
+            "truncated": bool,
+            "dropped_paragraphs": [{"paragraph_index", "token_count", "score", "reason"}, ...]
+        }
+    """
+    candidates = []
+    for position, paragraph in enumerate(paragraphs):
+        tokens = count_tokens(paragraph["text"])
+        scored = score_paragraph(paragraph["text"], tokens)
+        candidates.append({
+            "position": position,
+            "paragraph_index": paragraph["paragraph_index"],
+            "text": paragraph["text"],
+            "token_count": tokens,
+            "score": scored["score"]
+        })
+
+    # 점수 내림차순, 동점이면 문서 앞쪽 우선
+    ranked = sorted(candidates, key=lambda c: (-c["score"], c["position"]))
+
+    selected = []
+    dropped = []
+    used_tokens = 0
+
+    for cand in ranked:
+        cost = cand["token_count"] + (SEPARATOR_TOKENS if selected else 0)
+        if used_tokens + cost <= token_budget:
+            selected.append(cand)
+            used_tokens += cost
+        else:
+            dropped.append({
+                "paragraph_index": cand["paragraph_index"],
+                "token_count": cand["token_count"],
+                "score": cand["score"],
+                "reason": "over_budget"
+            })
+
+    # 어떤 문단도 예산에 들어가지 않으면 최고 점수 문단을 잘라서 사용
+    truncated = False
+    if not selected and ranked:
+        top = dict(ranked[0])
+        top["text"] = truncate_to_tokens(top["text"], token_budget)
+        selected.append(top)
+        dropped = [d for d in dropped if d["paragraph_index"] != top["paragraph_index"]]
+        truncated = True
+
+    selected.sort(key=lambda c: c["position"])
+    packed_text = "\n\n".join(c["text"] for c in selected)
+
+    # 예산은 문단별 토큰 수의 합으로 계산했으므로 이어 붙인 텍스트로 다시 확인하고,
+    # 구분자/토큰 경계 차이로 넘으면 우선순위가 가장 낮은 문단부터 뺌
+    while len(selected) > 1 and count_tokens(packed_text) > token_budget:
+        worst = max(selected, key=lambda c: (-c["score"], c["position"]))
+        selected.remove(worst)
+        dropped.append({
+            "paragraph_index": worst["paragraph_index"],
+            "token_count": worst["token_count"],
+            "score": worst["score"],
+            "reason": "over_budget"
+        })
+        packed_text = "\n\n".join(c["text"] for c in selected)
+
+    return {
+        "text": packed_text,
+        "token_count": count_tokens(packed_text),
+        "token_budget": token_budget,
+        "paragraph_indices": [c["paragraph_index"] for c in selected],
+        "truncated": truncated,
+        "dropped_paragraphs": dropped
+    }
@@ -0,0 +1,174 @@
+"""
+LLM 토큰/비용 원장과 예산 관리
+
+호출마다 (문서, 모델, 입력/출력 토큰, 지연 시간, 재시도 횟수, 캐시 적중, 비용)을
+JSONL 원장에 추가하고, 실행 중 누적 사용량으로 예산을 관리합니다.
+  - 예산의 LLM_BUDGET_DOWNGRADE_RATIO 이상을 쓰면 LLM_FALLBACK_MODEL로 전환
+  - 예산을 다 쓰면 새 요청을 보내지 않음 (BudgetExceededError, 남은 문서는 다음 실행에서 처리)
+
+동시에 나가는 요청이 예산을 넘지 않도록 요청 전에 추정 토큰을 예약(reserve)하고,
+응답을 받으면 실제 사용량으로 정산합니다.
+"""
+
+import json
+import os
+import time
+from datetime import datetime
+from config import LLM_PRICING
+from metrics import increment
+
+
+class BudgetExceededError(Exception):
+    """예산 초과로 요청을 보내지 않음"""
+
+
+def estimate_cost(input_tokens, output_tokens, model_name, cached_input_tokens=0):
+    """
+    토큰 수로 비용(USD) 계산 (가격 정보가 없는 모델은 0)
+
+    input_tokens 중 cached_input_tokens는 context cache 가격(cached_input)으로 계산합니다.
+    """
+    pricing = LLM_PRICING.get(model_name)
+    if not pricing:
+        return 0.0
+    uncached_tokens = input_tokens - cached_input_tokens
+    return (uncached_tokens / 1_000_000 * pricing["input"]
+            + cached_input_tokens / 1_000_000 * pricing.get("cached_input", pricing["input"])
+            + output_tokens / 1_000_000 * pricing["output"])
+
+
+class CostLedger:
+    """호출별 원장 + 실행 예산"""
+
+    def __init__(self, path, budget_tokens=None, budget_usd=None, downgrade_ratio=0.8, fallback_backend=None):
+        self.path = path
+        self.budget_tokens = budget_tokens
+        self.budget_usd = budget_usd
+        self.downgrade_ratio = downgrade_ratio
+        self.fallback_backend = fallback_backend
+        self.run_id = datetime.now().strftime("%Y%m%d_%H%M%S")
+
+        self.spent_tokens = 0
+        self.spent_usd = 0.0
+        self.reserved_tokens = 0
+        self.reserved_usd = 0.0
+        self.by_model = {}
+        self.calls = 0
+        self.cache_hits = 0
+        self.downgraded = False
+        self.exhausted = False
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._file = open(path, 'a', encoding='utf-8')
+
+    def _usage_ratio(self, extra_tokens=0, extra_usd=0.0, include_reserved=True):
+        """예산 대비 사용 비율 (토큰/금액 중 큰 쪽, 예산이 없으면 0)"""
+        reserved_tokens = self.reserved_tokens if include_reserved else 0
+        reserved_usd = self.reserved_usd if include_reserved else 0.0
+        ratios = [0.0]
+        if self.budget_tokens:
+            ratios.append((self.spent_tokens + reserved_tokens + extra_tokens) / self.budget_tokens)
+        if self.budget_usd:
+            ratios.append((self.spent_usd + reserved_usd + extra_usd) / self.budget_usd)
+        return max(ratios)
+
+    def select_backend(self, backend):
+        """예산 사용 비율에 따라 요청에 쓸 백엔드 선택 (기본 또는 저가 모델)"""
+        if (self.fallback_backend is not None
+                and self._usage_ratio(include_reserved=False) >= self.downgrade_ratio):
+            if not self.downgraded:
+                self.downgraded = True
+                print(f"  [BUDGET] 예산의 {self.downgrade_ratio:.0%} 사용, "
+                      f"{self.fallback_backend.model_name} 모델로 전환")
+            return self.fallback_backend
+        return backend
+
+    def reserve(self, estimated_input_tokens, estimated_output_tokens, model_name):
+        """
+        요청 전 추정 사용량 예약
+
+        출력 토큰은 설정 추정치와 이번 실행의 호출당 평균 출력 토큰 중 큰 값으로 예약합니다.
+
+        Returns:
+            tuple: release()에 전달할 예약 (tokens, usd)
+
+        Raises:
+            BudgetExceededError: 예약하면 예산을 넘음
+        """
+        api_calls = self.calls - self.cache_hits
+        if api_calls:
+            average_output = sum(m["output_tokens"] for m in self.by_model.values()) / api_calls
+            estimated_output_tokens = max(estimated_output_tokens, round(average_output))
+        tokens = estimated_input_tokens + estimated_output_tokens
+        usd = estimate_cost(estimated_input_tokens, estimated_output_tokens, model_name)
+        if self.exhausted or self._usage_ratio(tokens, usd) > 1.0:
+            if not self.exhausted:
+                self.exhausted = True
+                print(f"  [BUDGET] 예산 소진 (사용: {self.spent_tokens:,} 토큰, ${self.spent_usd:.4f}), "
+                      f"남은 요청은 다음 실행으로 연기")
+            increment("llm_budget_rejections")
+            raise BudgetExceededError("LLM 예산 초과")
+        self.reserved_tokens += tokens
+        self.reserved_usd += usd
+        return tokens, usd
+
+    def release(self, reservation):
+        """예약 해제 (실제 사용량은 record()로 반영)"""
+        tokens, usd = reservation
+        self.reserved_tokens -= tokens
+        self.reserved_usd -= usd
+
+    def record(self, document, model_name, input_tokens, output_tokens, latency, retries=0,
+               cache_hit=False, status="ok", cached_input_tokens=0):
+        """호출 1건을 원장에 기록하고 누적 사용량 갱신"""
+        cost = 0.0 if cache_hit else estimate_cost(input_tokens, output_tokens, model_name, cached_input_tokens)
+        if not cache_hit:
+            self.spent_tokens += input_tokens + output_tokens
+            self.spent_usd += cost
+            model_stats = self.by_model.setdefault(
+                model_name, {"calls": 0, "input_tokens": 0, "cached_input_tokens": 0, "output_tokens": 0,
+                             "cost_usd": 0.0}
+            )
+            model_stats["calls"] += 1
+            model_stats["input_tokens"] += input_tokens
+            model_stats["cached_input_tokens"] += cached_input_tokens
+            model_stats["output_tokens"] += output_tokens
+            model_stats["cost_usd"] += cost
+            increment("llm_cost_usd", cost, model=model_name)
+        else:
+            self.cache_hits += 1
+        self.calls += 1
+
+        self._file.write(json.dumps({
+            "run_id": self.run_id,
+            "timestamp": time.time(),
+            "document": document,
+            "model": model_name,
+            "input_tokens": input_tokens,
+            "cached_input_tokens": cached_input_tokens,
+            "output_tokens": output_tokens,
+            "latency_seconds": round(latency, 3),
+            "retries": retries,
+            "cache_hit": cache_hit,
+            "status": status,
+            "cost_usd": round(cost, 6)
+        }, ensure_ascii=False) + "\n")
+        self._file.flush()
+
+    def summary(self):
+        """이번 실행 사용량 요약"""
+        return {
+            "run_id": self.run_id,
+            "calls": self.calls,
+            "cache_hits": self.cache_hits,
+            "spent_tokens": self.spent_tokens,
+            "spent_usd": round(self.spent_usd, 6),
+            "budget_tokens": self.budget_tokens,
+            "budget_usd": self.budget_usd,
+            "downgraded": self.downgraded,
+            "exhausted": self.exhausted,
+            "by_model": self.by_model
+        }
+
+    def close(self):
+        self._file.close()
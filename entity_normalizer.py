@@ -0,0 +1,170 @@
+"""
+KPI/Factor 이름 정규화
+
+LLM이 돌려준 KPI/Factor 이름("패널가격", "LCD 패널 가격", "원/달러 환율" 등)을
+config.KPI_LIST/FACTOR_LIST의 대표 용어로 맞춥니다.
+  1. alias 캐시 (이전에 정규화한 이름, 수동 지정 alias)
+  2. 공백/기호를 뺀 이름이 대표 용어나 동의어(KPI_FACTOR_SYNONYMS)와 같음
+  3. 이름 안에 ENTITY_CONTAINMENT_MIN_LENGTH자 이상의 대표 용어/동의어가 들어 있음 (가장 긴 것)
+     ("패널 재고"가 "재고"로, "매출총이익"이 "매출"로 묶이지 않도록 짧은 용어는 포함 검사에서 제외)
+  4. 문자 bigram Dice 유사도가 ENTITY_SIMILARITY_THRESHOLD 이상인 가장 비슷한 용어
+어디에도 맞지 않는 이름은 그대로 둡니다 (목록에 없는 새 KPI/Factor).
+
+정규화 결과는 alias 캐시 파일의 "learned"에 쌓여 다음 실행에서는 조회만 합니다.
+"manual"에 직접 적은 alias는 항상 우선합니다.
+    {"manual": {"kpi": {"영업 마진": "수익성"}, "factor": {}}, "learned": {...}}
+"""
+
+import hashlib
+import json
+import os
+import re
+from config import (
+    KPI_LIST,
+    FACTOR_LIST,
+    KPI_FACTOR_SYNONYMS,
+    ENTITY_ALIAS_CACHE_PATH,
+    ENTITY_SIMILARITY_THRESHOLD,
+    ENTITY_CONTAINMENT_MIN_LENGTH
+)
+from metrics import increment
+
+# 정규화 규칙이 바뀌면 올려서 집계를 다시 만들게 함 (fingerprint에 포함)
+NORMALIZER_VERSION = 2
+
+ENTITY_KINDS = ("kpi", "factor")
+
+_STRIP_RE = re.compile(r"[\s\-_/·()\[\]'\".,:]+")
+
+
+def compact_name(name):
+    """비교용 이름 (소문자, 공백/기호 제거)"""
+    return _STRIP_RE.sub("", str(name).lower())
+
+
+def _bigrams(text):
+    if len(text) < 2:
+        return {text}
+    return {text[i:i + 2] for i in range(len(text) - 1)}
+
+
+def dice_similarity(a, b):
+    """문자 bigram Dice 계수 (0~1)"""
+    bigrams_a = _bigrams(a)
+    bigrams_b = _bigrams(b)
+    if not bigrams_a or not bigrams_b:
+        return 0.0
+    return 2 * len(bigrams_a & bigrams_b) / (len(bigrams_a) + len(bigrams_b))
+
+
+class EntityNormalizer:
+    """KPI/Factor 이름 -> 대표 용어 (alias 캐시 사용)"""
+
+    def __init__(self, cache_path=ENTITY_ALIAS_CACHE_PATH, threshold=ENTITY_SIMILARITY_THRESHOLD):
+        self.cache_path = cache_path
+        self.threshold = threshold
+
+        # 종류별 비교용 이름 -> 대표 용어
+        self.terms = {}
+        for kind, canonical_terms in (("kpi", KPI_LIST), ("factor", FACTOR_LIST)):
+            self.terms[kind] = {}
+            for term in canonical_terms:
+                for variant in [term] + KPI_FACTOR_SYNONYMS.get(term, []):
+                    self.terms[kind].setdefault(compact_name(variant), term)
+        # 포함 검사는 긴 용어부터 ("패널 가격"이 "가격"보다 먼저)
+        self.terms_by_length = {
+            kind: sorted(terms.items(), key=lambda item: len(item[0]), reverse=True)
+            for kind, terms in self.terms.items()
+        }
+
+        self.manual = {kind: {} for kind in ENTITY_KINDS}
+        self.learned = {kind: {} for kind in ENTITY_KINDS}
+        self._dirty = False
+        if cache_path and os.path.exists(cache_path):
+            with open(cache_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            for kind in ENTITY_KINDS:
+                self.manual[kind].update(data.get("manual", {}).get(kind, {}))
+                self.learned[kind].update(data.get("learned", {}).get(kind, {}))
+            # 규칙이 바뀌었으면 학습된 alias는 다시 계산
+            if data.get("fingerprint") != self.rules_fingerprint():
+                self.learned = {kind: {} for kind in ENTITY_KINDS}
+                self._dirty = True
+
+    def rules_fingerprint(self):
+        """정규화 결과에 영향을 주는 설정의 해시 (수동 alias 제외)"""
+        payload = json.dumps({
+            "version": NORMALIZER_VERSION,
+            "kpis": KPI_LIST,
+            "factors": FACTOR_LIST,
+            "synonyms": KPI_FACTOR_SYNONYMS,
+            "threshold": self.threshold,
+            "containment_min_length": ENTITY_CONTAINMENT_MIN_LENGTH
+        }, ensure_ascii=False, sort_keys=True)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:16]
+
+    def fingerprint(self):
+        """집계 상태 무효화용 해시 (규칙 + 수동 alias)"""
+        payload = json.dumps({"rules": self.rules_fingerprint(), "manual": self.manual},
+                             ensure_ascii=False, sort_keys=True)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:16]
+
+    def _match(self, name, kind):
+        """캐시에 없는 이름의 대표 용어 (맞는 용어가 없으면 None)"""
+        compact = compact_name(name)
+        if not compact:
+            return None
+        terms = self.terms[kind]
+        if compact in terms:
+            return terms[compact]
+
+        for variant, term in self.terms_by_length[kind]:
+            if len(variant) >= ENTITY_CONTAINMENT_MIN_LENGTH and variant in compact:
+                return term
+
+        best_term = None
+        best_score = 0.0
+        for variant, term in terms.items():
+            score = dice_similarity(compact, variant)
+            if score > best_score:
+                best_term, best_score = term, score
+        return best_term if best_score >= self.threshold else None
+
+    def normalize(self, name, kind):
+        """
+        이름 정규화
+
+        Args:
+            name: LLM이 돌려준 이름
+            kind: "kpi" 또는 "factor"
+
+        Returns:
+            str: 대표 용어 (맞는 용어가 없으면 공백만 정리한 원래 이름)
+        """
+        name = " ".join(str(name).split())
+        if name in self.manual[kind]:
+            return self.manual[kind][name]
+        if name in self.learned[kind]:
+            increment("entity_alias_cache_hits", kind=kind)
+            return self.learned[kind][name]
+
+        increment("entity_alias_cache_misses", kind=kind)
+        canonical = self._match(name, kind) or name
+        self.learned[kind][name] = canonical
+        self._dirty = True
+        return canonical
+
+    def save(self):
+        """alias 캐시 저장 (바뀐 내용이 있을 때만)"""
+        if not self.cache_path or not self._dirty:
+            return
+        os.makedirs(os.path.dirname(self.cache_path) or ".", exist_ok=True)
+        tmp_path = f"{self.cache_path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({
+                "fingerprint": self.rules_fingerprint(),
+                "manual": self.manual,
+                "learned": {kind: dict(sorted(aliases.items())) for kind, aliases in self.learned.items()}
+            }, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.cache_path)
+        self._dirty = False
@@ -0,0 +1,239 @@
+"""
+Step 8 그래프 레이아웃 (위치 캐시 + 대규모 그래프용 근사 layout)
+
+노드 위치를 GRAPH_LAYOUT_CACHE_PATH에 저장해 두고 다음 실행에서 재사용합니다.
+  - 노드 집합이 같으면 저장된 위치를 그대로 사용
+  - 새 노드가 일부면 기존 노드는 고정하고, 새 노드를 이미 배치된 이웃 근처에 놓은 뒤
+    grid_force_layout으로 짧게 다듬음 (적정 거리를 저장된 좌표 범위에 맞춰 계산)
+  - 새 노드가 GRAPH_LAYOUT_INCREMENTAL_MAX_NEW_RATIO보다 많으면 처음부터 다시 계산
+
+노드가 GRAPH_LAYOUT_FAST_NODE_THRESHOLD개 이상이면 반복당 O(n²)인 nx.spring_layout 대신
+grid_force_layout을 사용합니다. 인력은 희소 인접 행렬로 엣지 수에 비례해 계산하고,
+반발력은 노드를 격자 칸(경계는 좌표 분위수)으로 묶어 다른 칸은 칸 중심(질량 = 노드 수)으로,
+같은 칸은 정확히 계산합니다 (1단계 Barnes-Hut 근사, 반복당 O(n × 칸 수 + 같은 칸 노드 쌍 수)).
+"""
+
+import json
+import math
+import os
+import networkx as nx
+import numpy as np
+from config import (
+    GRAPH_LAYOUT_CACHE_PATH,
+    GRAPH_LAYOUT_FAST_NODE_THRESHOLD,
+    GRAPH_LAYOUT_GRID_SIZE,
+    GRAPH_LAYOUT_INCREMENTAL_ITERATIONS,
+    GRAPH_LAYOUT_INCREMENTAL_MAX_NEW_RATIO
+)
+from metrics import increment
+
+# 캐시 형식이나 layout 파라미터가 바뀌면 올려서 다시 계산
+LAYOUT_VERSION = 1
+
+# 전체 계산 설정 (기존 09 단계와 같은 spring_layout 파라미터)
+SPRING_K = 2
+FULL_ITERATIONS = 50
+LAYOUT_SEED = 42
+
+# 반발력 계산 시 한 번에 처리할 노드 수 (노드 × 칸 배열 메모리 제한)
+REPULSION_CHUNK = 4096
+
+
+def _rescale(coords):
+    """중심을 원점으로 옮기고 [-1, 1] 범위로 맞춤 (nx.rescale_layout과 같은 방식)"""
+    coords = coords - coords.mean(axis=0)
+    limit = np.abs(coords).max()
+    return coords / limit if limit > 0 else coords
+
+
+def _repulsion(coords, k2, grid_size):
+    """
+    격자 근사 반발력 (다른 칸은 칸 중심, 같은 칸은 노드 쌍별로 계산)
+
+    칸 경계는 축별 좌표 분위수로 정하므로 노드가 한쪽에 몰려도 칸마다 노드 수가 비슷합니다.
+    """
+    n = len(coords)
+    quantiles = np.linspace(0, 1, grid_size + 1)[1:-1]
+    cell_x = np.searchsorted(np.quantile(coords[:, 0], quantiles), coords[:, 0], side="right")
+    cell_y = np.searchsorted(np.quantile(coords[:, 1], quantiles), coords[:, 1], side="right")
+    cell_id = cell_x * grid_size + cell_y
+
+    n_cells = grid_size * grid_size
+    mass = np.bincount(cell_id, minlength=n_cells).astype(float)
+    occupied = np.flatnonzero(mass)
+    centroids = np.stack([
+        np.bincount(cell_id, coords[:, 0], n_cells)[occupied],
+        np.bincount(cell_id, coords[:, 1], n_cells)[occupied]
+    ], axis=1) / mass[occupied][:, None]
+    masses = mass[occupied]
+
+    force = np.zeros_like(coords)
+    for start in range(0, n, REPULSION_CHUNK):
+        chunk = slice(start, start + REPULSION_CHUNK)
+        delta = coords[chunk, None, :] - centroids[None, :, :]
+        dist2 = np.maximum((delta ** 2).sum(axis=2), 1e-6)
+        weight = k2 * masses[None, :] / dist2
+        weight[cell_id[chunk][:, None] == occupied[None, :]] = 0.0  # 같은 칸은 아래에서 정확히
+        force[chunk] = (delta * weight[:, :, None]).sum(axis=1)
+
+    order = np.argsort(cell_id, kind="stable")
+    boundaries = np.flatnonzero(np.diff(cell_id[order])) + 1
+    for members in np.split(order, boundaries):
+        if len(members) < 2:
+            continue
+        delta = coords[members, None, :] - coords[None, members, :]
+        dist2 = np.maximum((delta ** 2).sum(axis=2), 1e-6)
+        np.fill_diagonal(dist2, np.inf)
+        force[members] += (delta * (k2 / dist2)[:, :, None]).sum(axis=1)
+    return force
+
+
+def grid_force_layout(G, pos=None, fixed=None, iterations=FULL_ITERATIONS, seed=LAYOUT_SEED,
+                      grid_size=GRAPH_LAYOUT_GRID_SIZE):
+    """
+    대규모 그래프용 force-directed layout (Fruchterman-Reingold, 반발력 격자 근사)
+
+    Args:
+        G: NetworkX 그래프 (방향은 무시)
+        pos: 초기 위치 dict (없는 노드는 난수)
+        fixed: 움직이지 않을 노드 목록 (pos에 있어야 함)
+        iterations: 반복 수
+        grid_size: 격자 한 변 칸 수
+
+    Returns:
+        dict: node -> np.array([x, y]) (fixed가 없으면 [-1, 1] 범위로 정규화)
+    """
+    nodes = list(G)
+    n = len(nodes)
+    if n == 0:
+        return {}
+    index = {node: i for i, node in enumerate(nodes)}
+
+    rng = np.random.default_rng(seed)
+    coords = rng.random((n, 2))
+    if pos:
+        known = [node for node in pos if node in index]
+        if known:
+            coords[[index[node] for node in known]] = np.array([pos[node] for node in known], dtype=float)
+    movable = np.ones(n, dtype=bool)
+    if fixed:
+        movable[[index[node] for node in fixed if node in index]] = False
+
+    # 인력용 엣지 목록 (양방향, self-loop 제외)
+    adjacency = nx.to_scipy_sparse_array(G, nodelist=nodes, weight=None, format="coo")
+    rows = np.concatenate([adjacency.row, adjacency.col])
+    cols = np.concatenate([adjacency.col, adjacency.row])
+    keep = rows != cols
+    rows, cols = rows[keep], cols[keep]
+
+    span = max((coords.max(axis=0) - coords.min(axis=0)).max(), 1e-3)
+    k = span / math.sqrt(n)  # 노드 간 적정 거리
+    temperature = span * 0.1
+    cooling = temperature / (iterations + 1)
+
+    for _ in range(iterations):
+        displacement = _repulsion(coords, k * k, grid_size)
+        delta = coords[rows] - coords[cols]
+        dist = np.maximum(np.linalg.norm(delta, axis=1), 1e-3)
+        attraction = delta * (dist / k)[:, None]
+        displacement[:, 0] -= np.bincount(rows, attraction[:, 0], n)
+        displacement[:, 1] -= np.bincount(rows, attraction[:, 1], n)
+
+        # 이동 거리는 temperature까지로 제한
+        length = np.maximum(np.linalg.norm(displacement, axis=1), 1e-9)
+        step = displacement * (np.minimum(length, temperature) / length)[:, None]
+        coords[movable] += step[movable]
+        temperature -= cooling
+
+    if not fixed:
+        coords = _rescale(coords)
+    return {node: coords[i] for i, node in enumerate(nodes)}
+
+
+def _spring_layout(G):
+    return nx.spring_layout(G, k=SPRING_K, iterations=FULL_ITERATIONS, seed=LAYOUT_SEED)
+
+
+def seed_new_nodes(G, cached, seed=LAYOUT_SEED):
+    """
+    새 노드의 초기 위치 (이미 배치된 이웃 위치의 평균 + 작은 흔들림, 이웃이 없으면 난수)
+
+    Returns:
+        tuple: (전체 노드 초기 위치 dict, 새 노드 리스트)
+    """
+    rng = np.random.default_rng(seed)
+    positions = {node: np.asarray(cached[node], dtype=float) for node in G if node in cached}
+    coords = np.array(list(positions.values()))
+    low, high = coords.min(axis=0), coords.max(axis=0)
+    jitter = max((high - low).max(), 1e-3) * 0.05
+
+    new_nodes = [node for node in G if node not in positions]
+    undirected = G.to_undirected(as_view=True)
+    for node in new_nodes:
+        placed = [positions[neighbor] for neighbor in undirected.neighbors(node) if neighbor in positions]
+        if placed:
+            positions[node] = np.mean(placed, axis=0) + rng.normal(0, jitter, 2)
+        else:
+            positions[node] = low + rng.random(2) * (high - low)
+    return positions, new_nodes
+
+
+def load_layout_cache(path=GRAPH_LAYOUT_CACHE_PATH):
+    """저장된 노드 위치 (없거나 버전이 다르면 빈 dict)"""
+    if not path or not os.path.exists(path):
+        return {}
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return {}
+    if data.get("version") != LAYOUT_VERSION:
+        return {}
+    return data.get("positions", {})
+
+
+def save_layout_cache(pos, path=GRAPH_LAYOUT_CACHE_PATH):
+    """노드 위치 저장 (임시 파일에 쓴 뒤 교체)"""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({
+            "version": LAYOUT_VERSION,
+            "positions": {str(node): [float(x), float(y)] for node, (x, y) in pos.items()}
+        }, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def compute_layout(G, cache_path=GRAPH_LAYOUT_CACHE_PATH):
+    """
+    노드 위치 계산 (캐시 재사용 / 새 노드만 배치 / 전체 계산)
+
+    Returns:
+        tuple: (pos dict, {"mode": "cached"|"incremental"|"full", "algorithm": "spring"|"grid", "new_nodes": int})
+    """
+    cached = load_layout_cache(cache_path) if cache_path else {}
+    known = sum(1 for node in G if node in cached)
+    new_count = G.number_of_nodes() - known
+
+    if known and new_count == 0:
+        pos = {node: np.asarray(cached[node], dtype=float) for node in G}
+        mode, algorithm = "cached", None
+    elif known and new_count <= G.number_of_nodes() * GRAPH_LAYOUT_INCREMENTAL_MAX_NEW_RATIO:
+        initial, _ = seed_new_nodes(G, cached)
+        fixed = [node for node in G if node in cached]
+        pos = grid_force_layout(G, pos=initial, fixed=fixed, iterations=GRAPH_LAYOUT_INCREMENTAL_ITERATIONS)
+        mode, algorithm = "incremental", "grid"
+    else:
+        if G.number_of_nodes() >= GRAPH_LAYOUT_FAST_NODE_THRESHOLD:
+            pos = grid_force_layout(G)
+            algorithm = "grid"
+        else:
+            pos = _spring_layout(G)
+            algorithm = "spring"
+        mode = "full"
+        new_count = G.number_of_nodes()
+    increment("graph_layout", mode=mode, algorithm=algorithm or "none")
+
+    if cache_path and mode != "cached":
+        save_layout_cache(pos, cache_path)
+    return pos, {"mode": mode, "algorithm": algorithm, "new_nodes": new_count}
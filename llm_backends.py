@@ -0,0 +1,299 @@
+"""
+LLM 백엔드
+
+Step 07은 백엔드의 generate()만 사용하므로 실제 API와 로컬 mock 서버를 바꿔 끼울 수 있습니다.
+  - GeminiBackend: Google Gemini API (google-generativeai)
+  - MockHTTPBackend: benchmarks/mock_llm_server.py 로컬 HTTP 서버
+    (네트워크 없이 스케줄러/재시도/캐시 부하 테스트용)
+
+config.LLM_BACKEND (환경 변수 LLM_BACKEND)로 선택합니다.
+
+generate()에 prompt의 고정 앞부분(prefix)을 함께 넘기면, context cache를 지원하는 백엔드는
+prefix를 제공자 측에 한 번 캐시하고 이후 요청에는 나머지 부분만 보냅니다.
+캐시를 만들 수 없으면(최소 크기 미만, 생성 실패) 전체 프롬프트를 그대로 보냅니다.
+캐시는 TTL 만료 전(LLM_CONTEXT_CACHE_REFRESH_MARGIN_SECONDS)에 새로 만들고, 제공자가 캐시를 찾을 수 없다고
+응답하면(만료/삭제) 핸들을 버리고 캐시 없이 한 번 다시 요청합니다.
+"""
+
+import asyncio
+import datetime
+import json
+import time
+import urllib.error
+import urllib.request
+from types import SimpleNamespace
+from llm_engine import RateLimitError
+from metrics import increment
+from token_counter import count_tokens
+from config import (
+    GEMINI_API_KEY,
+    LLM_BACKEND,
+    LLM_MOCK_URL,
+    LLM_REQUEST_TIMEOUT,
+    LLM_CONTEXT_CACHE_ENABLED,
+    LLM_CONTEXT_CACHE_MIN_TOKENS,
+    LLM_CONTEXT_CACHE_TTL_SECONDS,
+    LLM_CONTEXT_CACHE_REFRESH_MARGIN_SECONDS
+)
+
+
+def is_context_cache_missing_error(error):
+    """예외가 context cache를 찾을 수 없음(만료/삭제)인지 판단"""
+    message = str(error).lower()
+    return "cache" in message and ("not found" in message or "expired" in message or "404" in message)
+
+
+class LLMResponse:
+    """백엔드 공통 응답 (응답 텍스트 + 토큰 사용량)"""
+
+    def __init__(self, text, prompt_token_count=0, candidates_token_count=0, cached_content_token_count=0):
+        self.text = text
+        self.usage_metadata = SimpleNamespace(
+            prompt_token_count=prompt_token_count,  # context cache에서 읽은 토큰 포함
+            candidates_token_count=candidates_token_count,
+            total_token_count=prompt_token_count + candidates_token_count,
+            cached_content_token_count=cached_content_token_count
+        )
+
+
+class LLMBackend:
+    """백엔드 인터페이스"""
+
+    name = "base"
+    supports_context_cache = False
+    context_cache_min_tokens = 0
+
+    def __init__(self, model_name, context_cache=LLM_CONTEXT_CACHE_ENABLED):
+        self.model_name = model_name
+        self.context_cache = context_cache
+        self._context_caches = {}  # prefix -> (제공자 캐시 핸들, 생성 시각) (사용할 수 없으면 핸들이 None)
+        self._expired_caches = []  # 새로 만든 캐시로 교체된 이전 핸들 (close()에서 삭제)
+        self._context_cache_lock = asyncio.Lock()
+
+    async def generate(self, prompt, generation_config=None, prefix=None):
+        """
+        프롬프트 1개 생성 요청
+
+        prefix의 context cache가 있으면 나머지 부분만 보냅니다. 제공자가 캐시를 찾을 수 없다고 응답하면
+        핸들을 버리고(다음 요청에서 다시 생성) 이번 요청은 캐시 없이 전체 프롬프트로 한 번 다시 보냅니다.
+
+        Args:
+            prompt: 전체 프롬프트
+            generation_config: 생성 설정
+            prefix: prompt의 고정 앞부분 (context cache 재사용 대상)
+
+        Returns:
+            LLMResponse
+
+        Raises:
+            RateLimitError: 요청 한도 초과 (429)
+        """
+        handle = await self.get_context_cache(prefix)
+        if handle is not None:
+            try:
+                return await self._generate(prompt[len(prefix):], generation_config, handle)
+            except Exception as e:
+                if not is_context_cache_missing_error(e):
+                    raise
+                increment("llm_context_cache_missing", backend=self.name, model=self.model_name)
+                print(f"  [WARNING] context cache를 찾을 수 없음, 캐시 없이 다시 요청: {str(e)}")
+                await self.invalidate_context_cache(prefix, handle)
+        return await self._generate(prompt, generation_config, None)
+
+    async def _generate(self, prompt, generation_config, cache_handle):
+        """
+        백엔드별 생성 요청
+
+        Args:
+            prompt: 보낼 프롬프트 (cache_handle이 있으면 prefix를 뺀 나머지)
+            cache_handle: get_context_cache() 핸들 또는 None
+        """
+        raise NotImplementedError
+
+    async def get_context_cache(self, prefix):
+        """
+        prefix의 context cache 핸들 (처음 요청 시 생성, TTL 만료가 가까우면 새로 생성)
+
+        동시에 들어온 요청이 같은 prefix로 캐시를 여러 개 만들지 않도록 lock 안에서 생성합니다.
+
+        Returns:
+            백엔드별 캐시 핸들, 사용할 수 없으면 None
+        """
+        if not (self.context_cache and self.supports_context_cache and prefix):
+            return None
+
+        async with self._context_cache_lock:
+            entry = self._context_caches.get(prefix)
+            if entry is not None and entry[0] is not None:
+                age = time.monotonic() - entry[1]
+                if age >= LLM_CONTEXT_CACHE_TTL_SECONDS - LLM_CONTEXT_CACHE_REFRESH_MARGIN_SECONDS:
+                    # 진행 중인 요청이 이전 캐시를 쓰고 있을 수 있으므로 삭제는 close()에서
+                    self._expired_caches.append(entry[0])
+                    increment("llm_context_caches_refreshed", backend=self.name, model=self.model_name)
+                    entry = None
+            if entry is None:
+                handle = None
+                prefix_tokens = count_tokens(prefix)
+                if prefix_tokens >= self.context_cache_min_tokens:
+                    try:
+                        handle = await self._create_context_cache(prefix)
+                        increment("llm_context_caches_created", backend=self.name, model=self.model_name)
+                    except Exception as e:
+                        print(f"  [WARNING] context cache 생성 실패, 전체 프롬프트 전송: {str(e)}")
+                entry = self._context_caches[prefix] = (handle, time.monotonic())
+            return entry[0]
+
+    async def invalidate_context_cache(self, prefix, handle):
+        """제공자에 없는 캐시 핸들을 버림 (다른 요청이 이미 새로 만들었으면 그대로 둠)"""
+        async with self._context_cache_lock:
+            entry = self._context_caches.get(prefix)
+            if entry is not None and entry[0] is handle:
+                del self._context_caches[prefix]
+
+    async def _create_context_cache(self, prefix):
+        raise NotImplementedError
+
+    def _delete_context_cache(self, handle):
+        pass
+
+    def close(self):
+        """생성한 context cache 삭제"""
+        handles = [handle for handle, _ in self._context_caches.values()] + self._expired_caches
+        for handle in handles:
+            if handle is None:
+                continue
+            try:
+                self._delete_context_cache(handle)
+            except Exception as e:
+                print(f"  [WARNING] context cache 삭제 실패: {str(e)}")
+        self._context_caches = {}
+        self._expired_caches = []
+
+
+class GeminiBackend(LLMBackend):
+    """Google Gemini API 백엔드"""
+
+    name = "gemini"
+    supports_context_cache = True
+    context_cache_min_tokens = LLM_CONTEXT_CACHE_MIN_TOKENS
+
+    def __init__(self, model_name, api_key=GEMINI_API_KEY):
+        super().__init__(model_name)
+        if not api_key:
+            raise ValueError("GEMINI_API_KEY가 설정되지 않았습니다. .env 파일을 확인해주세요.")
+
+        import google.generativeai as genai
+
+        genai.configure(api_key=api_key)
+        self.genai = genai
+        self.model = genai.GenerativeModel(model_name)
+
+    async def _create_context_cache(self, prefix):
+        """CachedContent 생성 후 (캐시, 캐시를 쓰는 모델) 반환"""
+        from google.generativeai import caching
+
+        cached_content = await asyncio.to_thread(
+            caching.CachedContent.create,
+            model=f"models/{self.model_name}",
+            contents=[prefix],
+            ttl=datetime.timedelta(seconds=LLM_CONTEXT_CACHE_TTL_SECONDS)
+        )
+        return cached_content, self.genai.GenerativeModel.from_cached_content(cached_content=cached_content)
+
+    def _delete_context_cache(self, handle):
+        cached_content, _ = handle
+        cached_content.delete()
+
+    async def _generate(self, prompt, generation_config, cache_handle):
+        # prefix가 캐시에 있으면 캐시를 쓰는 모델로 나머지만 전송
+        model = cache_handle[1] if cache_handle is not None else self.model
+
+        # context cache를 쓰지 않아도 prefix가 고정이면 제공자의 implicit cache가 적용될 수 있음
+        response = await model.generate_content_async(prompt, generation_config=generation_config)
+        usage = response.usage_metadata
+        return LLMResponse(
+            response.text,
+            usage.prompt_token_count if usage else 0,
+            usage.candidates_token_count if usage else 0,
+            (getattr(usage, "cached_content_token_count", 0) or 0) if usage else 0
+        )
+
+
+class MockHTTPBackend(LLMBackend):
+    """
+    로컬 mock 서버 백엔드
+
+    POST {url}/generate 에 {"model", "prompt", "generation_config", "cached_content"}를 보내고
+    {"text", "usage": {"prompt_token_count", "candidates_token_count", "cached_content_token_count"}}를 받습니다.
+    context cache는 POST {url}/cache 로 만들고 DELETE {url}/cache/{name} 으로 지웁니다.
+    429 응답은 RateLimitError로 변환합니다.
+    """
+
+    name = "mock"
+    supports_context_cache = True
+
+    def __init__(self, model_name, url=LLM_MOCK_URL, timeout=LLM_REQUEST_TIMEOUT):
+        super().__init__(model_name)
+        self.url = url.rstrip("/")
+        self.timeout = timeout
+
+    def _post(self, path, payload, method="POST"):
+        request = urllib.request.Request(
+            f"{self.url}{path}",
+            data=json.dumps(payload, ensure_ascii=False).encode('utf-8'),
+            headers={"Content-Type": "application/json"},
+            method=method
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                return json.loads(response.read().decode('utf-8'))
+        except urllib.error.HTTPError as e:
+            body = e.read().decode('utf-8', errors='replace')
+            if e.code == 429:
+                retry_delay = e.headers.get("Retry-After")
+                raise RateLimitError(f"429 {body}", int(retry_delay) if retry_delay else None) from None
+            raise RuntimeError(f"HTTP {e.code}: {body}") from None
+
+    async def _create_context_cache(self, prefix):
+        data = await asyncio.to_thread(self._post, "/cache", {
+            "model": self.model_name,
+            "content": prefix,
+            "ttl_seconds": LLM_CONTEXT_CACHE_TTL_SECONDS
+        })
+        return data["name"]
+
+    def _delete_context_cache(self, handle):
+        self._post(f"/cache/{handle}", {}, method="DELETE")
+
+    async def _generate(self, prompt, generation_config, cache_handle):
+        data = await asyncio.to_thread(self._post, "/generate", {
+            "model": self.model_name,
+            "prompt": prompt,
+            "generation_config": generation_config or {},
+            "cached_content": cache_handle
+        })
+        usage = data.get("usage", {})
+        return LLMResponse(
+            data["text"],
+            usage.get("prompt_token_count", 0),
+            usage.get("candidates_token_count", 0),
+            usage.get("cached_content_token_count", 0)
+        )
+
+
+BACKENDS = {
+    "gemini": GeminiBackend,
+    "mock": MockHTTPBackend,
+}
+
+
+def create_backend(model_name, name=LLM_BACKEND):
+    """
+    설정된 백엔드 생성
+
+    Raises:
+        ValueError: 알 수 없는 백엔드 이름 또는 API 키 누락
+    """
+    if name not in BACKENDS:
+        raise ValueError(f"알 수 없는 LLM 백엔드: {name} (사용 가능: {', '.join(BACKENDS)})")
+    return BACKENDS[name](model_name)
@@ -0,0 +1,165 @@
+"""
+LLM 응답 캐시 (SQLite)
+
+(모델명, 완성된 프롬프트, generation config)의 해시를 키로 원본 응답 텍스트와
+usage_metadata를 디스크에 저장합니다. 같은 문서를 다시 실행하면 API를 호출하지 않고
+저장된 응답을 사용하므로 비용과 지연이 0이 됩니다.
+
+오래된 항목(LLM_CACHE_MAX_AGE_DAYS)과 용량 초과분(LLM_CACHE_MAX_BYTES, 마지막 사용 시각이
+오래된 순)은 evict()로 정리합니다.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from types import SimpleNamespace
+from metrics import increment
+
+# usage_metadata에서 저장하는 필드
+USAGE_FIELDS = ("prompt_token_count", "candidates_token_count", "total_token_count", "cached_content_token_count")
+
+
+def make_cache_key(model_name, prompt, generation_config=None):
+    """캐시 키: 모델명 + 프롬프트 + generation config의 SHA-256"""
+    payload = json.dumps({
+        "model": model_name,
+        "prompt": prompt,
+        "generation_config": generation_config or {}
+    }, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def usage_to_dict(usage):
+    """usage_metadata 객체를 JSON 저장용 dict로 변환"""
+    if usage is None:
+        return None
+    return {field: getattr(usage, field, None) for field in USAGE_FIELDS}
+
+
+def usage_from_dict(data):
+    """저장된 dict를 usage_metadata처럼 속성으로 접근 가능한 객체로 변환"""
+    if data is None:
+        return None
+    return SimpleNamespace(**{field: data.get(field) or 0 for field in USAGE_FIELDS})
+
+
+class LLMResponseCache:
+    """SQLite 기반 LLM 응답 캐시"""
+
+    def __init__(self, path, max_age_days=None, max_bytes=None):
+        self.path = path
+        self.max_age_days = max_age_days
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                model TEXT NOT NULL,
+                response_text TEXT NOT NULL,
+                usage_json TEXT,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                last_accessed REAL NOT NULL
+            )
+        """)
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_last_accessed ON responses(last_accessed)")
+        self.conn.commit()
+
+    def get(self, key):
+        """
+        캐시 조회
+
+        Returns:
+            tuple: (response_text, usage) 또는 캐시에 없으면 (None, None)
+        """
+        row = self.conn.execute(
+            "SELECT response_text, usage_json, created_at FROM responses WHERE key = ?", (key,)
+        ).fetchone()
+
+        if row and self.max_age_days is not None and time.time() - row[2] > self.max_age_days * 86400:
+            self.delete(key)
+            row = None
+
+        if row is None:
+            self.misses += 1
+            increment("llm_cache_misses")
+            return None, None
+
+        self.conn.execute("UPDATE responses SET last_accessed = ? WHERE key = ?", (time.time(), key))
+        self.conn.commit()
+        self.hits += 1
+        increment("llm_cache_hits")
+        usage = usage_from_dict(json.loads(row[1])) if row[1] else None
+        return row[0], usage
+
+    def put(self, key, model_name, response_text, usage=None):
+        """응답 저장 (같은 키가 있으면 덮어씀)"""
+        now = time.time()
+        usage_json = json.dumps(usage_to_dict(usage)) if usage is not None else None
+        size = len(response_text.encode('utf-8')) + len(usage_json or "")
+        self.conn.execute(
+            "INSERT OR REPLACE INTO responses "
+            "(key, model, response_text, usage_json, size, created_at, last_accessed) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (key, model_name, response_text, usage_json, size, now, now)
+        )
+        self.conn.commit()
+
+    def delete(self, key):
+        """항목 삭제 (파싱할 수 없는 응답 등)"""
+        self.conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+        self.conn.commit()
+
+    def evict(self):
+        """
+        만료/용량 초과 항목 정리
+
+        Returns:
+            int: 삭제된 항목 수
+        """
+        removed = 0
+        if self.max_age_days is not None:
+            cutoff = time.time() - self.max_age_days * 86400
+            removed += self.conn.execute("DELETE FROM responses WHERE created_at < ?", (cutoff,)).rowcount
+
+        if self.max_bytes is not None:
+            total = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+            if total > self.max_bytes:
+                # 마지막 사용 시각이 오래된 순으로 초과분 삭제
+                excess = total - self.max_bytes
+                freed = 0
+                keys = []
+                for key, size in self.conn.execute("SELECT key, size FROM responses ORDER BY last_accessed"):
+                    if freed >= excess:
+                        break
+                    keys.append((key,))
+                    freed += size
+                self.conn.executemany("DELETE FROM responses WHERE key = ?", keys)
+                removed += len(keys)
+
+        self.conn.commit()
+        if removed:
+            increment("llm_cache_evictions", removed)
+        return removed
+
+    def stats(self):
+        """캐시 통계"""
+        count, total = self.conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+        lookups = self.hits + self.misses
+        return {
+            "entries": count,
+            "bytes": total,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups * 100, 1) if lookups else 0
+        }
+
+    def close(self):
+        self.conn.close()
@@ -0,0 +1,165 @@
+"""
+비동기 LLM 추출 엔진
+
+여러 문서를 동시에 LLM에 요청하면서 제공자 할당량(RPM/TPM)을 넘지 않도록 조절합니다.
+  - 동시 요청 수 제한 (asyncio.Semaphore)
+  - 적응형 Rate limiter: 429 응답 시 속도를 절반으로 줄이고 잠시 멈춘 뒤,
+    성공이 이어지면 분당 요청 수를 조금씩 다시 올림 (AIMD)
+  - 최근 60초 구간의 요청 수/토큰 수로 RPM/TPM 예산 관리
+  - 요청별 timeout
+
+한 요청이 429를 받아도 전체 실행을 멈추지 않고, 해당 시점 이후 요청만 늦춰집니다.
+"""
+
+import asyncio
+import re
+import time
+from collections import deque
+
+# Rate limiter 조절 상수
+RATE_DECREASE_FACTOR = 0.5  # 429 발생 시 RPM 배율
+RATE_INCREASE_STEP = 1  # 성공 시 RPM 증가량
+MIN_RPM = 1
+DEFAULT_RETRY_DELAY = 60  # 429 응답에 retry_delay가 없을 때 대기 시간 (초)
+WINDOW_SECONDS = 60
+
+
+class RateLimitError(Exception):
+    """제공자가 요청 한도 초과(429)를 반환"""
+
+    def __init__(self, message, retry_delay=None):
+        super().__init__(message)
+        self.retry_delay = retry_delay
+
+
+def is_rate_limit_error(error):
+    """예외가 429/할당량 초과인지 판단"""
+    if isinstance(error, RateLimitError):
+        return True
+    message = str(error)
+    return "429" in message or "quota" in message.lower()
+
+
+def parse_retry_delay(error):
+    """429 에러 메시지에서 retry_delay(초) 추출, 없으면 None"""
+    if isinstance(error, RateLimitError) and error.retry_delay is not None:
+        return error.retry_delay
+    match = re.search(r'retry_delay.*?seconds: (\d+)', str(error))
+    return int(match.group(1)) if match else None
+
+
+class AdaptiveRateLimiter:
+    """
+    RPM/TPM 예산 안에서 요청 속도를 조절하는 limiter
+
+    acquire()로 요청 슬롯을 얻고, 요청이 끝나면 record_usage()로 실제 토큰 수를 반영합니다.
+    429 응답은 on_rate_limit(), 정상 응답은 on_success()로 알려줍니다.
+    """
+
+    def __init__(self, rpm_limit, tpm_limit, initial_rpm=None):
+        self.rpm_limit = rpm_limit
+        self.tpm_limit = tpm_limit
+        self.current_rpm = float(initial_rpm or rpm_limit)
+        self.paused_until = 0.0
+        self._requests = deque()  # (timestamp, request_id)
+        self._tokens = {}  # request_id -> (timestamp, tokens)
+        self._next_id = 0
+        self._lock = asyncio.Lock()
+        self.rate_limit_events = 0
+
+    def _prune(self, now):
+        cutoff = now - WINDOW_SECONDS
+        while self._requests and self._requests[0][0] < cutoff:
+            _, request_id = self._requests.popleft()
+            self._tokens.pop(request_id, None)
+
+    def _window_tokens(self):
+        return sum(tokens for _, tokens in self._tokens.values())
+
+    def _wait_time(self, now, estimated_tokens):
+        """지금 요청을 보낼 수 없다면 기다려야 할 시간 (초)"""
+        if now < self.paused_until:
+            return self.paused_until - now
+
+        waits = []
+        # 분당 요청 수: 요청 간 최소 간격 + 60초 구간 내 요청 수
+        if self._requests:
+            min_interval = WINDOW_SECONDS / self.current_rpm
+            since_last = now - self._requests[-1][0]
+            if since_last < min_interval:
+                waits.append(min_interval - since_last)
+            if len(self._requests) >= self.current_rpm:
+                waits.append(self._requests[0][0] + WINDOW_SECONDS - now)
+
+        # 분당 토큰 수: 예산을 넘으면 가장 오래된 요청이 구간을 벗어날 때까지 대기
+        if self._tokens and self._window_tokens() + estimated_tokens > self.tpm_limit:
+            oldest = min(ts for ts, _ in self._tokens.values())
+            waits.append(oldest + WINDOW_SECONDS - now)
+
+        return max(waits) if waits else 0.0
+
+    async def acquire(self, estimated_tokens):
+        """
+        요청 슬롯 확보 (필요하면 대기)
+
+        Returns:
+            int: record_usage()에 전달할 요청 id
+        """
+        while True:
+            async with self._lock:
+                now = time.monotonic()
+                self._prune(now)
+                wait = self._wait_time(now, estimated_tokens)
+                if wait <= 0:
+                    request_id = self._next_id
+                    self._next_id += 1
+                    self._requests.append((now, request_id))
+                    self._tokens[request_id] = (now, estimated_tokens)
+                    return request_id
+            await asyncio.sleep(min(wait, 1.0))
+
+    def record_usage(self, request_id, actual_tokens):
+        """추정 토큰 수를 실제 사용량으로 교체"""
+        if request_id in self._tokens:
+            timestamp, _ = self._tokens[request_id]
+            self._tokens[request_id] = (timestamp, actual_tokens)
+
+    def on_success(self):
+        """성공 응답: RPM을 한도까지 조금씩 회복"""
+        self.current_rpm = min(self.rpm_limit, self.current_rpm + RATE_INCREASE_STEP)
+
+    def on_rate_limit(self, retry_delay=None):
+        """429 응답: RPM을 줄이고 retry_delay 동안 새 요청 중단"""
+        self.rate_limit_events += 1
+        self.current_rpm = max(MIN_RPM, self.current_rpm * RATE_DECREASE_FACTOR)
+        delay = retry_delay if retry_delay is not None else DEFAULT_RETRY_DELAY
+        self.paused_until = max(self.paused_until, time.monotonic() + delay)
+        return delay
+
+
+async def run_concurrently(items, worker, concurrency, on_result=None):
+    """
+    items를 최대 concurrency개씩 동시에 worker로 처리
+
+    Args:
+        items: 처리할 항목 리스트
+        worker: async 함수 worker(item) -> result
+        concurrency: 최대 동시 실행 수
+        on_result: 항목이 끝날 때마다 호출되는 콜백 on_result(item, result)
+                   (완료 순서대로 호출되므로 진행 상황 출력/저장에 사용)
+
+    Returns:
+        list: items와 같은 순서의 결과 리스트
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    results = [None] * len(items)
+
+    async def run_one(index, item):
+        async with semaphore:
+            result = await worker(item)
+        results[index] = result
+        if on_result:
+            on_result(item, result)
+
+    await asyncio.gather(*(run_one(i, item) for i, item in enumerate(items)))
+    return results
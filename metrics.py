@@ -0,0 +1,231 @@
+"""
+파이프라인 계측 (타이머, 카운터, 히스토그램)
+
+각 단계 스크립트의 hot path에서 소요 시간과 처리량을 기록하고,
+실행이 끝나면 기계가 읽을 수 있는 지표 파일로 저장합니다.
+  - {METRICS_DIR}/{run_name}_{YYYYMMDD_HHMMSS}.json : 실행별 JSON
+  - {METRICS_DIR}/{run_name}.prom                   : Prometheus text format (마지막 실행)
+
+사용 예:
+    from metrics import timer, increment, observe_count, write_metrics
+
+    with timer("extract_pdf_page"):
+        page.extract_text()
+    increment("pages_extracted")
+    observe_count("relations_per_document", 12)
+    write_metrics("04_extract_text")
+"""
+
+import json
+import os
+import re
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from datetime import datetime
+from config import METRICS_DIR
+
+# Prometheus 지표 이름 접두사
+METRIC_PREFIX = "pwc"
+
+# 히스토그램 기본 버킷 (초 단위 소요 시간에 맞춤)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+# 개수 히스토그램 버킷 (문서당 관계 수, chunk 수 등 정수 값)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 200, 500, 1000)
+
+
+def _escape_label(value):
+    """Prometheus 라벨 값 이스케이프"""
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class _Histogram:
+    def __init__(self, buckets, timed=True):
+        self.buckets = buckets
+        self.timed = timed  # 소요 시간(초) 히스토그램이면 처리량(rate_per_sec)도 기록
+        self.bucket_counts = [0] * len(buckets)
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+
+    def observe(self, value):
+        self.count += 1
+        self.total += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+        idx = bisect_left(self.buckets, value)
+        if idx < len(self.bucket_counts):
+            self.bucket_counts[idx] += 1
+
+    def to_dict(self):
+        cumulative = []
+        running = 0
+        for upper, n in zip(self.buckets, self.bucket_counts):
+            running += n
+            cumulative.append({"le": upper, "count": running})
+        result = {
+            "count": self.count,
+            "sum": round(self.total, 6),
+            "min": self.min,
+            "max": self.max,
+            "mean": round(self.total / self.count, 6) if self.count else None
+        }
+        if self.timed:
+            result["rate_per_sec"] = round(self.count / self.total, 3) if self.total > 0 else None
+        result["buckets"] = cumulative
+        return result
+
+
+class MetricsRegistry:
+    """프로세스 단위 지표 저장소"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.started_at = datetime.now()
+        self._start = time.perf_counter()
+        self.counters = {}
+        self.histograms = {}
+
+    @staticmethod
+    def _key(name, labels):
+        if not labels:
+            return (name, ())
+        return (name, tuple(sorted((k, str(v)) for k, v in labels.items())))
+
+    def increment(self, name, value=1, **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name, value, buckets=DEFAULT_BUCKETS, timed=True, **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            if key not in self.histograms:
+                self.histograms[key] = _Histogram(buckets, timed)
+            self.histograms[key].observe(value)
+
+    def elapsed(self):
+        return time.perf_counter() - self._start
+
+    def to_dict(self, run_name):
+        def label_dict(labels):
+            return dict(labels) if labels else {}
+
+        with self._lock:
+            return {
+                "run": {
+                    "name": run_name,
+                    "started_at": self.started_at.isoformat(),
+                    "finished_at": datetime.now().isoformat(),
+                    "elapsed_seconds": round(self.elapsed(), 3)
+                },
+                "counters": [
+                    {"name": name, "labels": label_dict(labels), "value": value}
+                    for (name, labels), value in sorted(self.counters.items())
+                ],
+                "histograms": [
+                    {"name": name, "labels": label_dict(labels), **hist.to_dict()}
+                    for (name, labels), hist in sorted(self.histograms.items())
+                ]
+            }
+
+    def to_prometheus(self, run_name):
+        def metric_name(name):
+            return f"{METRIC_PREFIX}_{re.sub(r'[^a-zA-Z0-9_]', '_', name)}"
+
+        def format_labels(labels, extra=None):
+            pairs = [("run", run_name)] + list(labels) + (extra or [])
+            return "{" + ",".join(f'{k}="{_escape_label(v)}"' for k, v in pairs) + "}"
+
+        lines = []
+        with self._lock:
+            seen = set()
+            for (name, labels), value in sorted(self.counters.items()):
+                metric = metric_name(name) + "_total"
+                if metric not in seen:
+                    lines.append(f"# TYPE {metric} counter")
+                    seen.add(metric)
+                lines.append(f"{metric}{format_labels(labels)} {value}")
+
+            for (name, labels), hist in sorted(self.histograms.items()):
+                metric = metric_name(name)
+                if metric not in seen:
+                    lines.append(f"# TYPE {metric} histogram")
+                    seen.add(metric)
+                running = 0
+                for upper, n in zip(hist.buckets, hist.bucket_counts):
+                    running += n
+                    lines.append(f"{metric}_bucket{format_labels(labels, [('le', upper)])} {running}")
+                lines.append(f"{metric}_bucket{format_labels(labels, [('le', '+Inf')])} {hist.count}")
+                lines.append(f"{metric}_sum{format_labels(labels)} {hist.total}")
+                lines.append(f"{metric}_count{format_labels(labels)} {hist.count}")
+
+            elapsed_metric = metric_name("run_elapsed_seconds")
+            lines.append(f"# TYPE {elapsed_metric} gauge")
+            lines.append(f"{elapsed_metric}{format_labels(())} {self.elapsed():.3f}")
+
+        return "\n".join(lines) + "\n"
+
+
+# 스크립트 전체에서 공유하는 기본 저장소
+REGISTRY = MetricsRegistry()
+
+
+def increment(name, value=1, **labels):
+    """카운터 증가"""
+    REGISTRY.increment(name, value, **labels)
+
+
+def observe(name, value, **labels):
+    """소요 시간(초) 히스토그램에 값 기록"""
+    REGISTRY.observe(name, value, **labels)
+
+
+def observe_count(name, value, **labels):
+    """개수 히스토그램에 값 기록 (정수 버킷, 처리량은 기록하지 않음)"""
+    REGISTRY.observe(name, value, COUNT_BUCKETS, timed=False, **labels)
+
+
+@contextmanager
+def timer(name, **labels):
+    """
+    블록 소요 시간(초)을 히스토그램 `{name}_seconds`에 기록
+
+    예외가 발생해도 시간은 기록되며, 실패 횟수는 `{name}_errors` 카운터에 남습니다.
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    except BaseException:
+        REGISTRY.increment(f"{name}_errors", **labels)
+        raise
+    finally:
+        REGISTRY.observe(f"{name}_seconds", time.perf_counter() - start, **labels)
+
+
+def write_metrics(run_name):
+    """
+    현재까지 수집된 지표를 파일로 저장
+
+    Args:
+        run_name: 실행 이름 (예: "04_extract_text")
+
+    Returns:
+        str: 저장된 JSON 파일 경로
+    """
+    os.makedirs(METRICS_DIR, exist_ok=True)
+    timestamp = REGISTRY.started_at.strftime("%Y%m%d_%H%M%S")
+
+    json_path = f"{METRICS_DIR}/{run_name}_{timestamp}.json"
+    with open(json_path, 'w', encoding='utf-8') as f:
+        json.dump(REGISTRY.to_dict(run_name), f, ensure_ascii=False, indent=2)
+
+    prom_path = f"{METRICS_DIR}/{run_name}.prom"
+    with open(prom_path, 'w', encoding='utf-8') as f:
+        f.write(REGISTRY.to_prometheus(run_name))
+
+    print(f"  지표 저장: {json_path}")
+    return json_path
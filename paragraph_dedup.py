@@ -0,0 +1,214 @@
+"""
+문서 간 중복 문단 제거 (MinHash + LSH)
+
+증권사 리포트는 면책 문구나 재활용된 분석 문단이 여러 주에 걸쳐 반복됩니다.
+전체 코퍼스의 TV 문단을 MinHash 서명으로 LSH 버킷에 넣어 유사 문단 후보를 찾고,
+추정 Jaccard 유사도가 임계값 이상인 문단끼리 클러스터로 묶습니다.
+클러스터마다 가장 이른 문서의 문단 하나만 원본(canonical)으로 남기고
+나머지는 원본을 가리키도록 표시합니다. 원본 → 중복 역참조는 클러스터 목록에 기록됩니다.
+"""
+
+import hashlib
+import json
+import re
+import zlib
+import numpy as np
+from config import (
+    DEDUP_SIMILARITY_THRESHOLD,
+    DEDUP_NUM_PERM,
+    DEDUP_BANDS,
+    DEDUP_SHINGLE_SIZE
+)
+from token_counter import count_tokens, tokenizer_name
+
+# 해시 순열 계수 (고정 시드: 실행마다 같은 서명이 나와야 저장/비교 가능)
+_MERSENNE_PRIME = np.uint64(4294967311)  # 2^32 보다 큰 소수
+_MAX_HASH = np.uint64(4294967295)
+_rng = np.random.RandomState(42)
+_PERM_A = _rng.randint(1, 2 ** 31, size=DEDUP_NUM_PERM).astype(np.uint64)
+_PERM_B = _rng.randint(0, 2 ** 31, size=DEDUP_NUM_PERM).astype(np.uint64)
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def _shingles(text):
+    """공백 정규화 후 문자 n-gram 집합"""
+    normalized = _WHITESPACE_RE.sub(" ", text.lower()).strip()
+    n = DEDUP_SHINGLE_SIZE
+    if len(normalized) <= n:
+        return {normalized}
+    return {normalized[i:i + n] for i in range(len(normalized) - n + 1)}
+
+
+def minhash_signature(text):
+    """
+    문단 MinHash 서명 계산
+
+    Args:
+        text: 문단 텍스트
+
+    Returns:
+        list: DEDUP_NUM_PERM 길이의 정수 리스트
+    """
+    hashes = np.fromiter(
+        (zlib.crc32(s.encode("utf-8")) for s in _shingles(text)),
+        dtype=np.uint64
+    )
+    # (num_perm, n_shingles) 행렬에서 순열별 최솟값
+    permuted = (np.outer(_PERM_A, hashes) + _PERM_B[:, None]) % _MERSENNE_PRIME
+    return (permuted & _MAX_HASH).min(axis=1).tolist()
+
+
+def estimate_similarity(sig_a, sig_b):
+    """두 MinHash 서명의 추정 Jaccard 유사도"""
+    matches = sum(1 for a, b in zip(sig_a, sig_b) if a == b)
+    return matches / len(sig_a)
+
+
+def _band_keys(signature):
+    """서명을 밴드로 나눈 LSH 버킷 키"""
+    rows = len(signature) // DEDUP_BANDS
+    return [
+        (band, tuple(signature[band * rows:(band + 1) * rows]))
+        for band in range(DEDUP_BANDS)
+    ]
+
+
+class _UnionFind:
+    def __init__(self):
+        self.parent = {}
+
+    def find(self, x):
+        self.parent.setdefault(x, x)
+        while self.parent[x] != x:
+            self.parent[x] = self.parent[self.parent[x]]
+            x = self.parent[x]
+        return x
+
+    def union(self, a, b):
+        root_a, root_b = self.find(a), self.find(b)
+        if root_a == root_b:
+            return
+        # 우선순위가 앞선(작은) 키가 루트가 되도록 유지
+        if root_b < root_a:
+            root_a, root_b = root_b, root_a
+        self.parent[root_b] = root_a
+
+
+def paragraph_signature(text):
+    """
+    중복 비교에 필요한 문단 요약 정보 (상태 파일에 저장해 재사용)
+
+    Returns:
+        dict: {"minhash": [...], "token_count": int}
+    """
+    return {
+        "minhash": minhash_signature(text),
+        "token_count": count_tokens(text)
+    }
+
+
+def signature_settings_fingerprint():
+    """
+    저장된 문단 서명이 유효한지 판단하는 설정 fingerprint
+
+    MinHash 순열 수/밴드 수/shingle 크기나 토큰 카운터가 바뀌면 이전 서명과 비교할 수 없습니다.
+    """
+    payload = json.dumps({
+        "num_perm": DEDUP_NUM_PERM,
+        "bands": DEDUP_BANDS,
+        "shingle_size": DEDUP_SHINGLE_SIZE,
+        "tokenizer": tokenizer_name()
+    }, sort_keys=True)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def deduplicate_paragraphs(entries):
+    """
+    코퍼스 전체에서 유사 중복 문단을 클러스터링
+
+    문단 텍스트 대신 미리 계산된 서명만 사용하므로, 변경되지 않은 문서는
+    파일을 다시 읽지 않고 이전 실행의 서명을 재사용할 수 있습니다.
+
+    Args:
+        entries: [{"filename", "paragraph_index", "minhash", "token_count"}, ...]
+                 원본 우선순위 순으로 정렬되어 있어야 함 (앞쪽 문단이 원본이 됨)
+
+    Returns:
+        dict: {
+            "clusters": [{"canonical", "members", "token_count"}, ...],
+            "duplicate_of": {filename: {paragraph_index: {"filename", "paragraph_index"}}},
+            "statistics": {"total_paragraphs", "duplicate_paragraphs", "cluster_count",
+                           "total_tokens", "duplicate_tokens", "token_reduction_rate"}
+        }
+    """
+    buckets = {}
+    union_find = _UnionFind()
+
+    for position, entry in enumerate(entries):
+        union_find.find(position)
+        signature = entry["minhash"]
+        for band_key in _band_keys(signature):
+            bucket = buckets.setdefault(band_key, [])
+            represented = False
+            for other in bucket:
+                if union_find.find(other) == union_find.find(position):
+                    represented = True
+                    continue
+                if estimate_similarity(signature, entries[other]["minhash"]) >= DEDUP_SIMILARITY_THRESHOLD:
+                    union_find.union(other, position)
+                    represented = True
+            # 같은 클러스터가 이미 버킷에 있으면 추가하지 않음 (반복 문구 버킷 비대화 방지)
+            if not represented:
+                bucket.append(position)
+
+    # 루트별 클러스터 구성 (position 순서 = 우선순위 순서)
+    members_by_root = {}
+    for position in range(len(entries)):
+        members_by_root.setdefault(union_find.find(position), []).append(position)
+
+    clusters = []
+    duplicate_of = {}
+    total_tokens = sum(entry["token_count"] for entry in entries)
+    duplicate_tokens = 0
+    duplicate_paragraphs = 0
+
+    for members in members_by_root.values():
+        if len(members) < 2:
+            continue
+        canonical = entries[members[0]]
+        canonical_ref = {
+            "filename": canonical["filename"],
+            "paragraph_index": canonical["paragraph_index"]
+        }
+        member_refs = []
+        for position in members[1:]:
+            entry = entries[position]
+            duplicate_of.setdefault(entry["filename"], {})[entry["paragraph_index"]] = canonical_ref
+            member_refs.append({
+                "filename": entry["filename"],
+                "paragraph_index": entry["paragraph_index"],
+                "similarity": round(estimate_similarity(entry["minhash"], canonical["minhash"]), 3)
+            })
+            duplicate_paragraphs += 1
+            duplicate_tokens += entry["token_count"]
+        clusters.append({
+            "canonical": canonical_ref,
+            "members": member_refs,
+            "token_count": canonical["token_count"]
+        })
+
+    clusters.sort(key=lambda c: len(c["members"]), reverse=True)
+
+    return {
+        "clusters": clusters,
+        "duplicate_of": duplicate_of,
+        "statistics": {
+            "total_paragraphs": len(entries),
+            "duplicate_paragraphs": duplicate_paragraphs,
+            "cluster_count": len(clusters),
+            "total_tokens": total_tokens,
+            "duplicate_tokens": duplicate_tokens,
+            "token_reduction_rate": round(duplicate_tokens / total_tokens * 100, 1) if total_tokens else 0
+        }
+    }
@@ -0,0 +1,475 @@
+"""
+LLM 추출 전 로컬 문단 사전 분류 (2단계 추출의 1단계)
+
+TV 문단마다 KPI-Factor 관계가 들어 있을 확률을 로컬에서 계산하고,
+PRESCREEN_THRESHOLD 이상인 문단만 Step 07의 LLM 요청에 넣습니다.
+  - 사전 특징: KPI_LIST/FACTOR_LIST 용어와 동의어(KPI_FACTOR_SYNONYMS) 출현
+  - 텍스트 특징: 단어 + 문자 bigram (hashing trick)
+  - 분류기: 로지스틱 회귀 (SGD), 이전 Step 07 결과로 학습
+    (관계의 evidence가 들어 있는 문단 = 양성, LLM에 보냈지만 관계가 없던 문단 = 음성)
+
+학습된 모델이 없으면 사전 규칙(KPI와 Factor가 함께 등장하면 1.0, 한쪽만 0.5)으로 점수를 매깁니다.
+
+단독 실행하면 문서 단위로 학습/평가 세트를 나눠 threshold별 precision/recall과
+LLM에 전달되는 문단/문자 비율(비용)을 출력하고, 전체 데이터로 다시 학습한 모델을 저장합니다.
+
+사용 예:
+    python prescreen.py
+"""
+
+import json
+import math
+import os
+import re
+import zlib
+from collections import Counter
+from datetime import datetime
+import numpy as np
+from metrics import timer, increment, write_metrics
+from config import (
+    KPI_LIST,
+    FACTOR_LIST,
+    FILTERED_DIR,
+    TV_CONTENT_DIR,
+    TV_CONTENT_CONSENSUS_DIR,
+    PROCESSED_DIR,
+    PRESCREEN_MODEL_PATH,
+    PRESCREEN_THRESHOLD,
+    PRESCREEN_HOLDOUT_RATIO,
+    KPI_FACTOR_SYNONYMS
+)
+
+# 평가 리포트에 출력할 threshold
+EVAL_THRESHOLDS = (0.05, 0.1, 0.2, 0.3, 0.4, 0.5, 0.7, 0.9)
+
+# 특징 해시 공간 크기와 학습 설정
+HASH_DIMENSIONS = 2 ** 18
+LEARNING_RATE = 0.1
+L2_PENALTY = 1e-6
+EPOCHS = 8
+LEXICON_FEATURE_WEIGHT = 3.0  # 사전 특징 가중치 (bigram 수백 개에 묻히지 않도록)
+
+# evidence가 문단에 들어 있다고 볼 문자 bigram 포함 비율
+EVIDENCE_MATCH_RATIO = 0.8
+
+_WHITESPACE_RE = re.compile(r"\s+")
+_WORD_RE = re.compile(r"[0-9a-z가-힣/]+")
+
+
+def build_lexicon():
+    """
+    KPI/Factor 사전 생성
+
+    Returns:
+        dict: 소문자 용어 -> (종류 "kpi" | "factor", 대표 용어)
+    """
+    lexicon = {}
+    for kind, terms in (("kpi", KPI_LIST), ("factor", FACTOR_LIST)):
+        for term in terms:
+            for synonym in [term] + KPI_FACTOR_SYNONYMS.get(term, []):
+                lexicon[synonym.lower()] = (kind, term)
+    return lexicon
+
+
+LEXICON = build_lexicon()
+
+
+def lexicon_hits(text):
+    """
+    문단에 등장한 KPI/Factor (동의어는 대표 용어로)
+
+    Returns:
+        tuple: (KPI 집합, Factor 집합)
+    """
+    text_lower = text.lower()
+    kpis = set()
+    factors = set()
+    for term, (kind, canonical) in LEXICON.items():
+        if term in text_lower:
+            (kpis if kind == "kpi" else factors).add(canonical)
+    return kpis, factors
+
+
+def lexicon_score(text):
+    """사전 규칙 점수: KPI와 Factor가 함께 등장하면 1.0, 한쪽만 0.5, 없으면 0"""
+    kpis, factors = lexicon_hits(text)
+    if kpis and factors:
+        return 1.0
+    if kpis or factors:
+        return 0.5
+    return 0.0
+
+
+def extract_features(text):
+    """
+    문단 특징 추출
+
+    Returns:
+        Counter: 특징 이름 -> 값 (단어, 문자 bigram, 사전 특징)
+    """
+    text_lower = text.lower()
+    features = Counter()
+    for word in _WORD_RE.findall(text_lower):
+        features[f"w:{word}"] += 1
+    compact = _WHITESPACE_RE.sub("", text_lower)
+    for i in range(len(compact) - 1):
+        features[f"c:{compact[i:i + 2]}"] += 1
+
+    kpis, factors = lexicon_hits(text)
+    for kpi in kpis:
+        features[f"kpi:{kpi}"] += LEXICON_FEATURE_WEIGHT
+    for factor in factors:
+        features[f"factor:{factor}"] += LEXICON_FEATURE_WEIGHT
+    if kpis and factors:
+        lexicon_class = "both"
+    elif kpis or factors:
+        lexicon_class = "one"
+    else:
+        lexicon_class = "none"
+    features[f"lex:{lexicon_class}"] += LEXICON_FEATURE_WEIGHT
+    return features
+
+
+def _hash_features(features):
+    """특징 dict를 (인덱스 배열, 값 배열)로 변환 (값은 문단 길이에 덜 민감하도록 log 스케일)"""
+    buckets = Counter()
+    for name, value in features.items():
+        buckets[zlib.crc32(name.encode('utf-8')) % HASH_DIMENSIONS] += math.log1p(value)
+    indices = np.fromiter(buckets.keys(), dtype=np.int64, count=len(buckets))
+    values = np.fromiter(buckets.values(), dtype=np.float64, count=len(buckets))
+    return indices, values
+
+
+class PrescreenModel:
+    """hashing trick 특징의 로지스틱 회귀 (SGD)"""
+
+    def __init__(self, weights=None, bias=0.0):
+        self.weights = weights if weights is not None else np.zeros(HASH_DIMENSIONS)
+        self.bias = bias
+
+    def _logit(self, indices, values):
+        return float(self.weights[indices] @ values) + self.bias
+
+    def fit(self, texts, labels, epochs=EPOCHS, seed=42):
+        """
+        문단 텍스트와 레이블(0/1)로 학습
+
+        Returns:
+            PrescreenModel: self
+        """
+        samples = [_hash_features(extract_features(text)) for text in texts]
+        labels = np.asarray(labels, dtype=np.float64)
+        rng = np.random.RandomState(seed)
+
+        for epoch in range(epochs):
+            learning_rate = LEARNING_RATE / (1 + epoch)
+            for i in rng.permutation(len(samples)):
+                indices, values = samples[i]
+                logit = max(min(self._logit(indices, values), 30.0), -30.0)
+                gradient = 1.0 / (1.0 + math.exp(-logit)) - labels[i]
+                self.weights[indices] -= learning_rate * (gradient * values + L2_PENALTY * self.weights[indices])
+                self.bias -= learning_rate * gradient
+        return self
+
+    def predict_proba(self, text):
+        """문단에 관계가 들어 있을 확률"""
+        logit = max(min(self._logit(*_hash_features(extract_features(text))), 30.0), -30.0)
+        return 1.0 / (1.0 + math.exp(-logit))
+
+    def save(self, path, metadata=None):
+        """0이 아닌 가중치만 JSON으로 저장"""
+        nonzero = np.flatnonzero(self.weights)
+        data = {
+            "hash_dimensions": HASH_DIMENSIONS,
+            "bias": self.bias,
+            "indices": nonzero.tolist(),
+            "weights": [round(w, 6) for w in self.weights[nonzero].tolist()],
+            "metadata": metadata or {}
+        }
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, path):
+        """
+        저장된 모델 로드
+
+        Returns:
+            PrescreenModel 또는 None (파일이 없거나 해시 공간 크기가 다름)
+        """
+        if not os.path.exists(path):
+            return None
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if data.get("hash_dimensions") != HASH_DIMENSIONS:
+            return None
+        weights = np.zeros(HASH_DIMENSIONS)
+        weights[np.asarray(data["indices"], dtype=np.int64)] = data["weights"]
+        return cls(weights, data["bias"])
+
+
+class Prescreener:
+    """Step 07에서 LLM에 보낼 문단을 고르는 필터"""
+
+    def __init__(self, model=None, threshold=PRESCREEN_THRESHOLD):
+        self.model = model
+        self.threshold = threshold
+
+    @classmethod
+    def load(cls, path=PRESCREEN_MODEL_PATH, threshold=PRESCREEN_THRESHOLD):
+        """학습된 모델로 생성 (모델이 없으면 사전 규칙 사용)"""
+        return cls(PrescreenModel.load(path), threshold)
+
+    @property
+    def mode(self):
+        return "model" if self.model is not None else "lexicon"
+
+    def score(self, text):
+        """문단 점수 (0~1)"""
+        if self.model is not None:
+            return self.model.predict_proba(text)
+        return lexicon_score(text)
+
+    def filter(self, paragraphs):
+        """
+        threshold 이상인 문단만 남김 (순서 유지)
+
+        Returns:
+            list: 남은 문단
+        """
+        kept = [paragraph for paragraph in paragraphs if self.score(paragraph) >= self.threshold]
+        increment("prescreen_paragraphs", len(paragraphs))
+        increment("prescreen_paragraphs_forwarded", len(kept))
+        return kept
+
+
+def split_paragraphs(text):
+    """LLM 입력 텍스트를 문단으로 분리 (06/07에서 문단은 빈 줄로 연결됨)"""
+    return [paragraph for paragraph in text.split("\n\n") if paragraph.strip()]
+
+
+def evidence_in_paragraph(evidence, paragraph_compact):
+    """evidence 문장이 문단에 들어 있는지 (공백 무시, 줄바꿈/일부 변형 허용)"""
+    evidence_compact = _WHITESPACE_RE.sub("", evidence.lower())
+    if len(evidence_compact) < 2:
+        return False
+    if evidence_compact in paragraph_compact:
+        return True
+    bigrams = {evidence_compact[i:i + 2] for i in range(len(evidence_compact) - 1)}
+    matched = sum(1 for bigram in bigrams if bigram in paragraph_compact)
+    return matched / len(bigrams) >= EVIDENCE_MATCH_RATIO
+
+
+def label_paragraphs(paragraphs, relations):
+    """관계 evidence가 들어 있는 문단은 1, 나머지는 0"""
+    evidences = [r.get("evidence", "") for r in relations if r.get("evidence")]
+    labels = []
+    for paragraph in paragraphs:
+        paragraph_compact = _WHITESPACE_RE.sub("", paragraph.lower())
+        labels.append(int(any(evidence_in_paragraph(e, paragraph_compact) for e in evidences)))
+    return labels
+
+
+def load_training_documents():
+    """
+    이전 Step 07 결과와 LLM에 보낸 문단을 짝지어 학습 데이터 생성
+
+    사전 분류를 거친 결과는 걸러진 문단의 정답을 알 수 없으므로 제외합니다.
+
+    Returns:
+        list: [{"filename", "paragraphs", "labels"}, ...]
+    """
+    index_path = f"{PROCESSED_DIR}/kpi_factors_index.json"
+    if not os.path.exists(index_path):
+        return []
+    with open(index_path, 'r', encoding='utf-8') as f:
+        results = json.load(f)["results"]
+
+    # 원본 문단 위치
+    tv_content_files = {}
+    tv_content_index_path = f"{TV_CONTENT_DIR}/tv_content_index.json"
+    if os.path.exists(tv_content_index_path):
+        with open(tv_content_index_path, 'r', encoding='utf-8') as f:
+            for doc in json.load(f)["documents"]:
+                tv_content_files[doc["filename"]] = doc["output_file"]
+    dart_paragraphs = {}
+    filtered_index_path = f"{FILTERED_DIR}/filtered_index.json"
+    if os.path.exists(filtered_index_path):
+        with open(filtered_index_path, 'r', encoding='utf-8') as f:
+            for report in json.load(f)["filtered_reports"].get("dart", []):
+                dart_paragraphs[report["filename"]] = [
+                    p["text"] for p in report.get("relevant_paragraphs", []) if p.get("text")
+                ]
+
+    documents = []
+    for result in results:
+        output_path = f"{PROCESSED_DIR}/kpi_factors/{result['output_file']}"
+        if not os.path.exists(output_path):
+            # 인덱스에는 있지만 결과 파일이 지워진 문서는 학습에서 제외
+            print(f"[WARNING] {output_path} 파일이 없어 학습에서 제외합니다.")
+            continue
+        with open(output_path, 'r', encoding='utf-8') as f:
+            output = json.load(f)
+        if output["metadata"].get("prescreened"):
+            continue
+
+        filename = result["filename"]
+        tv_content_path = None
+        if filename in tv_content_files:
+            tv_content_path = f"{TV_CONTENT_CONSENSUS_DIR}/{tv_content_files[filename]}"
+        if result.get("source") == "dart":
+            paragraphs = dart_paragraphs.get(filename)
+        elif tv_content_path and not os.path.exists(tv_content_path):
+            print(f"[WARNING] {tv_content_path} 파일이 없어 학습에서 제외합니다.")
+            continue
+        elif tv_content_path:
+            with open(tv_content_path, 'r', encoding='utf-8') as f:
+                tv_content = json.load(f)["tv_content"]
+            packed = tv_content.get("packed")
+            text = packed["text"] if packed else "\n\n".join(p["text"] for p in tv_content["paragraphs"])
+            paragraphs = split_paragraphs(text)
+        else:
+            paragraphs = None
+        if not paragraphs:
+            continue
+
+        relations = output["extraction"].get("kpi_factor_relations", [])
+        documents.append({
+            "filename": filename,
+            "paragraphs": paragraphs,
+            "labels": label_paragraphs(paragraphs, relations)
+        })
+    return documents
+
+
+def split_holdout(documents, ratio=PRESCREEN_HOLDOUT_RATIO):
+    """파일명 해시로 학습/평가 문서 분리 (실행마다 같은 분리)"""
+    train, holdout = [], []
+    for doc in documents:
+        if zlib.crc32(doc["filename"].encode('utf-8')) % 1000 < ratio * 1000:
+            holdout.append(doc)
+        else:
+            train.append(doc)
+    return train, holdout
+
+
+def evaluate(score_fn, documents, thresholds=EVAL_THRESHOLDS):
+    """
+    threshold별 정밀도/재현율과 LLM 전달 비율
+
+    Returns:
+        list: [{"threshold", "precision", "recall", "forwarded_paragraphs", "forwarded_chars",
+                "missed_documents"}, ...]
+              missed_documents: 관계 문단이 있는데 한 문단도 전달되지 않은 문서 수
+    """
+    scored = [
+        [(score_fn(paragraph), label, len(paragraph)) for paragraph, label in zip(doc["paragraphs"], doc["labels"])]
+        for doc in documents
+    ]
+    total_paragraphs = sum(len(doc) for doc in scored) or 1
+    total_chars = sum(chars for doc in scored for _, _, chars in doc) or 1
+
+    report = []
+    for threshold in thresholds:
+        tp = fp = fn = 0
+        forwarded_chars = 0
+        missed_documents = 0
+        for doc in scored:
+            doc_forwarded_positive = False
+            for score, label, chars in doc:
+                forwarded = score >= threshold
+                if forwarded:
+                    forwarded_chars += chars
+                    tp += label
+                    fp += 1 - label
+                    doc_forwarded_positive = doc_forwarded_positive or bool(label)
+                else:
+                    fn += label
+            if not doc_forwarded_positive and any(label for _, label, _ in doc):
+                missed_documents += 1
+        report.append({
+            "threshold": threshold,
+            "precision": round(tp / (tp + fp), 4) if tp + fp else None,
+            "recall": round(tp / (tp + fn), 4) if tp + fn else None,
+            "forwarded_paragraphs": round((tp + fp) / total_paragraphs, 4),
+            "forwarded_chars": round(forwarded_chars / total_chars, 4),
+            "missed_documents": missed_documents
+        })
+    return report
+
+
+def _print_report(title, report):
+    print(f"\n[{title}]")
+    print("  threshold  precision   recall  전달 문단  전달 문자  누락 문서")
+    for row in report:
+        precision = f"{row['precision']:.3f}" if row["precision"] is not None else "-"
+        recall = f"{row['recall']:.3f}" if row["recall"] is not None else "-"
+        print(f"  {row['threshold']:>9}  {precision:>9}  {recall:>7}  {row['forwarded_paragraphs']:>9.1%}  "
+              f"{row['forwarded_chars']:>9.1%}  {row['missed_documents']:>9}")
+
+
+def train_prescreen():
+    """이전 Step 07 결과로 사전 분류기 학습/평가 후 저장"""
+
+    print("=" * 80)
+    print("LLM 추출 전 문단 사전 분류기 학습")
+    print("=" * 80)
+
+    with timer("prescreen_load_training"):
+        documents = load_training_documents()
+    if not documents:
+        print("[ERROR] 학습에 쓸 Step 07 결과가 없습니다. 먼저 07_extract_kpi_factors.py를 실행해주세요.")
+        return
+
+    paragraphs = [p for doc in documents for p in doc["paragraphs"]]
+    labels = [label for doc in documents for label in doc["labels"]]
+    print(f"\n문서: {len(documents)}개, 문단: {len(paragraphs)}개 (관계 포함: {sum(labels)}개)")
+
+    train, holdout = split_holdout(documents)
+    if not train or not holdout:
+        train = holdout = documents
+        print("[WARNING] 문서가 적어 학습 데이터로 평가합니다 (성능이 과대 추정됨)")
+    print(f"학습: {len(train)}개 문서 / 평가: {len(holdout)}개 문서")
+
+    with timer("prescreen_train"):
+        model = PrescreenModel().fit(
+            [p for doc in train for p in doc["paragraphs"]],
+            [label for doc in train for label in doc["labels"]]
+        )
+
+    with timer("prescreen_evaluate"):
+        model_report = evaluate(model.predict_proba, holdout)
+        lexicon_report = evaluate(lexicon_score, holdout, (0.5, 1.0))
+    _print_report("분류기 (평가 문서)", model_report)
+    _print_report("사전 규칙 (평가 문서)", lexicon_report)
+    print(f"\n  현재 PRESCREEN_THRESHOLD: {PRESCREEN_THRESHOLD}")
+
+    # 전체 데이터로 다시 학습해 저장
+    with timer("prescreen_train"):
+        final_model = PrescreenModel().fit(paragraphs, labels)
+    final_model.save(PRESCREEN_MODEL_PATH, {
+        "trained_at": datetime.now().isoformat(),
+        "documents": len(documents),
+        "paragraphs": len(paragraphs),
+        "positive_paragraphs": sum(labels)
+    })
+
+    report_path = f"{PROCESSED_DIR}/prescreen_report.json"
+    with open(report_path, 'w', encoding='utf-8') as f:
+        json.dump({
+            "trained_at": datetime.now().isoformat(),
+            "documents": {"train": len(train), "holdout": len(holdout)},
+            "model": model_report,
+            "lexicon": lexicon_report
+        }, f, ensure_ascii=False, indent=2)
+
+    print(f"\n[저장 위치]")
+    print(f"  모델: {PRESCREEN_MODEL_PATH}")
+    print(f"  평가 리포트: {report_path}")
+    print(f"\n[실행 지표]")
+    write_metrics("prescreen")
+
+
+if __name__ == "__main__":
+    train_prescreen()
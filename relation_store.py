@@ -0,0 +1,229 @@
+"""
+KPI-Factor 관계 저장소 (SQLite)
+
+Step 08의 문서별 관계 레코드를 저장합니다. 집계 상태(aggregate_state.py)는 카운트와 예시만 들고,
+문서를 빼거나 예시를 다시 채울 때 필요한 관계는 이 저장소에서 문서/조합 단위로 읽습니다.
+회사/날짜/KPI/Factor 인덱스가 있어 kpi_factors_aggregated.json 전체를 읽지 않고
+필요한 관계만 조회할 수 있습니다.
+
+사용 예:
+    from relation_store import RelationStore
+
+    with RelationStore() as store:
+        # 2023년 환율 관련 관계
+        rows = store.query(factor="환율", start_date="2023-01-01", end_date="2023-12-31")
+        # 같은 조건의 회사별 관계 수
+        counts = store.count_by("company", factor="환율", start_date="2023-01-01", end_date="2023-12-31")
+"""
+
+import json
+import os
+import sqlite3
+from config import RELATION_STORE_PATH
+
+# 테이블 구성이 바뀌면 올려서 다시 생성 (집계 상태와 맞지 않게 되므로 08은 전체 재집계)
+STORE_VERSION = 2
+
+# 조회 결과 컬럼 순서
+RELATION_COLUMNS = ("id", "filename", "company", "date", "kpi", "factor", "relation", "confidence", "evidence")
+
+# 집계 관계 레코드 필드 순서 (kpi_factors_aggregated.json의 all_relations 형식)
+RECORD_FIELDS = ("company", "date", "filename", "kpi", "factor", "kpi_raw", "factor_raw",
+                 "relation", "evidence", "confidence")
+
+# count_by()로 묶을 수 있는 컬럼
+GROUPABLE_COLUMNS = ("company", "month", "kpi", "factor", "relation", "confidence", "filename")
+
+
+class RelationStore:
+    """문서 단위로 갱신되는 관계 테이블 + 조회 API"""
+
+    def __init__(self, path=RELATION_STORE_PATH):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        if self.conn.execute("PRAGMA user_version").fetchone()[0] != STORE_VERSION:
+            self.conn.execute("DROP TABLE IF EXISTS relations")
+            self.conn.execute("DROP TABLE IF EXISTS documents")
+            self.conn.execute(f"PRAGMA user_version = {STORE_VERSION}")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS documents (
+                filename TEXT PRIMARY KEY,
+                signature TEXT NOT NULL
+            )
+        """)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS relations (
+                id INTEGER PRIMARY KEY,
+                filename TEXT NOT NULL,
+                position INTEGER NOT NULL,
+                company TEXT NOT NULL,
+                date TEXT,
+                month TEXT NOT NULL,
+                kpi TEXT NOT NULL,
+                factor TEXT NOT NULL,
+                kpi_raw TEXT NOT NULL,
+                factor_raw TEXT NOT NULL,
+                relation TEXT NOT NULL,
+                confidence TEXT NOT NULL,
+                evidence TEXT NOT NULL
+            )
+        """)
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_relations_filename ON relations(filename)")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_relations_company_date ON relations(company, date)")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_relations_kpi_date ON relations(kpi, date)")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_relations_factor_date ON relations(factor, date)")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_relations_kpi_factor ON relations(kpi, factor)")
+        self.conn.commit()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def document_signatures(self):
+        """
+        저장된 문서별 signature
+
+        Returns:
+            dict: filename -> signature (집계 상태의 file_signature 값)
+        """
+        return {
+            filename: json.loads(signature)
+            for filename, signature in self.conn.execute("SELECT filename, signature FROM documents")
+        }
+
+    def replace_document(self, filename, signature, records):
+        """문서 1개의 관계를 교체 (commit은 commit()에서)"""
+        self.conn.execute("DELETE FROM relations WHERE filename = ?", (filename,))
+        self.conn.executemany(
+            "INSERT INTO relations (filename, position, company, date, month, kpi, factor, kpi_raw, factor_raw, "
+            "relation, confidence, evidence) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            [
+                (filename, position, r["company"], r["date"], (r["date"] or "")[:7], r["kpi"], r["factor"],
+                 r["kpi_raw"], r["factor_raw"], r["relation"], r["confidence"], r["evidence"])
+                for position, r in enumerate(records)
+            ]
+        )
+        self.conn.execute(
+            "INSERT OR REPLACE INTO documents (filename, signature) VALUES (?, ?)",
+            (filename, json.dumps(signature))
+        )
+
+    def delete_document(self, filename):
+        """문서 1개의 관계 삭제 (commit은 commit()에서)"""
+        self.conn.execute("DELETE FROM relations WHERE filename = ?", (filename,))
+        self.conn.execute("DELETE FROM documents WHERE filename = ?", (filename,))
+
+    def clear(self):
+        """모든 문서 삭제 (전체 재집계 전)"""
+        self.conn.execute("DELETE FROM relations")
+        self.conn.execute("DELETE FROM documents")
+
+    def commit(self):
+        self.conn.commit()
+
+    def _records(self, where="", params=()):
+        """조건에 맞는 관계 레코드 (문서 순서대로, RECORD_FIELDS 형식)"""
+        sql = (f"SELECT position, {', '.join(RECORD_FIELDS)} FROM relations{where} "
+               f"ORDER BY filename, position")
+        return [(row[0], dict(zip(RECORD_FIELDS, row[1:]))) for row in self.conn.execute(sql, params)]
+
+    def document_relations(self, filename):
+        """
+        문서 1개의 관계 레코드
+
+        Returns:
+            list: 관계 레코드 dict 리스트 (문서 안 순서)
+        """
+        return [record for _, record in self._records(" WHERE filename = ?", (filename,))]
+
+    def pair_relations(self, kpi, factor):
+        """
+        KPI-Factor 조합 1개의 관계 레코드 (예시 다시 채우기용)
+
+        Returns:
+            list: (문서 안 위치, 관계 레코드 dict) 리스트
+        """
+        return self._records(" WHERE kpi = ? AND factor = ?", (kpi, factor))
+
+    def all_relations(self):
+        """
+        모든 관계 레코드 (추세 롤업 전체 재생성용)
+
+        Returns:
+            list: 관계 레코드 dict 리스트
+        """
+        return [record for _, record in self._records()]
+
+    @staticmethod
+    def _where(company=None, kpi=None, factor=None, relation=None, confidence=None,
+               start_date=None, end_date=None):
+        """조회 조건 SQL (날짜는 YYYY-MM-DD 문자열 비교, 양 끝 포함)"""
+        clauses = []
+        params = []
+        for column, value in (("company", company), ("kpi", kpi), ("factor", factor),
+                              ("relation", relation), ("confidence", confidence)):
+            if value is None:
+                continue
+            if isinstance(value, (list, tuple, set)):
+                clauses.append(f"{column} IN ({', '.join('?' * len(value))})")
+                params.extend(value)
+            else:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        if start_date is not None:
+            clauses.append("date >= ?")
+            params.append(start_date)
+        if end_date is not None:
+            clauses.append("date <= ?")
+            params.append(end_date)
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def query(self, company=None, kpi=None, factor=None, relation=None, confidence=None,
+              start_date=None, end_date=None, limit=None):
+        """
+        조건에 맞는 관계 조회 (날짜순)
+
+        Args:
+            company/kpi/factor/relation/confidence: 값 1개 또는 리스트 (None이면 조건 없음)
+            start_date, end_date: "YYYY-MM-DD" (양 끝 포함)
+            limit: 최대 개수
+
+        Returns:
+            list: 관계 dict 리스트
+        """
+        where, params = self._where(company, kpi, factor, relation, confidence, start_date, end_date)
+        sql = f"SELECT {', '.join(RELATION_COLUMNS)} FROM relations{where} ORDER BY date, id"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        return [dict(zip(RELATION_COLUMNS, row)) for row in self.conn.execute(sql, params)]
+
+    def count_by(self, column, **filters):
+        """
+        조건에 맞는 관계 수를 컬럼 값별로 집계
+
+        Args:
+            column: GROUPABLE_COLUMNS 중 하나 (예: "company", "month")
+            **filters: query()와 같은 조건
+
+        Returns:
+            dict: 컬럼 값 -> 관계 수
+        """
+        if column not in GROUPABLE_COLUMNS:
+            raise ValueError(f"집계할 수 없는 컬럼: {column} (사용 가능: {', '.join(GROUPABLE_COLUMNS)})")
+        where, params = self._where(**filters)
+        sql = f"SELECT {column}, COUNT(*) FROM relations{where} GROUP BY {column} ORDER BY {column}"
+        return dict(self.conn.execute(sql, params).fetchall())
+
+    def stats(self):
+        """저장소 통계"""
+        documents = self.conn.execute("SELECT COUNT(*) FROM documents").fetchone()[0]
+        relations = self.conn.execute("SELECT COUNT(*) FROM relations").fetchone()[0]
+        return {"documents": documents, "relations": relations}
+
+    def close(self):
+        self.conn.close()
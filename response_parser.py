@@ -0,0 +1,283 @@
+"""
+LLM 추출 응답 파서
+
+응답 텍스트를 KPI-Factor 추출 결과로 변환합니다.
+  - Markdown code block(```json) 제거 및 JSON 본문 위치 탐색
+  - 흔한 형식 오류의 로컬 복구: trailing comma, 출력 토큰 한도로 잘린 응답
+    (마지막으로 완성된 항목까지 남기고 괄호를 닫음, 잘린 관계 객체는 버림)
+  - 미리 컴파일한 스키마로 kpi_factor_relations/key_insights 검증 및 정규화
+  - 잘린 응답은 이미 받은 관계를 제외한 나머지만 다시 요청하는 이어쓰기 프롬프트 생성
+
+복구할 수 없는 응답만 ResponseParseError로 알려 전체 재요청하게 합니다.
+"""
+
+import json
+import re
+
+# 제공자의 JSON 응답 모드 (Gemini: response_mime_type)
+JSON_RESPONSE_CONFIG = {"response_mime_type": "application/json"}
+
+CODE_BLOCK_PATTERN = re.compile(r"```(?:json)?\s*(.*?)(?:```|\Z)", re.DOTALL)
+TRAILING_COMMA_PATTERN = re.compile(r",(\s*[}\]])")
+
+# 추출 결과 스키마: 필드 -> (타입, 필수 여부, 허용 값, 기본값)
+RELATION_SCHEMA = {
+    "kpi": (str, True, None, None),
+    "factor": (str, True, None, None),
+    "relation": (str, False, ("positive", "negative", "neutral"), "neutral"),
+    "evidence": (str, False, None, ""),
+    "confidence": (str, False, ("high", "medium", "low"), "low"),
+}
+
+
+class ResponseParseError(ValueError):
+    """응답을 추출 결과로 복구할 수 없음"""
+
+
+class ParsedResponse:
+    """파싱 결과와 복구 내역"""
+
+    def __init__(self, data, repaired=False, truncated=False, errors=None):
+        self.data = data
+        self.repaired = repaired  # 로컬 복구 적용 여부
+        self.truncated = truncated  # 응답이 중간에 잘렸는지 (이어쓰기 필요)
+        self.errors = errors or []  # 검증 중 수정/제외한 항목 설명
+
+
+def compile_relation_schema(schema):
+    """
+    관계 스키마를 검증 함수로 변환 (응답마다 스키마를 해석하지 않도록 한 번만 컴파일)
+
+    Returns:
+        function: validate(relation) -> (정규화된 relation 또는 None, 에러 리스트)
+    """
+    required = tuple(name for name, (_, is_required, _, _) in schema.items() if is_required)
+    enums = {name: frozenset(allowed) for name, (_, _, allowed, _) in schema.items() if allowed}
+    defaults = {name: default for name, (_, is_required, _, default) in schema.items() if not is_required}
+    types = {name: field_type for name, (field_type, _, _, _) in schema.items()}
+
+    def validate(relation):
+        if not isinstance(relation, dict):
+            return None, ["관계가 객체가 아님"]
+
+        errors = []
+        for name in required:
+            value = relation.get(name)
+            if not isinstance(value, str) or not value.strip():
+                return None, [f"필수 필드 누락: {name}"]
+
+        normalized = dict(relation)
+        for name, field_type in types.items():
+            value = normalized.get(name)
+            if value is None:
+                if name in defaults:
+                    normalized[name] = defaults[name]
+                continue
+            if not isinstance(value, field_type):
+                value = str(value)
+            value = value.strip()
+            if name in enums:
+                value = value.lower()
+                if value not in enums[name]:
+                    errors.append(f"{name} 값 '{value}' -> '{defaults[name]}'")
+                    value = defaults[name]
+            normalized[name] = value
+        return normalized, errors
+
+    return validate
+
+
+validate_relation = compile_relation_schema(RELATION_SCHEMA)
+
+
+def validate_extraction(data):
+    """
+    추출 결과 1개 검증 및 정규화
+
+    Raises:
+        ResponseParseError: kpi_factor_relations가 없거나 리스트가 아님
+    """
+    if not isinstance(data, dict) or not isinstance(data.get("kpi_factor_relations"), list):
+        raise ResponseParseError("kpi_factor_relations 필드가 없습니다")
+
+    relations = []
+    errors = []
+    for relation in data["kpi_factor_relations"]:
+        normalized, relation_errors = validate_relation(relation)
+        errors.extend(relation_errors)
+        if normalized is not None:
+            relations.append(normalized)
+
+    insights = data.get("key_insights")
+    if not isinstance(insights, list):
+        if insights is not None:
+            errors.append("key_insights가 리스트가 아님")
+        insights = []
+
+    result = dict(data)
+    result["kpi_factor_relations"] = relations
+    result["key_insights"] = [str(insight) for insight in insights]
+    return result, errors
+
+
+def extract_json_text(response_text):
+    """응답에서 JSON 본문 추출 (code block 제거, 첫 '{'부터)"""
+    text = response_text.strip()
+    match = CODE_BLOCK_PATTERN.search(text)
+    if match:
+        text = match.group(1).strip()
+    start = text.find("{")
+    if start < 0:
+        raise ResponseParseError("JSON 객체를 찾을 수 없습니다")
+    return text[start:]
+
+
+def close_truncated_json(text):
+    """
+    잘린 JSON을 마지막으로 완성된 항목까지 남기고 괄호를 닫음
+
+    배열 원소인 객체(kpi_factor_relations의 관계 등) 안에서는 자르지 않습니다.
+    필드 일부만 받은 관계를 닫으면 빠진 relation/evidence/confidence가 기본값으로 채워져
+    완성된 관계처럼 보이므로, 잘린 객체는 통째로 버리고 직전 원소까지만 남깁니다.
+
+    Returns:
+        tuple: (복구된 텍스트, 잘렸는지 여부)
+    """
+    stack = []  # (닫는 괄호, 배열 원소인 객체인지)
+    in_string = False
+    escaped = False
+    last_safe = None  # (위치, 그 시점의 닫는 괄호들)
+
+    def can_cut():
+        # 가장 안쪽이 배열이거나, 배열 원소가 아닌 객체일 때만 여기서 잘라도 완성된 값만 남음
+        return not stack[-1][1]
+
+    for i, ch in enumerate(text):
+        if in_string:
+            if escaped:
+                escaped = False
+            elif ch == "\\":
+                escaped = True
+            elif ch == '"':
+                in_string = False
+            continue
+        if ch == '"':
+            in_string = True
+        elif ch in "{[":
+            in_array = bool(stack) and stack[-1][0] == "]"
+            stack.append(("}", in_array) if ch == "{" else ("]", False))
+        elif ch in "}]":
+            if stack:
+                stack.pop()
+            if not stack:
+                return text[:i + 1], False
+            if can_cut():
+                last_safe = (i + 1, [closer for closer, _ in stack])
+        elif ch == "," and stack and can_cut():
+            last_safe = (i, [closer for closer, _ in stack])
+
+    if last_safe is None:
+        raise ResponseParseError("응답이 너무 일찍 잘려 복구할 수 없습니다")
+
+    position, open_brackets = last_safe
+    return text[:position] + "".join(reversed(open_brackets)), True
+
+
+def _loads_with_repair(text):
+    """json.loads, 실패하면 trailing comma/잘림 복구 후 재시도"""
+    try:
+        return json.loads(text), False, False
+    except json.JSONDecodeError:
+        pass
+
+    repaired = TRAILING_COMMA_PATTERN.sub(r"\1", text)
+    try:
+        return json.loads(repaired), True, False
+    except json.JSONDecodeError:
+        pass
+
+    closed, truncated = close_truncated_json(repaired)
+    closed = TRAILING_COMMA_PATTERN.sub(r"\1", closed)
+    try:
+        return json.loads(closed), True, truncated
+    except json.JSONDecodeError as e:
+        raise ResponseParseError(f"JSON 복구 실패: {str(e)}") from None
+
+
+def parse_extraction_response(response_text, batch=False):
+    """
+    추출 응답 파싱
+
+    Args:
+        response_text: LLM 응답 텍스트
+        batch: 배치 응답 여부 ({"documents": {doc_id: 추출 결과}})
+
+    Returns:
+        ParsedResponse
+
+    Raises:
+        ResponseParseError: 복구할 수 없는 응답
+    """
+    data, repaired, truncated = _loads_with_repair(extract_json_text(response_text))
+
+    if not batch:
+        result, errors = validate_extraction(data)
+        return ParsedResponse(result, repaired, truncated, errors)
+
+    if not isinstance(data, dict) or not isinstance(data.get("documents"), dict):
+        raise ResponseParseError("documents 필드가 없습니다")
+
+    documents = {}
+    errors = []
+    for doc_id, extraction in data["documents"].items():
+        try:
+            documents[doc_id], doc_errors = validate_extraction(extraction)
+        except ResponseParseError as e:
+            # 잘린 문서는 결과에서 빼서 단독 요청으로 다시 추출되게 함
+            errors.append(f"{doc_id}: {str(e)}")
+            continue
+        errors.extend(f"{doc_id}: {error}" for error in doc_errors)
+
+    # 잘린 응답의 마지막 문서는 관계가 일부만 들어 있을 수 있으므로 제외
+    if truncated and documents:
+        last_doc_id = list(documents)[-1]
+        del documents[last_doc_id]
+        errors.append(f"{last_doc_id}: 응답이 잘려 제외")
+    return ParsedResponse({"documents": documents}, repaired, truncated, errors)
+
+
+def build_continuation_prompt(prompt, partial_result):
+    """잘린 응답 이후 부분만 요청하는 이어쓰기 프롬프트"""
+    received = [
+        {"kpi": r["kpi"], "factor": r["factor"], "relation": r["relation"]}
+        for r in partial_result["kpi_factor_relations"]
+    ]
+    return (
+        f"{prompt}\n\n"
+        "# 이어서 출력\n"
+        "이전 응답이 출력 길이 제한으로 중간에 잘렸습니다. 아래 관계는 이미 받았으므로 제외하고,\n"
+        "나머지 관계와 key_insights만 같은 JSON 형식으로 출력하세요.\n"
+        f"{json.dumps(received, ensure_ascii=False)}\n"
+    )
+
+
+def merge_continuation(partial_result, continuation_result):
+    """이어쓰기 응답을 앞부분 결과에 합침 (같은 kpi/factor/relation/evidence는 제외)"""
+    seen = {
+        (r["kpi"], r["factor"], r["relation"], r.get("evidence", ""))
+        for r in partial_result["kpi_factor_relations"]
+    }
+    merged = dict(partial_result)
+    merged["kpi_factor_relations"] = list(partial_result["kpi_factor_relations"])
+    for relation in continuation_result["kpi_factor_relations"]:
+        key = (relation["kpi"], relation["factor"], relation["relation"], relation.get("evidence", ""))
+        if key not in seen:
+            seen.add(key)
+            merged["kpi_factor_relations"].append(relation)
+
+    insights = list(partial_result.get("key_insights", []))
+    for insight in continuation_result.get("key_insights", []):
+        if insight not in insights:
+            insights.append(insight)
+    merged["key_insights"] = insights
+    return merged
@@ -0,0 +1,73 @@
+import copy
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from aggregate_state import AggregateState  # noqa: E402
+from relation_store import RelationStore  # noqa: E402
+
+GOOD_RELATIONS = [
+    {"kpi": "원가", "factor": "패널 가격", "relation": "negative", "evidence": "패널 가격 상승", "confidence": "high"},
+    {"kpi": "매출", "factor": "환율", "relation": "positive", "evidence": "원화 약세", "confidence": "medium"},
+]
+BAD_RELATIONS = [
+    {"kpi": "점유율", "factor": "중국 업체 경쟁", "relation": "negative", "evidence": "경쟁 심화"},
+    {"kpi": "원가", "relation": "negative", "evidence": "factor 없음"},  # factor 누락
+]
+
+
+def _snapshot(state):
+    """집계 상태와 저장소의 비교용 사본"""
+    state.refill_examples()
+    return copy.deepcopy({
+        "documents": state.documents,
+        "kpi_counts": dict(state.kpi_counts),
+        "factor_counts": dict(state.factor_counts),
+        "combination_counts": state.combination_counts,
+        "combination_examples": state.combination_examples,
+        "company_kpi_counts": {k: dict(v) for k, v in state.company_kpi_counts.items() if v},
+        "company_factor_counts": {k: dict(v) for k, v in state.company_factor_counts.items() if v},
+        "company_relation_counts": dict(state.company_relation_counts),
+        "raw_name_counts": {k: dict(v) for k, v in state.raw_name_counts.items()},
+        "store": {
+            filename: state.store.document_relations(filename) for filename in state.store.document_signatures()
+        }
+    })
+
+
+@pytest.fixture
+def state(tmp_path):
+    store = RelationStore(str(tmp_path / "relations.sqlite"))
+    state = AggregateState(store)
+    state.add_document("a.pdf", "삼성전자", "2023-05-10", GOOD_RELATIONS, [1, 100])
+    yield state
+    store.close()
+
+
+def test_bad_relation_in_new_document_leaves_state_unchanged(state):
+    before = _snapshot(state)
+    with pytest.raises(ValueError):
+        state.add_document("b.pdf", "LG전자", "2023-06-01", BAD_RELATIONS, [2, 200])
+    assert _snapshot(state) == before
+    assert "b.pdf" not in state.documents
+
+
+def test_bad_relation_in_reextracted_document_keeps_previous_version(state):
+    before = _snapshot(state)
+    with pytest.raises(ValueError):
+        state.add_document("a.pdf", "삼성전자", "2023-05-10", BAD_RELATIONS, [3, 300])
+    assert _snapshot(state) == before
+    assert state.documents["a.pdf"] == [1, 100]
+
+
+def test_retract_after_add_restores_empty_state(state):
+    state.retract_document("a.pdf")
+    snapshot = _snapshot(state)
+    assert snapshot["documents"] == {}
+    assert snapshot["kpi_counts"] == {}
+    assert snapshot["combination_counts"] == {}
+    assert snapshot["raw_name_counts"] == {"kpi": {}, "factor": {}, "pair": {}}
+    assert snapshot["store"] == {}
@@ -0,0 +1,40 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from chunked_extraction import chunk_paragraphs  # noqa: E402
+from token_counter import count_tokens  # noqa: E402
+
+
+def _compact(text):
+    return "".join(text.split())
+
+
+def test_long_unit_is_split_without_losing_text():
+    sentences = [f"{i}분기 패널 가격이 전년 대비 {i * 3}% 상승하여 원가 부담이 커졌습니다." for i in range(1, 40)]
+    long_paragraph = " ".join(sentences)
+    paragraphs = ["사업의 개요", long_paragraph, "시장 점유율은 소폭 하락했습니다."]
+
+    chunks = chunk_paragraphs(paragraphs, max_tokens=120)
+
+    assert len(chunks) > 2
+    # chunk 예산은 단위별 토큰 수의 합으로 계산 (줄바꿈 구분자 제외)
+    assert all(sum(count_tokens(line) for line in chunk.split("\n")) <= 120 for chunk in chunks)
+    assert _compact("".join(chunks)) == _compact("".join(paragraphs))
+
+
+def test_sentence_longer_than_budget_is_split_by_token_windows():
+    sentence = "환율" * 500  # 문장 경계가 없는 긴 단위
+    chunks = chunk_paragraphs([sentence], max_tokens=50)
+
+    assert len(chunks) > 1
+    assert all(count_tokens(chunk) <= 50 for chunk in chunks)
+    assert "".join(chunks) == sentence
+
+
+def test_short_units_are_packed_in_order():
+    paragraphs = [f"문단 {i}: 매출이 증가했습니다." for i in range(10)]
+    chunks = chunk_paragraphs(paragraphs, max_tokens=60)
+
+    assert "\n".join(chunks).split("\n") == paragraphs
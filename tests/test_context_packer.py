@@ -0,0 +1,53 @@
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from context_packer import pack_paragraphs  # noqa: E402
+from token_counter import count_tokens  # noqa: E402
+
+
+def _paragraphs(texts):
+    return [{"paragraph_index": i * 10, "text": text} for i, text in enumerate(texts)]
+
+
+def test_packed_text_never_exceeds_budget():
+    rng = random.Random(1)
+    words = ["TV", "패널 가격", "환율", "판매량", "OLED", "수요", "전망", "하락", "상승"]
+    for _ in range(200):
+        texts = [" ".join(rng.choice(words) for _ in range(rng.randint(1, 30))) for _ in range(rng.randint(1, 12))]
+        budget = rng.randint(10, 200)
+        packed = pack_paragraphs(_paragraphs(texts), budget)
+
+        assert packed["token_count"] <= budget
+        assert count_tokens(packed["text"]) <= budget
+
+
+def test_selected_paragraphs_keep_document_order():
+    texts = [
+        "회사 연혁 소개 문단입니다.",
+        "TV 패널 가격 상승으로 원가 부담이 커지고 판매량이 줄었습니다.",
+        "OLED TV 수요 증가로 점유율이 상승했습니다.",
+        "환율 상승이 TV 매출에 긍정적입니다.",
+        "배당 정책 관련 문단입니다."
+    ]
+    paragraphs = _paragraphs(texts)
+    budget = sum(count_tokens(text) for text in texts[1:4]) + 2
+    packed = pack_paragraphs(paragraphs, budget)
+
+    indices = packed["paragraph_indices"]
+    assert indices == sorted(indices)
+    assert packed["text"] == "\n\n".join(p["text"] for p in paragraphs if p["paragraph_index"] in indices)
+    # 예산 안에 다 들어가지 않으면 점수가 낮은 문단이 빠짐
+    assert len(indices) < len(paragraphs)
+    assert {d["paragraph_index"] for d in packed["dropped_paragraphs"]} == \
+        {p["paragraph_index"] for p in paragraphs} - set(indices)
+
+
+def test_single_oversized_paragraph_is_truncated_to_budget():
+    packed = pack_paragraphs(_paragraphs(["TV 패널 가격 " * 200]), 50)
+
+    assert packed["truncated"]
+    assert packed["paragraph_indices"] == [0]
+    assert 0 < packed["token_count"] <= 50
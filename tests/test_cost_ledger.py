@@ -0,0 +1,72 @@
+import json
+import os
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cost_ledger import BudgetExceededError, CostLedger  # noqa: E402
+
+PRIMARY = SimpleNamespace(model_name="gemini-2.0-flash-exp")
+FALLBACK = SimpleNamespace(model_name="gemini-1.5-flash-8b")
+
+
+@pytest.fixture
+def ledger(tmp_path):
+    ledger = CostLedger(str(tmp_path / "ledger.jsonl"), budget_tokens=1000, downgrade_ratio=0.8,
+                        fallback_backend=FALLBACK)
+    yield ledger
+    ledger.close()
+
+
+def _call(ledger, backend, input_tokens, output_tokens, document="doc.pdf"):
+    """select_backend -> reserve -> record 순서의 호출 1건 (07 단계와 같은 순서)"""
+    backend = ledger.select_backend(backend)
+    reservation = ledger.reserve(input_tokens, output_tokens, backend.model_name)
+    ledger.release(reservation)
+    ledger.record(document, backend.model_name, input_tokens, output_tokens, latency=0.1)
+    return backend
+
+
+def test_switches_to_fallback_model_then_stops(ledger):
+    assert _call(ledger, PRIMARY, 500, 100, "a.pdf") is PRIMARY
+    assert _call(ledger, PRIMARY, 150, 50, "b.pdf") is PRIMARY
+    assert not ledger.downgraded
+    assert ledger.spent_tokens == 800
+
+    # 예산의 80% 이상 사용 -> 저가 모델
+    assert _call(ledger, PRIMARY, 50, 50, "c.pdf") is FALLBACK
+    assert ledger.downgraded
+
+    # 남은 예산(100 토큰)을 넘는 요청은 보내지 않고, 이후 요청도 모두 거절
+    with pytest.raises(BudgetExceededError):
+        ledger.reserve(150, 50, ledger.select_backend(PRIMARY).model_name)
+    assert ledger.exhausted
+    with pytest.raises(BudgetExceededError):
+        ledger.reserve(1, 1, FALLBACK.model_name)
+
+    summary = ledger.summary()
+    assert summary["calls"] == 3
+    assert summary["spent_tokens"] == 900
+    assert set(summary["by_model"]) == {PRIMARY.model_name, FALLBACK.model_name}
+    assert summary["by_model"][FALLBACK.model_name]["calls"] == 1
+
+
+def test_reservations_count_against_budget(ledger):
+    first = ledger.reserve(400, 100, PRIMARY.model_name)
+    with pytest.raises(BudgetExceededError):
+        ledger.reserve(400, 200, PRIMARY.model_name)
+    ledger.release(first)
+    assert ledger.reserved_tokens == 0
+
+
+def test_cache_hits_are_free_and_logged(ledger):
+    ledger.record("a.pdf", PRIMARY.model_name, 500, 100, latency=0.0, cache_hit=True)
+    assert ledger.spent_tokens == 0
+    assert ledger.select_backend(PRIMARY) is PRIMARY
+
+    with open(ledger.path, encoding="utf-8") as f:
+        entries = [json.loads(line) for line in f]
+    assert [(entry["document"], entry["cache_hit"], entry["cost_usd"]) for entry in entries] == [("a.pdf", True, 0.0)]
@@ -0,0 +1,38 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from entity_normalizer import EntityNormalizer  # noqa: E402
+
+
+@pytest.fixture
+def normalizer():
+    return EntityNormalizer(cache_path=None)
+
+
+@pytest.mark.parametrize("name, kind, expected", [
+    ("LCD 패널 가격", "factor", "패널 가격"),
+    ("패널가격", "factor", "패널 가격"),
+    ("원/달러 환율", "factor", "환율"),
+    ("유통 재고", "factor", "유통사 재고"),
+    ("영업이익률", "kpi", "수익성"),
+    ("글로벌 TV 판매량", "kpi", "판매량"),
+    ("매출액 증가", "kpi", "매출"),
+    ("재고", "factor", "유통사 재고"),
+    ("매출", "kpi", "매출"),
+])
+def test_matches_canonical_terms(normalizer, name, kind, expected):
+    assert normalizer.normalize(name, kind) == expected
+
+
+@pytest.mark.parametrize("name, kind", [
+    ("패널 재고", "factor"),
+    ("매출총이익", "kpi"),
+    ("할인율", "factor"),
+    ("TV 수요", "kpi"),
+])
+def test_does_not_merge_distinct_concepts(normalizer, name, kind):
+    assert normalizer.normalize(name, kind) == name
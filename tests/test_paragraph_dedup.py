@@ -0,0 +1,62 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from paragraph_dedup import deduplicate_paragraphs, paragraph_signature  # noqa: E402
+
+DISCLAIMER = (
+    "본 자료는 투자자의 투자를 권유할 목적으로 작성된 것이 아니며, 당사는 자료의 내용에 대해 "
+    "어떠한 보증도 하지 않습니다. 투자 판단의 최종 책임은 투자자 본인에게 있습니다."
+)
+
+
+def _entries(paragraphs):
+    """[(filename, paragraph_index, text)] -> deduplicate_paragraphs 입력"""
+    return [
+        {"filename": filename, "paragraph_index": index, **paragraph_signature(text)}
+        for filename, index, text in paragraphs
+    ]
+
+
+def test_near_duplicates_are_dropped_and_distinct_paragraphs_kept():
+    entries = _entries([
+        ("2023-01.pdf", 0, "TV 패널 가격 상승으로 2분기 원가 부담이 커질 전망입니다."),
+        ("2023-01.pdf", 1, DISCLAIMER),
+        ("2023-02.pdf", 0, "OLED TV 출하량이 전년 대비 20% 증가하며 점유율이 상승했습니다."),
+        ("2023-02.pdf", 1, DISCLAIMER.replace("투자자 본인에게", "투자자 자신에게")),
+        ("2023-03.pdf", 0, "환율 하락은 수출 비중이 높은 TV 사업의 수익성에 부담입니다."),
+        ("2023-03.pdf", 1, DISCLAIMER),
+    ])
+
+    result = deduplicate_paragraphs(entries)
+
+    assert result["duplicate_of"] == {
+        "2023-02.pdf": {1: {"filename": "2023-01.pdf", "paragraph_index": 1}},
+        "2023-03.pdf": {1: {"filename": "2023-01.pdf", "paragraph_index": 1}},
+    }
+    assert len(result["clusters"]) == 1
+    assert result["clusters"][0]["canonical"] == {"filename": "2023-01.pdf", "paragraph_index": 1}
+    stats = result["statistics"]
+    assert stats["total_paragraphs"] == 6
+    assert stats["duplicate_paragraphs"] == 2
+    assert stats["duplicate_tokens"] == entries[3]["token_count"] + entries[5]["token_count"]
+
+
+def test_distinct_paragraphs_are_all_kept():
+    entries = _entries([
+        ("a.pdf", 0, "TV 패널 가격 상승으로 원가 부담이 커질 전망입니다."),
+        ("a.pdf", 1, "OLED TV 출하량이 증가하며 점유율이 상승했습니다."),
+        ("b.pdf", 0, "블랙프라이데이 프로모션 효과로 북미 판매량이 늘었습니다."),
+    ])
+
+    result = deduplicate_paragraphs(entries)
+
+    assert result["clusters"] == []
+    assert result["duplicate_of"] == {}
+    assert result["statistics"]["duplicate_paragraphs"] == 0
+
+
+def test_paragraph_signature_is_deterministic():
+    assert paragraph_signature(DISCLAIMER) == paragraph_signature(DISCLAIMER)
+    assert paragraph_signature(DISCLAIMER)["minhash"] != paragraph_signature("TV 판매량 증가")["minhash"]
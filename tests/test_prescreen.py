@@ -0,0 +1,45 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from prescreen import Prescreener, lexicon_score, split_paragraphs  # noqa: E402
+
+
+class FixedScoreModel:
+    """문단별 점수를 정해 둔 모델 (PrescreenModel.predict_proba와 같은 인터페이스)"""
+
+    def __init__(self, scores):
+        self.scores = scores
+
+    def predict_proba(self, text):
+        return self.scores[text]
+
+
+def test_filter_drops_paragraphs_below_threshold_and_keeps_order():
+    scores = {"가": 0.9, "나": 0.1, "다": 0.5, "라": 0.49}
+    prescreener = Prescreener(FixedScoreModel(scores), threshold=0.5)
+
+    assert prescreener.mode == "model"
+    assert prescreener.filter(["가", "나", "다", "라"]) == ["가", "다"]
+
+
+def test_document_scored_below_threshold_is_not_forwarded():
+    # 07 단계는 남은 문단이 없으면 LLM을 호출하지 않고 문서를 건너뜀
+    text = "회사 연혁\n\n배당 정책 안내"
+    prescreener = Prescreener(FixedScoreModel({"회사 연혁": 0.2, "배당 정책 안내": 0.3}), threshold=0.5)
+
+    kept = prescreener.filter(split_paragraphs(text))
+    assert kept == []
+    assert not "\n\n".join(kept).strip()
+
+
+def test_lexicon_mode_keeps_kpi_factor_paragraphs():
+    relevant = "패널 가격 상승으로 TV 원가 부담이 커지고 판매량이 감소했습니다."
+    irrelevant = "주주총회는 3월에 개최될 예정입니다."
+    threshold = (lexicon_score(relevant) + lexicon_score(irrelevant)) / 2
+    prescreener = Prescreener(threshold=threshold)
+
+    assert prescreener.mode == "lexicon"
+    assert lexicon_score(relevant) > lexicon_score(irrelevant)
+    assert prescreener.filter([irrelevant, relevant]) == [relevant]
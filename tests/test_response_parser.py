@@ -0,0 +1,82 @@
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from response_parser import (  # noqa: E402
+    build_continuation_prompt,
+    close_truncated_json,
+    parse_extraction_response,
+)
+
+RELATIONS = [
+    {"kpi": "원가", "factor": "패널 가격", "relation": "negative", "evidence": "패널 가격 상승", "confidence": "high"},
+    {"kpi": "매출", "factor": "환율", "relation": "positive", "evidence": "원화 약세", "confidence": "medium"},
+]
+FULL_RESPONSE = json.dumps({"kpi_factor_relations": RELATIONS, "key_insights": ["인사이트"]}, ensure_ascii=False)
+
+
+def _cut_after(marker, occurrence=1):
+    """FULL_RESPONSE를 marker의 occurrence번째 등장 직후에서 자름"""
+    position = -1
+    for _ in range(occurrence):
+        position = FULL_RESPONSE.index(marker, position + 1)
+    return FULL_RESPONSE[:position + len(marker)]
+
+
+def test_truncated_inside_relation_object_drops_partial_relation():
+    # 두 번째 관계의 "factor": "환율", 직후에서 잘림 (relation/evidence/confidence 없음)
+    text = _cut_after('"factor": "환율",')
+
+    parsed = parse_extraction_response(text)
+
+    assert parsed.truncated
+    assert parsed.data["kpi_factor_relations"] == [RELATIONS[0]]
+
+
+def test_continuation_prompt_does_not_list_partial_relation():
+    parsed = parse_extraction_response(_cut_after('"factor": "환율",'))
+
+    prompt = build_continuation_prompt("PROMPT", parsed.data)
+
+    assert "환율" not in prompt.split("# 이어서 출력")[1]
+
+
+def test_truncated_after_complete_relation_keeps_it():
+    text = _cut_after("},", occurrence=1)
+
+    parsed = parse_extraction_response(text)
+
+    assert parsed.truncated
+    assert parsed.data["kpi_factor_relations"] == [RELATIONS[0]]
+
+
+def test_truncated_inside_key_insights_keeps_relations():
+    text = FULL_RESPONSE[:FULL_RESPONSE.index("인사이트") + 2]
+
+    parsed = parse_extraction_response(text)
+
+    assert parsed.truncated
+    assert parsed.data["kpi_factor_relations"] == RELATIONS
+    assert parsed.data["key_insights"] == []
+
+
+def test_complete_response_is_not_truncated():
+    closed, truncated = close_truncated_json(FULL_RESPONSE)
+
+    assert not truncated
+    assert json.loads(closed)["kpi_factor_relations"] == RELATIONS
+
+
+def test_batch_truncated_inside_relation_drops_last_document():
+    response = json.dumps({"documents": {
+        "doc1": {"kpi_factor_relations": RELATIONS, "key_insights": []},
+        "doc2": {"kpi_factor_relations": RELATIONS, "key_insights": []},
+    }}, ensure_ascii=False)
+    text = response[:response.rindex('"factor": "환율",') + len('"factor": "환율",')]
+
+    parsed = parse_extraction_response(text, batch=True)
+
+    assert list(parsed.data["documents"]) == ["doc1"]
+    assert parsed.data["documents"]["doc1"]["kpi_factor_relations"] == RELATIONS
@@ -0,0 +1,52 @@
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from trend_rollups import GRANULARITIES, build_rollups, merge_rollups  # noqa: E402
+
+
+def _record(company, date, kpi, factor, relation="positive", confidence="high"):
+    return {"company": company, "date": date, "kpi": kpi, "factor": factor,
+            "relation": relation, "confidence": confidence}
+
+
+BASE = [
+    _record("삼성전자", "2023-01-10", "원가", "패널 가격", "negative"),
+    _record("삼성전자", "2023-05-02", "매출", "환율"),
+    _record("LG전자", "2023-08-20", "원가", "패널 가격", "neutral", "low"),
+    _record("LG전자", "2024-02-14", "매출", "환율", "positive", "medium"),
+    _record("LG전자", "날짜 없음", "매출", "환율"),
+]
+
+
+def _assert_same(actual, expected):
+    assert set(actual) == set(expected)
+    for key in expected:
+        if expected[key].dtype.kind == "f":
+            assert actual[key].shape == expected[key].shape, key
+            assert np.allclose(actual[key], expected[key], atol=1e-6), key
+        else:
+            assert np.array_equal(actual[key], expected[key]), key
+
+
+def test_merge_matches_full_rebuild_after_add_and_remove():
+    # 첫 문서(삼성전자 2023-01)와 마지막 LG전자 관계를 빼고 새 회사/조합/기간을 더함
+    removed = [BASE[0], BASE[3]]
+    added = [_record("하이센스", "2022-11-30", "점유율", "중국 업체 경쟁", "negative", "medium")]
+    remaining = [record for record in BASE if record not in removed] + added
+
+    merged = merge_rollups(build_rollups(BASE), build_rollups(added, removed))
+    _assert_same(merged, build_rollups(remaining))
+
+
+def test_merge_removing_everything_leaves_empty_axes():
+    merged = merge_rollups(build_rollups(BASE), build_rollups([], BASE))
+    assert len(merged["companies"]) == 0
+    assert len(merged["kpis"]) == 0
+    assert int(merged["skipped_relations"]) == 0
+    for granularity in GRANULARITIES:
+        assert merged[f"{granularity}_counts"].shape == (0, 0, 0, 3)
+        assert len(merged[f"{granularity}_periods"]) == 0
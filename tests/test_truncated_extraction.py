@@ -0,0 +1,72 @@
+import asyncio
+import importlib
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from llm_backends import LLMBackend, LLMResponse  # noqa: E402
+from llm_cache import LLMResponseCache, make_cache_key  # noqa: E402
+from llm_engine import AdaptiveRateLimiter  # noqa: E402
+
+step07 = importlib.import_module("07_extract_kpi_factors")
+
+RELATIONS = [
+    {"kpi": "원가", "factor": "패널 가격", "relation": "negative", "evidence": "패널 가격 상승", "confidence": "high"},
+    {"kpi": "매출", "factor": "환율", "relation": "positive", "evidence": "원화 약세", "confidence": "medium"},
+]
+FULL_RESPONSE = json.dumps({"kpi_factor_relations": RELATIONS, "key_insights": []}, ensure_ascii=False)
+# 두 번째 관계 중간에서 잘린 응답
+TRUNCATED_RESPONSE = FULL_RESPONSE[:FULL_RESPONSE.index('"factor": "환율"')]
+
+
+class ScriptedBackend(LLMBackend):
+    """정해진 순서로 응답하는 mock 백엔드 (Exception 항목은 그대로 발생)"""
+
+    name = "scripted"
+
+    def __init__(self, responses):
+        super().__init__("mock-model", context_cache=False)
+        self.responses = list(responses)
+        self.prompts = []
+
+    async def _generate(self, prompt, generation_config, cache_handle):
+        self.prompts.append(prompt)
+        response = self.responses.pop(0)
+        if isinstance(response, Exception):
+            raise response
+        return LLMResponse(response, 100, 50)
+
+
+def _extract(backend, cache):
+    prompt = step07.build_prompt("삼성전자 원가 패널 가격 상승, 원화 약세로 매출 증가", "삼성전자", "2023-05-10")
+    limiter = AdaptiveRateLimiter(6000, 10_000_000)
+    result = asyncio.run(step07.request_extraction(prompt, backend, limiter, "doc", cache, max_retries=1))
+    return prompt, result
+
+
+def test_truncated_response_with_failed_continuation_is_not_cached(tmp_path):
+    cache = LLMResponseCache(str(tmp_path / "cache.sqlite"))
+    backend = ScriptedBackend([TRUNCATED_RESPONSE, RuntimeError("HTTP 500: server error")])
+
+    prompt, (result, usage, from_cache) = _extract(backend, cache)
+
+    assert result is None  # 일부 결과는 성공으로 돌려주지 않음 (journal에 완료로 남지 않음)
+    assert len(backend.prompts) == 2  # 원 요청 + 이어쓰기 요청
+    cached_text, _ = cache.get(make_cache_key("mock-model", prompt, step07.GENERATION_CONFIG))
+    assert cached_text is None
+    cache.close()
+
+
+def test_truncated_response_completed_by_continuation_is_cached(tmp_path):
+    cache = LLMResponseCache(str(tmp_path / "cache.sqlite"))
+    continuation = json.dumps({"kpi_factor_relations": RELATIONS[1:], "key_insights": []}, ensure_ascii=False)
+    backend = ScriptedBackend([TRUNCATED_RESPONSE, continuation])
+
+    prompt, (result, usage, from_cache) = _extract(backend, cache)
+
+    assert [r["factor"] for r in result["kpi_factor_relations"]] == ["패널 가격", "환율"]
+    cached_text, _ = cache.get(make_cache_key("mock-model", prompt, step07.GENERATION_CONFIG))
+    assert len(json.loads(cached_text)["kpi_factor_relations"]) == 2
+    cache.close()
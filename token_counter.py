@@ -0,0 +1,83 @@
+"""
+로컬 토큰 카운터
+
+LLM 입력 크기를 API 호출 없이 로컬에서 계산합니다.
+tiktoken이 설치되어 있으면 BPE 토크나이저로 실제 토큰 수를 세고,
+없으면 글자 수 기반 추정치(한글 1.5배 환산)를 사용합니다.
+"""
+
+from functools import lru_cache
+from config import TOKENIZER_ENCODING
+
+try:
+    import tiktoken
+    TIKTOKEN_AVAILABLE = True
+except ImportError:
+    TIKTOKEN_AVAILABLE = False
+    print("[WARN] tiktoken not available, token counts will be estimated from char counts")
+
+
+@lru_cache(maxsize=1)
+def _get_encoding():
+    """토크나이저 인코딩 로드 (프로세스당 1회)"""
+    if not TIKTOKEN_AVAILABLE:
+        return None
+    try:
+        return tiktoken.get_encoding(TOKENIZER_ENCODING)
+    except Exception as e:
+        # 인코딩 파일 다운로드 실패 등 (오프라인 환경)
+        print(f"[WARN] tokenizer '{TOKENIZER_ENCODING}' 로드 실패, 추정치 사용: {str(e)}")
+        return None
+
+
+def count_tokens(text):
+    """
+    텍스트의 토큰 수 계산
+
+    Args:
+        text: 토큰 수를 계산할 텍스트
+
+    Returns:
+        int: 토큰 수
+    """
+    if not text:
+        return 0
+
+    encoding = _get_encoding()
+    if encoding is not None:
+        return len(encoding.encode(text, disallowed_special=()))
+
+    # Fallback: 한글 1.5배 환산
+    return int(len(text) * 1.5)
+
+
+def truncate_to_tokens(text, max_tokens):
+    """
+    텍스트를 최대 토큰 수 이하로 자르기
+
+    Args:
+        text: 원본 텍스트
+        max_tokens: 최대 토큰 수
+
+    Returns:
+        str: 잘린 텍스트
+    """
+    if max_tokens <= 0 or not text:
+        return ""
+
+    encoding = _get_encoding()
+    if encoding is not None:
+        tokens = encoding.encode(text, disallowed_special=())
+        if len(tokens) <= max_tokens:
+            return text
+        # 멀티바이트 문자 경계에서 깨진 글자는 버림
+        return encoding.decode(tokens[:max_tokens], errors="ignore")
+
+    return text[:int(max_tokens / 1.5)]
+
+
+def tokenizer_name():
+    """현재 사용 중인 토큰 카운터 이름 (통계 기록용)"""
+    if _get_encoding() is not None:
+        return f"tiktoken/{TOKENIZER_ENCODING}"
+    return "char_estimate_x1.5"
@@ -0,0 +1,334 @@
+"""
+KPI-Factor 추세 롤업
+
+집계 상태의 관계를 회사 × KPI-Factor 조합 × 기간(week/month/quarter)별로 미리 합산해
+NumPy 배열(.npz)로 저장합니다. 대시보드는 관계 전체를 다시 읽지 않고 추세를 조회할 수 있습니다.
+  - counts[회사, 조합, 기간, 관계종류]: 긍정/부정/중립 관계 수
+  - score[회사, 조합, 기간]: 신뢰도 가중 점수 (긍정 +w, 부정 -w, 중립 0)
+  - weight[회사, 조합, 기간]: 신뢰도 가중치 합 (score / weight = 평균 점수)
+기간 축은 가장 이른 기간부터 가장 늦은 기간까지 빠짐없이 이어지므로 관계가 없는 기간은 0입니다.
+
+Step 08은 바뀐 문서의 관계만으로 증감분(build_rollups(added, removed))을 만들어
+저장된 롤업에 더합니다(merge_rollups). 관계가 모두 빠진 회사/조합/양 끝 기간은 축에서 제거하므로
+결과는 전체 관계로 다시 만든 롤업과 같습니다.
+
+사용 예:
+    from trend_rollups import TrendRollups
+
+    trends = TrendRollups.load()
+    series = trends.series(kpi="원가", factor="패널 가격", granularity="quarter")
+    # {"periods": ["2023-Q1", ...], "positive": [...], "negative": [...], "neutral": [...],
+    #  "score": [...], "mean_score": [...]}
+"""
+
+import json
+import os
+from datetime import date
+import numpy as np
+from aggregate_state import RELATION_TYPES, RELATION_INDEX, NEUTRAL_INDEX
+from config import TREND_ROLLUP_PATH, TREND_CONFIDENCE_WEIGHTS, TREND_DEFAULT_WEIGHT
+
+GRANULARITIES = ("week", "month", "quarter")
+
+# 관계 종류별 점수 부호
+RELATION_SIGNS = np.array([{"positive": 1.0, "negative": -1.0}.get(r, 0.0) for r in RELATION_TYPES])
+
+
+def _weight_settings():
+    """신뢰도 가중치 설정 (바뀌면 저장된 롤업에 증감분을 더할 수 없으므로 전체 재생성)"""
+    return json.dumps([TREND_CONFIDENCE_WEIGHTS, TREND_DEFAULT_WEIGHT], sort_keys=True)
+
+
+def _parse_date(value):
+    """'YYYY-MM-DD' -> date (형식이 다르면 None)"""
+    try:
+        return date.fromisoformat(str(value)[:10])
+    except ValueError:
+        return None
+
+
+def period_ordinal(day, granularity):
+    """기간 번호 (연속된 기간은 1씩 차이)"""
+    if granularity == "week":
+        return (day.toordinal() - 1) // 7  # 0001-01-01이 월요일이므로 월요일 시작 주
+    if granularity == "month":
+        return day.year * 12 + day.month - 1
+    if granularity == "quarter":
+        return day.year * 4 + (day.month - 1) // 3
+    raise ValueError(f"지원하지 않는 기간 단위: {granularity} (사용 가능: {', '.join(GRANULARITIES)})")
+
+
+def period_label(ordinal, granularity):
+    """기간 번호 -> 표시용 이름 (2023-W03, 2023-01, 2023-Q1)"""
+    if granularity == "week":
+        iso_year, iso_week, _ = date.fromordinal(ordinal * 7 + 1).isocalendar()
+        return f"{iso_year}-W{iso_week:02d}"
+    if granularity == "month":
+        return f"{ordinal // 12}-{ordinal % 12 + 1:02d}"
+    if granularity == "quarter":
+        return f"{ordinal // 4}-Q{ordinal % 4 + 1}"
+    raise ValueError(f"지원하지 않는 기간 단위: {granularity} (사용 가능: {', '.join(GRANULARITIES)})")
+
+
+def build_rollups(records, removed=()):
+    """
+    관계 레코드로 롤업 배열 생성
+
+    Args:
+        records: 더할 관계 레코드 (RelationStore/AggregateState 레코드 형식)
+        removed: 뺄 관계 레코드 (증감분을 만들 때, 카운트/점수가 음수로 들어감)
+
+    Returns:
+        dict: save_rollups()/TrendRollups/merge_rollups에 넘길 배열 dict (날짜가 없는 관계는 제외)
+    """
+    company_ids = {}
+    pair_ids = {}
+    rows = []  # (회사, 조합, 날짜, 관계종류, 가중치, 부호)
+    parsed_dates = {}
+    skipped = 0
+    for sign, source in ((1, records), (-1, removed)):
+        for record in source:
+            if record["date"] not in parsed_dates:
+                parsed_dates[record["date"]] = _parse_date(record["date"])
+            day = parsed_dates[record["date"]]
+            if day is None:
+                skipped += sign
+                continue
+            company = company_ids.setdefault(record["company"], len(company_ids))
+            pair = pair_ids.setdefault((record["kpi"], record["factor"]), len(pair_ids))
+            rows.append((
+                company,
+                pair,
+                day,
+                RELATION_INDEX.get(record["relation"], NEUTRAL_INDEX),
+                TREND_CONFIDENCE_WEIGHTS.get(record["confidence"], TREND_DEFAULT_WEIGHT),
+                sign
+            ))
+
+    companies = sorted(company_ids)
+    pairs = sorted(pair_ids)
+    # 이름순 인덱스로 재배치
+    company_order = np.empty(len(companies), dtype=np.int64)
+    company_order[[company_ids[c] for c in companies]] = np.arange(len(companies))
+    pair_order = np.empty(len(pairs), dtype=np.int64)
+    pair_order[[pair_ids[p] for p in pairs]] = np.arange(len(pairs))
+
+    company_index = company_order[np.array([row[0] for row in rows], dtype=np.int64)]
+    pair_index = pair_order[np.array([row[1] for row in rows], dtype=np.int64)]
+    relation_index = np.array([row[3] for row in rows], dtype=np.int64)
+    signs = np.array([row[5] for row in rows], dtype=np.int64)
+    weights = np.array([row[4] for row in rows], dtype=np.float64) * signs
+    signed_weights = weights * RELATION_SIGNS[relation_index]
+
+    rollups = {
+        "companies": np.array(companies, dtype=str),
+        "kpis": np.array([kpi for kpi, _ in pairs], dtype=str),
+        "factors": np.array([factor for _, factor in pairs], dtype=str),
+        "skipped_relations": np.array(skipped),
+        "weight_settings": np.array(_weight_settings())
+    }
+    for granularity in GRANULARITIES:
+        ordinal_of = {day: period_ordinal(day, granularity) for day in set(parsed_dates.values()) if day}
+        ordinals = np.array([ordinal_of[row[2]] for row in rows], dtype=np.int64)
+        first = int(ordinals.min()) if rows else 0
+        n_periods = int(ordinals.max()) - first + 1 if rows else 0
+        period_index = ordinals - first
+        shape = (len(companies), len(pairs), n_periods)
+
+        counts = np.zeros(shape + (len(RELATION_TYPES),), dtype=np.int32)
+        np.add.at(counts, (company_index, pair_index, period_index, relation_index), signs)
+        score = np.zeros(shape, dtype=np.float32)
+        np.add.at(score, (company_index, pair_index, period_index), signed_weights)
+        weight = np.zeros(shape, dtype=np.float32)
+        np.add.at(weight, (company_index, pair_index, period_index), weights)
+
+        rollups[f"{granularity}_first"] = np.array(first)
+        rollups[f"{granularity}_periods"] = np.array(
+            [period_label(first + i, granularity) for i in range(n_periods)], dtype=str
+        )
+        rollups[f"{granularity}_counts"] = counts
+        rollups[f"{granularity}_score"] = score
+        rollups[f"{granularity}_weight"] = weight
+    return rollups
+
+
+def _trim(rollups):
+    """관계가 남지 않은 회사/조합과 양 끝 기간을 축에서 제거 (전체 재생성 결과와 같은 모양)"""
+    reference = rollups[f"{GRANULARITIES[0]}_counts"]
+    keep_company = reference.any(axis=(1, 2, 3))
+    keep_pair = reference.any(axis=(0, 2, 3))
+    trimmed = {
+        "companies": rollups["companies"][keep_company],
+        "kpis": rollups["kpis"][keep_pair],
+        "factors": rollups["factors"][keep_pair],
+        "skipped_relations": rollups["skipped_relations"],
+        "weight_settings": rollups["weight_settings"]
+    }
+    for granularity in GRANULARITIES:
+        counts = rollups[f"{granularity}_counts"][keep_company][:, keep_pair]
+        active = np.flatnonzero(counts.any(axis=(0, 1, 3)))
+        start, stop = (int(active[0]), int(active[-1]) + 1) if len(active) else (0, 0)
+        empty = ~counts[:, :, start:stop].any(axis=3)
+        for name in ("score", "weight"):
+            values = rollups[f"{granularity}_{name}"][keep_company][:, keep_pair][:, :, start:stop]
+            values[empty] = 0.0  # 더하고 뺀 뒤 남은 부동소수점 오차 제거
+            trimmed[f"{granularity}_{name}"] = values
+        trimmed[f"{granularity}_counts"] = counts[:, :, start:stop]
+        trimmed[f"{granularity}_periods"] = rollups[f"{granularity}_periods"][start:stop]
+        trimmed[f"{granularity}_first"] = np.array(int(rollups[f"{granularity}_first"]) + start if len(active) else 0)
+    return trimmed
+
+
+def merge_rollups(base, delta):
+    """
+    저장된 롤업에 증감분을 더함
+
+    Args:
+        base: 저장된 롤업 (TrendRollups.arrays 또는 build_rollups 결과)
+        delta: build_rollups(added, removed) 결과
+
+    Returns:
+        dict: 합친 롤업 배열 dict (회사/조합은 이름순, 기간 축은 두 롤업 범위의 합집합)
+    """
+    companies = sorted({str(c) for source in (base, delta) for c in source["companies"]})
+    pairs = sorted({
+        (str(kpi), str(factor))
+        for source in (base, delta) for kpi, factor in zip(source["kpis"], source["factors"])
+    })
+    company_pos = {company: i for i, company in enumerate(companies)}
+    pair_pos = {pair: i for i, pair in enumerate(pairs)}
+
+    merged = {
+        "companies": np.array(companies, dtype=str),
+        "kpis": np.array([kpi for kpi, _ in pairs], dtype=str),
+        "factors": np.array([factor for _, factor in pairs], dtype=str),
+        "skipped_relations": np.array(int(base["skipped_relations"]) + int(delta["skipped_relations"])),
+        "weight_settings": np.array(_weight_settings())
+    }
+    for granularity in GRANULARITIES:
+        # 기간이 있는 롤업만 기간 축 범위 계산에 포함
+        sources = [source for source in (base, delta) if len(source[f"{granularity}_periods"])]
+        first = min((int(source[f"{granularity}_first"]) for source in sources), default=0)
+        last = max((int(source[f"{granularity}_first"]) + len(source[f"{granularity}_periods"])
+                    for source in sources), default=0)
+        shape = (len(companies), len(pairs), last - first)
+
+        counts = np.zeros(shape + (len(RELATION_TYPES),), dtype=np.int32)
+        score = np.zeros(shape, dtype=np.float32)
+        weight = np.zeros(shape, dtype=np.float32)
+        for source in sources:
+            offset = int(source[f"{granularity}_first"]) - first
+            selector = np.ix_(
+                [company_pos[str(c)] for c in source["companies"]],
+                [pair_pos[(str(k), str(f))] for k, f in zip(source["kpis"], source["factors"])],
+                np.arange(offset, offset + len(source[f"{granularity}_periods"]))
+            )
+            counts[selector] += source[f"{granularity}_counts"]
+            score[selector] += source[f"{granularity}_score"]
+            weight[selector] += source[f"{granularity}_weight"]
+
+        merged[f"{granularity}_first"] = np.array(first)
+        merged[f"{granularity}_periods"] = np.array(
+            [period_label(first + i, granularity) for i in range(last - first)], dtype=str
+        )
+        merged[f"{granularity}_counts"] = counts
+        merged[f"{granularity}_score"] = score
+        merged[f"{granularity}_weight"] = weight
+    return _trim(merged)
+
+
+def save_rollups(rollups, path=TREND_ROLLUP_PATH):
+    """롤업 배열 저장 (.npz, 임시 파일에 쓴 뒤 교체)"""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.tmp.npz"
+    np.savez_compressed(tmp_path, **rollups)
+    os.replace(tmp_path, path)
+
+
+def load_saved_rollups(path=TREND_ROLLUP_PATH):
+    """
+    증감분을 더할 저장된 롤업
+
+    Returns:
+        dict 또는 None (없거나, 기간 시작 정보가 없는 이전 형식이거나, 가중치 설정이 바뀌었으면 None)
+    """
+    if not os.path.exists(path):
+        return None
+    try:
+        arrays = TrendRollups.load(path).arrays
+    except (OSError, ValueError):
+        return None
+    if any(f"{granularity}_first" not in arrays for granularity in GRANULARITIES):
+        return None
+    if "weight_settings" not in arrays or str(arrays["weight_settings"]) != _weight_settings():
+        return None
+    return arrays
+
+
+class TrendRollups:
+    """저장된 롤업 배열 조회"""
+
+    def __init__(self, rollups):
+        self.arrays = rollups
+        self.companies = [str(c) for c in rollups["companies"]]
+        self.kpis = rollups["kpis"]
+        self.factors = rollups["factors"]
+
+    @classmethod
+    def load(cls, path=TREND_ROLLUP_PATH):
+        with np.load(path, allow_pickle=False) as data:
+            return cls({key: data[key] for key in data.files})
+
+    def shape(self, granularity):
+        """(회사 수, 조합 수, 기간 수)"""
+        return self.arrays[f"{granularity}_score"].shape
+
+    def _select(self, values, wanted):
+        """이름 조건에 맞는 위치 마스크 (None이면 전체)"""
+        if wanted is None:
+            return np.ones(len(values), dtype=bool)
+        if isinstance(wanted, str):
+            wanted = [wanted]
+        return np.isin(values, list(wanted))
+
+    def series(self, kpi=None, factor=None, company=None, granularity="month", start=None, end=None):
+        """
+        추세 시계열 조회 (조건에 맞는 회사/조합을 합산)
+
+        Args:
+            kpi, factor, company: 이름 1개 또는 리스트 (None이면 전체 합산)
+            granularity: "week", "month", "quarter"
+            start, end: 기간 이름 (예: "2023-01", "2023-Q1", "2023-W03", 양 끝 포함)
+
+        Returns:
+            dict: {"periods", "positive", "negative", "neutral", "score", "mean_score"} (기간순 리스트)
+        """
+        if granularity not in GRANULARITIES:
+            raise ValueError(f"지원하지 않는 기간 단위: {granularity} (사용 가능: {', '.join(GRANULARITIES)})")
+        periods = self.arrays[f"{granularity}_periods"]
+        counts = self.arrays[f"{granularity}_counts"]
+        score = self.arrays[f"{granularity}_score"]
+        weight = self.arrays[f"{granularity}_weight"]
+
+        company_mask = self._select(self.arrays["companies"], company)
+        pair_mask = self._select(self.kpis, kpi) & self._select(self.factors, factor)
+        period_mask = np.ones(len(periods), dtype=bool)
+        if start is not None:
+            period_mask &= periods >= start
+        if end is not None:
+            period_mask &= periods <= end
+
+        # 회사/조합 축을 합산 (np.ix_로 필요한 부분만 잘라냄)
+        selector = np.ix_(company_mask, pair_mask, period_mask)
+        summed_counts = counts[selector].sum(axis=(0, 1))
+        summed_score = score[selector].sum(axis=(0, 1))
+        summed_weight = weight[selector].sum(axis=(0, 1))
+        mean_score = np.divide(summed_score, summed_weight,
+                               out=np.zeros_like(summed_score), where=summed_weight > 0)
+
+        result = {"periods": [str(p) for p in periods[period_mask]]}
+        for i, relation in enumerate(RELATION_TYPES):
+            result[relation] = summed_counts[:, i].tolist()
+        result["score"] = [round(float(v), 4) for v in summed_score]
+        result["mean_score"] = [round(float(v), 4) for v in mean_score]
+        return result